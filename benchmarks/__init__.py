@@ -0,0 +1 @@
+"""Offline benchmarks for the dashboard's data pipeline on synthetic sheets"""
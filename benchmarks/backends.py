@@ -0,0 +1,152 @@
+"""Compare the query backends on synthetic snapshots of growing size, offline.
+
+    python -m benchmarks.backends --rows 10000 100000 1000000 --out backends.json
+
+For each size the synthetic sheets are parsed and written as Parquet
+snapshots, then each backend answers one rerun's worth of dashboard
+queries (KPI totals, the P&L time series, cost per team and the filtered
+P&L rows) for a one-year window and a project:
+
+- cold: from the snapshot files, as after a restart; pandas reads the
+  sheets and builds its filter engines and cube, DuckDB only queries
+- warm: a new filter selection on an already-open backend
+- resident MB: memory the backend holds between reruns (the loaded frames
+  for pandas; DuckDB keeps none)
+
+The crossover is the smallest size at which DuckDB is faster, per column.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from manpower.backends import DuckDBBackend, PandasBackend
+from manpower.filters import filter_key
+from manpower.sheets import SheetBundle, content_hash, parse_csv
+from manpower.snapshots import SnapshotStore
+
+ROWS = [1_000, 10_000, 100_000, 1_000_000]
+REPEAT = 5
+SHEETS = ["Project_PnL", "Manpower_Cost_Per_Project"]
+
+
+def write_snapshots(n_rows, directory):
+    """Parse the synthetic sheets and snapshot them; returns ``(store, versions)``"""
+    store = SnapshotStore(directory)
+    raw = generate(n_rows)
+    versions = {}
+    for name in SHEETS:
+        df, report = parse_csv(raw[name], name)
+        versions[name] = content_hash(raw[name])
+        store.write(name, df, versions[name], datetime.now(), report)
+    return store, versions
+
+
+def filter_keys(store, count):
+    """``count`` different one-year windows, each with a project, so no memo answers a later one"""
+    pnl = store.read("Project_PnL")[0]
+    months = sorted(pnl['Month'].dropna().unique())
+    project = pnl['Project Name'].dropna().iloc[0]
+    return [filter_key((months[i], months[i + 11]), project=project) for i in range(min(count, len(months) - 11))]
+
+
+def rerun(backend, key):
+    """The queries of one dashboard rerun on the Time Series, Cost Breakdown and P&L Summary tabs"""
+    backend.pnl_totals(key)
+    backend.time_series(key)
+    backend.group_sum("Manpower_Cost_Per_Project", key, ['Team'], ['Cost'])
+    backend.filtered("Project_PnL", key)
+
+
+def open_pandas(store, versions):
+    frames = {name: store.read(name)[0] for name in SHEETS}
+    return PandasBackend(SheetBundle(frames, {}, hashes=versions))
+
+
+def open_duckdb(store, versions):
+    return DuckDBBackend(versions, store)
+
+
+BACKENDS = {"pandas": open_pandas, "duckdb": open_duckdb}
+
+
+def resident_bytes(backend):
+    if isinstance(backend, PandasBackend):
+        return sum(int(df.memory_usage(deep=True).sum()) for df in backend.sheets.frames.values())
+    return 0
+
+
+def measure_size(n_rows, repeat=REPEAT):
+    """``{backend: {"cold", "warm", "resident_mb"}}`` at one size; times are medians in seconds"""
+    directory = tempfile.mkdtemp(prefix="manpower-backends-")
+    try:
+        store, versions = write_snapshots(n_rows, directory)
+        keys = filter_keys(store, repeat + 1)
+        results = {}
+        for name, open_backend in BACKENDS.items():
+            cold = []
+            for key in keys[:repeat]:
+                start = time.perf_counter()
+                backend = open_backend(store, versions)
+                rerun(backend, key)
+                cold.append(time.perf_counter() - start)
+            warm = []
+            for key in keys[1:repeat + 1]:
+                start = time.perf_counter()
+                rerun(backend, key)
+                warm.append(time.perf_counter() - start)
+            results[name] = {"cold": statistics.median(cold), "warm": statistics.median(warm),
+                             "resident_mb": resident_bytes(backend) / 2**20}
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def crossover(results, metric):
+    """Smallest row count at which DuckDB beats pandas on ``metric``, or None"""
+    for n_rows, backends in sorted(results.items()):
+        if backends["duckdb"][metric] < backends["pandas"][metric]:
+            return n_rows
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", nargs="+", type=int, default=ROWS, help="rows per sheet, one run per size")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'backend':>8} {'cold ms':>10} {'warm ms':>10} {'resident MB':>12}")
+    results = {}
+    for n_rows in args.rows:
+        results[n_rows] = measure_size(n_rows, args.repeat)
+        for name, timing in results[n_rows].items():
+            print(f"{n_rows:>10,} {name:>8} {timing['cold'] * 1000:>10.1f} {timing['warm'] * 1000:>10.1f} "
+                  f"{timing['resident_mb']:>12.1f}")
+
+    crossovers = {metric: crossover(results, metric) for metric in ("cold", "warm")}
+    for metric, n_rows in crossovers.items():
+        print(f"DuckDB faster ({metric}): " + (f"from {n_rows:,} rows" if n_rows else "not at these sizes"))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "meta": {"created": datetime.now().isoformat(timespec="seconds"), "pandas": pd.__version__,
+                         "cpus": os.cpu_count(), "repeat": args.repeat},
+                "results": {str(n): r for n, r in results.items()},
+                "crossover": crossovers,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
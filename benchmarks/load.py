@@ -0,0 +1,182 @@
+"""Drive many concurrent dashboard sessions against synthetic sheets, offline.
+
+    python -m benchmarks.load --sessions 1 5 20 --steps 20 --size 1k --out load.json
+
+Each simulated session is a Streamlit ``AppTest`` of the real app: it logs
+in through the login form, then makes random filter changes (date range,
+project, category, status) and tab switches, one rerun per action. The
+sessions at each level run at the same time in one process, so they share
+the app's caches the way real viewers do. The sheets are synthetic CSVs
+served from a local HTTP server; the app's own download, snapshot and
+refresh path runs unchanged. For every session count the rerun latency
+percentiles, total throughput and process RSS are reported.
+
+AppTest cannot run two scripts at once in one process, so the sessions'
+reruns take turns: a model of one GIL-bound server process. Latency
+includes the wait for a turn; "service" is the rerun alone.
+"""
+import argparse
+import functools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from benchmarks.synthetic import SIZES, generate
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "manpower_dashboard.py")
+EMAIL, PASSWORD = "admin@example.com", "admin123"
+SESSIONS = [1, 5, 10]
+STEPS = 20
+TIMEOUT = 300
+
+# AppTest installs a process-wide mock runtime for each run, so runs from
+# different sessions cannot overlap; see run_session
+_run_lock = threading.Lock()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_directory(directory):
+    """Serve ``directory`` on a free local port; returns ``(server, export_url_template)``"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, name="sheet-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/{{gid}}.csv"
+
+
+def write_sheets(size, directory):
+    """Write the synthetic sheets as ``<gid>.csv``, the file names the export URL asks for"""
+    from manpower.sheets import SHEET_GIDS
+
+    for name, data in generate(SIZES[size]).items():
+        with open(os.path.join(directory, f"{SHEET_GIDS[name]}.csv"), "wb") as f:
+            f.write(data)
+
+
+def _timed_run(at):
+    """Rerun the session; returns ``(latency, service)`` seconds, latency including the wait for its turn"""
+    queued = time.perf_counter()
+    with _run_lock:
+        start = time.perf_counter()
+        at.run()
+        done = time.perf_counter()
+    return done - queued, done - start
+
+
+def _random_action(at, rng):
+    """Queue one random filter change or tab switch on the session"""
+    selectboxes = list(at.sidebar.selectbox)
+    kind = rng.choice(["tab", "filter", "filter", "dates"])
+    if kind == "tab":
+        tabs = at.radio(key="active_tab")
+        tabs.set_value(rng.choice(tabs.options))
+    elif kind == "dates" and at.sidebar.date_input:
+        picker = at.sidebar.date_input[0]
+        low, high = picker.min, picker.max
+        low, high = (v.date() if isinstance(v, datetime) else v for v in (low, high))
+        days = sorted(rng.sample(range((high - low).days + 1), 2))
+        picker.set_value((date.fromordinal(low.toordinal() + days[0]), date.fromordinal(low.toordinal() + days[1])))
+    elif selectboxes:
+        box = rng.choice(selectboxes)
+        # Mostly back to "All ...", so sessions do not narrow down to empty views
+        box.set_value(box.options[0] if rng.random() < 0.4 else rng.choice(box.options))
+
+
+def run_session(seed, steps=STEPS, timeout=TIMEOUT):
+    """Log in and perform ``steps`` random actions; returns ``(timings, errors)``.
+
+    ``timings`` holds a ``(latency, service)`` pair for the login submit
+    and every action after it. Sessions keep their own state, but their
+    reruns take turns, as in one server process where reruns compete for
+    the GIL; latency therefore includes queueing behind other sessions.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    _timed_run(at)
+    at.text_input[0].input(EMAIL)
+    at.text_input[1].input(PASSWORD)
+    at.button[0].click()
+    timings = [_timed_run(at)]
+    errors = len(at.exception)
+    for _ in range(steps):
+        _random_action(at, rng)
+        timings.append(_timed_run(at))
+        errors += len(at.exception)
+    return timings, errors
+
+
+def run_level(n_sessions, steps=STEPS, seed=0, log=print):
+    """Run ``n_sessions`` sessions concurrently; returns latency percentiles, throughput and RSS"""
+    from manpower.metrics import rss_bytes
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        outcomes = list(pool.map(lambda i: run_session(seed + i, steps), range(n_sessions)))
+    wall = time.perf_counter() - start
+
+    timings = np.array([t for session, _ in outcomes for t in session])
+    p50, p95, p99 = np.percentile(timings[:, 0], [50, 95, 99])
+    result = {
+        "sessions": n_sessions,
+        "reruns": len(timings),
+        "errors": sum(errors for _, errors in outcomes),
+        "p50": p50, "p95": p95, "p99": p99,
+        "service_p50": float(np.median(timings[:, 1])),
+        "throughput": len(timings) / wall,
+        "rss_mb": rss_bytes() / 2**20,
+    }
+    log(f"{n_sessions:>8} {result['reruns']:>7} {p50 * 1000:>9.0f} {p95 * 1000:>9.0f} {p99 * 1000:>9.0f} "
+        f"{result['service_p50'] * 1000:>11.0f} {result['throughput']:>9.1f} {result['rss_mb']:>8.0f} {result['errors']:>6}")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", nargs="+", type=int, default=SESSIONS, help="concurrent session counts to run")
+    parser.add_argument("--steps", type=int, default=STEPS, help="actions (reruns) per session after logging in")
+    parser.add_argument("--size", choices=list(SIZES), default="1k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    # The manpower modules read these at import, so they are set before anything imports them
+    workdir = tempfile.mkdtemp(prefix="manpower-load-")
+    server, os.environ["MANPOWER_EXPORT_URL"] = serve_directory(workdir)
+    os.environ["MANPOWER_SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+    write_sheets(args.size, workdir)
+
+    start = time.perf_counter()
+    run_session(args.seed, steps=0)
+    print(f"Cold start (first login, loads {SIZES[args.size]:,} rows per sheet): {time.perf_counter() - start:.2f}s")
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'service ms':>11} "
+          f"{'reruns/s':>9} {'RSS MB':>8} {'errors':>6}")
+    levels = [run_level(n, args.steps, args.seed) for n in args.sessions]
+    server.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "meta": {"created": datetime.now().isoformat(timespec="seconds"), "size": args.size,
+                         "steps": args.steps},
+                "levels": levels,
+            }, f, indent=2)
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
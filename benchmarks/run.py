@@ -0,0 +1,224 @@
+"""Time the dashboard's data pipeline on synthetic sheets, offline.
+
+    python -m benchmarks.run --sizes 1k 100k --out results.json
+    python -m benchmarks.run --baseline baseline.json --threshold 0.25 --threshold-for "figure/*=0.5"
+
+Every step the dashboard runs per sheet or per tab is timed: CSV parsing,
+filtering, the KPI sums, the time-series groupby, the trend engine (full
+build, extending it by a newly arrived month, and its queries), the
+compensation roll-up, cost reconciliation, figure construction (including
+JSON serialization, which is what Streamlit sends to the browser) and table
+preparation. Results are
+written as JSON; any results file can be used as a baseline for a later
+run, which exits with status 1 if a step got slower than its threshold.
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic import SIZES, generate
+from manpower.charts import (
+    profitability_figure,
+    profitability_rows,
+    team_cost_figure,
+    time_series_figure,
+    timeline_figure,
+    timeline_rows,
+)
+from manpower.compensation import CompensationRollup
+from manpower.cube import PnLCube
+from manpower.engine import compensation_summary, pnl_summary, team_cost_breakdown
+from manpower.filters import FilterEngine, filter_key
+from manpower.reconcile import reconcile
+from manpower.sheets import parse_csv
+from manpower.tables import PAGE_SIZE, TableEngine, employee_rollup
+from manpower.trends import TrendEngine
+
+REPEAT = 5
+THRESHOLD = 0.20
+# Slowdowns smaller than this (seconds) are treated as noise
+MIN_DELTA = 0.005
+
+
+def measure(func, setup=None, repeat=REPEAT):
+    """Median and best wall time of ``func(setup())`` over ``repeat`` runs; setup is not timed"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times)}
+
+
+def pipeline_cases(n_rows):
+    """Yield ``(name, func, setup)`` for every timed step on a workbook of ``n_rows`` rows"""
+    raw = generate(n_rows)
+    sheets = {name: parse_csv(data, name)[0] for name, data in raw.items()}
+    pnl = sheets["Project_PnL"]
+    months = sorted(pnl['Month'].dropna().unique())
+    year = filter_key((months[-12], months[-1]))
+    year_team = filter_key((months[-12], months[-1]), team="Data")
+
+    for name, data in raw.items():
+        yield f"parse/{name}", lambda _, data=data, name=name: parse_csv(data, name), None
+
+    yield "filter/build", lambda _: FilterEngine(pnl, 'Month'), None
+    yield "filter/apply_dates", lambda engine: engine.apply(year), lambda: FilterEngine(pnl, 'Month')
+    yield "filter/apply_team", lambda engine: engine.apply(year_team), lambda: FilterEngine(pnl, 'Month')
+
+    yield "kpi/cube_build", lambda _: PnLCube(pnl, 'Month'), None
+    yield "kpi/totals", lambda cube: cube.totals(year), lambda: PnLCube(pnl, 'Month')
+    yield "time_series/groupby", lambda cube: cube.time_series(year), lambda: PnLCube(pnl, 'Month')
+
+    # The newest month arriving in a refresh: extend the engine of the sheet without it
+    without_last = pnl[pnl['Month'] < months[-1]]
+    yield "trends/build", lambda _: TrendEngine(pnl, 'Month'), None
+    yield "trends/extend", lambda engine: engine.extend(pnl), lambda: TrendEngine(without_last, 'Month')
+    yield "trends/series", lambda engine: engine.series(year), lambda: TrendEngine(pnl, 'Month')
+    yield "trends/summary", lambda engine: engine.summary(year), lambda: TrendEngine(pnl, 'Month')
+
+    salary = sheets["Salary_Growth"]
+    salary_numeric = ['Current Salary', 'Growth %', 'Total Cost']
+    yield "compensation/build", lambda _: CompensationRollup(salary, 'Growth Month', salary_numeric), None
+    yield ("compensation/query", lambda rollup: rollup.query(year[0]),
+           lambda: CompensationRollup(salary, 'Growth Month', salary_numeric))
+
+    filtered_pnl = FilterEngine(pnl, 'Month').apply(year)
+    filtered_cost = FilterEngine(sheets["Manpower_Cost_Per_Project"], 'Month_Key').apply(year)
+    cube = PnLCube(pnl, 'Month')
+    time_series = cube.time_series(year)
+    bubble_df = filtered_pnl[['Project Name', 'PnL', 'Revenue', 'Man Power Cost', 'Status']].dropna()
+    bubble_df = profitability_rows(bubble_df, 'Man Power Cost')
+    timeline = timeline_rows(sheets["Projects"], 'Project Name', 'Start Date', 'End Date')
+
+    def timeline_tab(_):
+        return timeline_figure(timeline, 'Project Name', 'Start Date', 'End Date').to_json()
+
+    def time_series_tab(_):
+        return time_series_figure(time_series, 'Month', 'Revenue', 'Man Power Cost', 'PnL').to_json()
+
+    def profitability_tab(_):
+        return profitability_figure(bubble_df, 'Project Name', 'PnL', 'Revenue', 'Man Power Cost', 'Status').to_json()
+
+    def cost_breakdown_tab(_):
+        team_cost = team_cost_breakdown(filtered_cost, 'Team', 'Cost')
+        return team_cost_figure(team_cost, 'Team', 'Cost').to_json()
+
+    yield "figure/timeline", timeline_tab, None
+    yield "figure/time_series", time_series_tab, None
+    yield "figure/profitability", profitability_tab, None
+    yield "figure/cost_breakdown", cost_breakdown_tab, None
+
+    totals = cube.totals(year)
+    yield "table/pnl_summary", lambda _: pnl_summary(filtered_pnl, totals), None
+
+    allocation = FilterEngine(sheets["Manpower_Allocation"], 'Month_Key').apply(year)
+
+    def allocation_rows(_):
+        return TableEngine(allocation, ['Employee Name', 'Role', 'Project Name']).page(1, PAGE_SIZE, "lead", 'Total Cost', True)
+
+    def allocation_per_employee(_):
+        return TableEngine(employee_rollup(allocation, 'Month_Key'), ['Employee Name', 'Role']).page(1, PAGE_SIZE, sort_col='Total Cost')
+
+    yield "table/allocation_rows", allocation_rows, None
+    yield "table/allocation_per_employee", allocation_per_employee, None
+
+    employee_max, numeric_totals = CompensationRollup(salary, 'Growth Month', salary_numeric).query(year[0])
+    yield "table/compensation", lambda _: compensation_summary(employee_max, numeric_totals, salary_numeric), None
+
+    yield "reconcile/year", lambda _: reconcile(allocation, salary, filtered_cost, filtered_pnl), None
+
+
+def run(sizes, repeat=REPEAT, log=print):
+    """Time every case at each named size; returns the results document"""
+    results = {}
+    for size in sizes:
+        log(f"== {size} ({SIZES[size]:,} rows)")
+        results[size] = {}
+        for name, func, setup in pipeline_cases(SIZES[size]):
+            timing = measure(func, setup, repeat)
+            results[size][name] = timing
+            log(f"{name:<36} {timing['median'] * 1000:>10.1f} ms  (best {timing['min'] * 1000:.1f} ms)")
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def threshold_for(name, threshold, overrides):
+    """The allowed relative slowdown for a case; the first matching ``pattern=fraction`` override wins"""
+    for pattern, value in overrides:
+        if fnmatch.fnmatch(name, pattern):
+            return value
+    return threshold
+
+
+def compare(results, baseline, threshold=THRESHOLD, min_delta=MIN_DELTA, overrides=()):
+    """List ``(size, name, base, new, allowed)`` for every case slower than its threshold"""
+    regressions = []
+    for size, cases in results["results"].items():
+        for name, timing in cases.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if base is None:
+                continue
+            allowed = threshold_for(name, threshold, overrides)
+            new, old = timing["median"], base["median"]
+            if new > old * (1 + allowed) and new - old > min_delta:
+                regressions.append((size, name, old, new, allowed))
+    return regressions
+
+
+def _override(text):
+    pattern, _, value = text.rpartition("=")
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"expected PATTERN=FRACTION, got {text!r}")
+    return pattern, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["1k", "100k"])
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--out", help="write results JSON here (usable as a later --baseline)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed relative slowdown of the median, e.g. 0.2 for 20%%")
+    parser.add_argument("--threshold-for", type=_override, action="append", default=[], metavar="PATTERN=FRACTION",
+                        help="per-case threshold, glob on the case name (repeatable)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.min_delta, args.threshold_for)
+    for size, name, old, new, allowed in regressions:
+        print(f"REGRESSION {size} {name}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms (allowed +{allowed:.0%})")
+    if not regressions:
+        print("No regressions against", args.baseline)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
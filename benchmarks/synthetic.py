@@ -0,0 +1,126 @@
+"""Synthetic CSV exports for all six sheets, shaped like the real Google Sheets"""
+import numpy as np
+import pandas as pd
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+MONTHS = 36
+CATEGORIES = ["Internal", "External", "Government", "R&D"]
+TEAMS = ["Backend", "Frontend", "Data", "QA", "Mobile", "DevOps", "Design", "PMO"]
+ROLES = ["Engineer", "Senior Engineer", "Lead", "Analyst", "Manager"]
+
+
+def rupiah(values):
+    """Format integers the way the sheets show money, e.g. ``Rp 1.234.567``"""
+    return "Rp " + pd.Series(values).map("{:,}".format).str.replace(",", ".", regex=False)
+
+
+def percent(values, decimals=2):
+    """Format numbers as Indonesian percentages, e.g. ``12,50%``"""
+    text = pd.Series(np.round(values, decimals)).map(f"{{:.{decimals}f}}".format)
+    return text.str.replace(".", ",", regex=False) + "%"
+
+
+def iso_dates(values):
+    return pd.DatetimeIndex(values).strftime("%Y-%m-%d")
+
+
+def _csv(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def generate(n_rows, seed=0):
+    """Raw CSV bytes per sheet name for a workbook whose fact sheets have ``n_rows`` rows.
+
+    Project_PnL, Manpower_Cost_Per_Project, Manpower_Allocation and
+    Salary_Growth get ``n_rows`` rows each; Projects and Employees grow
+    with them (one project per 50 rows, one employee per 20) so the
+    number of distinct values scales the way a bigger company would.
+    """
+    rng = np.random.default_rng(seed)
+    n_projects = max(10, n_rows // 50)
+    n_employees = max(20, n_rows // 20)
+    months = pd.date_range("2023-01-01", periods=MONTHS, freq="MS").to_numpy()
+    projects = np.array([f"Project {i:05d}" for i in range(n_projects)])
+    employees = np.array([f"Employee {i:06d}" for i in range(n_employees)])
+    employee_team = rng.choice(TEAMS, n_employees)
+    employee_role = rng.choice(ROLES, n_employees)
+    project_category = rng.choice(CATEGORIES, n_projects)
+    salary = rng.integers(5_000_000, 40_000_000, n_employees)
+    joined = months[0] - rng.integers(0, 2000, n_employees).astype("timedelta64[D]")
+
+    project_start = months[0] + rng.integers(0, 900, n_projects).astype("timedelta64[D]")
+    project_end = project_start + rng.integers(30, 720, n_projects).astype("timedelta64[D]")
+    project_status = rng.choice(["Active", "Completed", "On Hold"], n_projects, p=[0.6, 0.3, 0.1])
+
+    sheets = {}
+    sheets["Projects"] = _csv(pd.DataFrame({
+        "Project Name": projects,
+        "Category": project_category,
+        "Status": project_status,
+        "Start Date": iso_dates(project_start),
+        "End Date": iso_dates(project_end),
+    }))
+    sheets["Employees"] = _csv(pd.DataFrame({
+        "Employee Id": np.arange(1, n_employees + 1),
+        "Employee Name": employees,
+        "Role": employee_role,
+        "Team": employee_team,
+        "Status": rng.choice(["Active", "Resigned"], n_employees, p=[0.9, 0.1]),
+        "Join Date": iso_dates(joined),
+        "Salary": rupiah(salary),
+    }))
+
+    project = rng.integers(0, n_projects, n_rows)
+    revenue = rng.integers(10_000_000, 2_000_000_000, n_rows)
+    cost = (revenue * rng.uniform(0.4, 1.3, n_rows)).astype(np.int64)
+    sheets["Project_PnL"] = _csv(pd.DataFrame({
+        "Month": iso_dates(rng.choice(months, n_rows)),
+        "Project Name": projects[project],
+        "Category": project_category[project],
+        "Team": rng.choice(TEAMS, n_rows),
+        "Status": np.where(revenue >= cost, "Profitable", "Loss"),
+        "Revenue": rupiah(revenue),
+        "Man Power Cost": rupiah(cost),
+        "PnL": rupiah(revenue - cost),
+        "Margin": percent((revenue - cost) / revenue * 100),
+    }))
+
+    project = rng.integers(0, n_projects, n_rows)
+    sheets["Manpower_Cost_Per_Project"] = _csv(pd.DataFrame({
+        "Month_Key": iso_dates(rng.choice(months, n_rows)),
+        "Project Name": projects[project],
+        "Team": rng.choice(TEAMS, n_rows),
+        "Category": project_category[project],
+        "Status": project_status[project],
+        "Cost": rupiah(rng.integers(1_000_000, 300_000_000, n_rows)),
+    }))
+
+    employee = rng.integers(0, n_employees, n_rows)
+    project = rng.integers(0, n_projects, n_rows)
+    sheets["Manpower_Allocation"] = _csv(pd.DataFrame({
+        "Month_Key": iso_dates(rng.choice(months, n_rows)),
+        "Employee Id": employee + 1,
+        "Employee Name": employees[employee],
+        "Role": employee_role[employee],
+        "Team": employee_team[employee],
+        "Project Name": projects[project],
+        "Status Allocation": rng.choice(["Billable", "Non-Billable"], n_rows),
+        "Allocation per project": percent(rng.integers(5, 100, n_rows), 0),
+        "Total Allocation": percent(rng.integers(50, 120, n_rows), 0),
+        "Total Cost": rupiah(salary[employee] + rng.integers(0, 5_000_000, n_rows)),
+    }))
+
+    employee = rng.integers(0, n_employees, n_rows)
+    growth = rng.integers(0, 15, n_rows)
+    sheets["Salary_Growth"] = _csv(pd.DataFrame({
+        "Employee Id": employee + 1,
+        "Employee Name": employees[employee],
+        "Role": employee_role[employee],
+        "Team": employee_team[employee],
+        "Growth Month": iso_dates(rng.choice(months, n_rows)),
+        "Join Date": iso_dates(joined[employee]),
+        "Current Salary": rupiah((salary[employee] * (1 + growth / 100)).astype(np.int64)),
+        "Growth %": percent(growth, 0),
+        "Total Cost": rupiah((salary[employee] * 1.3).astype(np.int64)),
+    }))
+    return sheets
@@ -0,0 +1 @@
+"""Data layer for the Man Power Cost Analysis Dashboard (no Streamlit imports)."""
@@ -0,0 +1,402 @@
+"""Query backends: the dashboard's filters and roll-ups, over loaded frames or over the Parquet snapshots"""
+import os
+import threading
+
+import pandas as pd
+
+from manpower.cube import MEASURES, PnLCube, with_margin
+from manpower.engine import DATE_COLUMNS
+from manpower.filters import FILTER_COLUMNS, FilterEngine
+from manpower.reconcile import COST_KEYS, can_derive, derived_costs
+from manpower.schema import column
+from manpower.snapshots import SnapshotStore
+
+BACKENDS = ("pandas", "duckdb")
+QUERY_BACKEND = os.environ.get("MANPOWER_QUERY_BACKEND", "pandas").lower()
+if QUERY_BACKEND not in BACKENDS:
+    raise ValueError(f"MANPOWER_QUERY_BACKEND must be one of {', '.join(BACKENDS)}, not {QUERY_BACKEND!r}")
+# DuckDB spills to disk beyond this, e.g. "2GB"; empty leaves DuckDB's default (80% of RAM)
+DUCKDB_MEMORY_LIMIT = os.environ.get("MANPOWER_DUCKDB_MEMORY_LIMIT", "")
+# Column of :meth:`QueryBackend.partials` holding the number of rows in each group
+ROW_COUNT = "Rows"
+
+
+class QueryBackend:
+    """What the dashboard asks of its data, independent of where the rows live.
+
+    Every query takes a filter tuple from :func:`filter_key` and follows
+    :class:`FilterEngine`'s rules: the date range applies to the sheet's
+    column in ``DATE_COLUMNS`` (excluding undated rows), and each set
+    equality filter to its column in ``FILTER_COLUMNS`` where the sheet
+    has it. Results are shared and must not be modified in place.
+    """
+
+    name = None
+
+    def version(self, sheet_name):
+        """Content hash of the sheet being queried, or None if it is not loaded"""
+        raise NotImplementedError
+
+    def schema(self, sheet_name):
+        """An empty frame with the sheet's columns and dtypes"""
+        raise NotImplementedError
+
+    def sheet(self, sheet_name, columns=None):
+        """The whole sheet, optionally only ``columns``"""
+        raise NotImplementedError
+
+    def filtered(self, sheet_name, key, columns=None):
+        """The sheet's rows matching ``key`` in date order, optionally only ``columns``"""
+        raise NotImplementedError
+
+    def totals(self, sheet_name, key, measures):
+        """``{measure: sum}`` over the rows matching ``key``"""
+        raise NotImplementedError
+
+    def group_sum(self, sheet_name, key, by, measures):
+        """``measures`` summed per distinct ``by`` values of the rows matching ``key``, sorted by ``by``"""
+        raise NotImplementedError
+
+    def partials(self, sheet_name, by, measures):
+        """``measures`` summed, and rows counted in ``ROW_COUNT``, per distinct ``by`` values of the whole sheet.
+
+        Unlike :meth:`group_sum`, missing ``by`` values form groups of their
+        own, so the partials add up to the sheet. Sorted by ``by``, missing last.
+        """
+        raise NotImplementedError
+
+    def allocation_costs(self, key):
+        """:func:`derived_costs` of the Manpower_Allocation rows matching ``key``, or None without the columns.
+
+        Salaries are not filtered: the as-of lookup needs the rows before the range.
+        """
+        raise NotImplementedError
+
+    def distinct(self, sheet_name, col):
+        """Sorted distinct non-null values of a column"""
+        raise NotImplementedError
+
+    def bounds(self, sheet_name, col):
+        """Smallest and largest value of a column"""
+        raise NotImplementedError
+
+    def pnl_measures(self):
+        return [c for c in MEASURES if c in self.schema("Project_PnL").columns]
+
+    def pnl_totals(self, key):
+        """Project_PnL measures summed for a filter tuple, plus Margin"""
+        return with_margin(self.totals("Project_PnL", key, self.pnl_measures()))
+
+    def time_series(self, key):
+        """Project_PnL measures summed per month for a filter tuple"""
+        month_col = column(self.schema("Project_PnL"), 'Month')
+        if not month_col:
+            return pd.DataFrame(columns=self.pnl_measures())
+        return self.group_sum("Project_PnL", key, [month_col], self.pnl_measures())
+
+
+class PandasBackend(QueryBackend):
+    """Queries over the frames of a loaded :class:`SheetBundle` (the default).
+
+    Filters go through one :class:`FilterEngine` per sheet and Project_PnL
+    roll-ups through a :class:`PnLCube`. ``filter_engine(version, date_col,
+    df)`` and ``pnl_cube(version, month_col, df)`` build them; pass memoized
+    builders to share them between backends over the same data.
+    """
+
+    name = "pandas"
+
+    def __init__(self, sheets, filter_engine=None, pnl_cube=None):
+        self.sheets = sheets
+        self._build_engine = filter_engine or (lambda version, date_col, df: FilterEngine(df, date_col))
+        self._build_cube = pnl_cube or (lambda version, month_col, df: PnLCube(df, month_col))
+        self._engines = {}
+        self._cube = None
+        self._lock = threading.Lock()
+
+    def version(self, sheet_name):
+        return self.sheets.hashes.get(sheet_name)
+
+    def schema(self, sheet_name):
+        return self.sheets.get(sheet_name).iloc[:0]
+
+    def sheet(self, sheet_name, columns=None):
+        df = self.sheets.get(sheet_name)
+        return df if columns is None else df[list(columns)]
+
+    def engine(self, sheet_name):
+        """The sheet's :class:`FilterEngine`, built on first use"""
+        with self._lock:
+            engine = self._engines.get(sheet_name)
+        if engine is None:
+            df = self.sheets.get(sheet_name)
+            engine = self._build_engine(self.version(sheet_name), column(df, DATE_COLUMNS.get(sheet_name, '')), df)
+            with self._lock:
+                self._engines[sheet_name] = engine
+        return engine
+
+    def cube(self):
+        """The Project_PnL :class:`PnLCube`, built on first use"""
+        if self._cube is None:
+            df = self.sheets.get("Project_PnL")
+            self._cube = self._build_cube(self.version("Project_PnL"), column(df, 'Month'), df)
+        return self._cube
+
+    def filtered(self, sheet_name, key, columns=None):
+        if self.sheets.get(sheet_name).empty:
+            return pd.DataFrame()
+        df = self.engine(sheet_name).apply(key)
+        return df if columns is None else df[list(columns)]
+
+    def _rows(self, sheet_name, key, by, measures):
+        """Rows to roll up: the P&L cube's when it holds every column asked for, else the sheet's"""
+        if sheet_name == "Project_PnL" and not self.sheets.get(sheet_name).empty:
+            cube = self.cube()
+            if set(by) <= set(cube.dims) and set(measures) <= set(cube.measures):
+                return cube.engine.apply(key)
+        return self.filtered(sheet_name, key)
+
+    def totals(self, sheet_name, key, measures):
+        rows = self._rows(sheet_name, key, [], measures)
+        if rows.empty:
+            return {col: 0 for col in measures}
+        sums = rows[measures].sum()
+        return {col: sums[col] for col in measures}
+
+    def group_sum(self, sheet_name, key, by, measures):
+        rows = self._rows(sheet_name, key, by, measures)
+        if rows.empty:
+            return pd.DataFrame(columns=list(by) + list(measures))
+        return rows.groupby(by, observed=True)[measures].sum().reset_index()
+
+    def partials(self, sheet_name, by, measures):
+        df = self.sheets.get(sheet_name)
+        if df.empty:
+            return pd.DataFrame(columns=list(by) + list(measures) + [ROW_COUNT])
+        grouped = df.groupby(list(by), observed=True, dropna=False, sort=True)
+        sums = grouped[list(measures)].sum()
+        sums[ROW_COUNT] = grouped.size()
+        return sums.reset_index()
+
+    def allocation_costs(self, key):
+        allocation_df, salary_df = self.filtered("Manpower_Allocation", key), self.sheet("Salary_Growth")
+        if not can_derive(allocation_df, salary_df):
+            return None
+        return derived_costs(allocation_df, salary_df)
+
+    def distinct(self, sheet_name, col):
+        df = self.sheets.get(sheet_name)
+        if sheet_name == "Project_PnL" and col in FILTER_COLUMNS and not df.empty:
+            return self.cube().options(col)
+        return sorted(df[col].dropna().unique().tolist()) if col in df.columns else []
+
+    def bounds(self, sheet_name, col):
+        df = self.sheets.get(sheet_name)
+        if sheet_name == "Project_PnL" and not df.empty and col == self.cube().month_col:
+            return self.cube().month_bounds()
+        return df[col].min(), df[col].max()
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class DuckDBBackend(QueryBackend):
+    """Queries pushed down to DuckDB over the Parquet snapshots, without loading the sheets.
+
+    Each query reads only the columns it needs, and the filters become a
+    WHERE clause that DuckDB checks against each Parquet row group's
+    min/max statistics before reading it, so memory is bounded by the
+    result, not the sheet. ``versions`` maps sheet names to the content
+    hashes of the snapshots being served (e.g. a :class:`SheetBundle`'s
+    ``hashes``). Queries read the snapshot file of exactly that version,
+    never a newer one a refresh has just written, so with a ``cache`` (a
+    :class:`BudgetCache`) results kept per version and query stay correct.
+    Only aggregates are cached; rows from :meth:`sheet` and :meth:`filtered`
+    are returned to the caller and not kept. Needs the ``duckdb`` package.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, versions, store=None, cache=None, memory_limit=DUCKDB_MEMORY_LIMIT):
+        import duckdb
+
+        self.versions = dict(versions)
+        self.store = store or SnapshotStore()
+        self.cache = cache
+        self._con = duckdb.connect()
+        if memory_limit:
+            self._con.execute("SET memory_limit = ?", [memory_limit])
+        self._lock = threading.Lock()
+        self._schemas = {}
+
+    def version(self, sheet_name):
+        return self.versions.get(sheet_name)
+
+    def _query(self, sql, params=()):
+        # A DuckDB connection must not be shared between threads; each query gets its own cursor
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            return cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+
+    def _cached(self, sheet_name, query, factory):
+        version = self.version(sheet_name)
+        if self.cache is None or version is None:
+            return factory()
+        return self.cache.get_or_create(("duckdb", sheet_name, version) + query, factory)
+
+    def _source(self, sheet_name):
+        """The snapshot file of the version being served, or None if there is none"""
+        version = self.version(sheet_name)
+        path = self.store.data_path(sheet_name, version) if version else None
+        return path if path and os.path.exists(path) else None
+
+    def schema(self, sheet_name):
+        schema = self._schemas.get(sheet_name)
+        if schema is None:
+            path = self._source(sheet_name)
+            schema = self._query("SELECT * FROM read_parquet(?) LIMIT 0", [path]) if path else pd.DataFrame()
+            self._schemas[sheet_name] = schema
+        return schema
+
+    def _date_col(self, sheet_name):
+        schema = self.schema(sheet_name)
+        date_col = column(schema, DATE_COLUMNS.get(sheet_name, ''))
+        return date_col if date_col and pd.api.types.is_datetime64_any_dtype(schema[date_col]) else None
+
+    def _where(self, sheet_name, key):
+        """``(sql, params)`` for a filter tuple; empty sql when nothing is filtered"""
+        date_range, *values = key
+        clauses, params = [], []
+        date_col = self._date_col(sheet_name)
+        if date_range is not None and date_col:
+            clauses.append(f"{_quote(date_col)} BETWEEN ? AND ?")
+            params += [pd.Timestamp(date_range[0]).to_pydatetime(), pd.Timestamp(date_range[1]).to_pydatetime()]
+        schema = self.schema(sheet_name)
+        for col, value in zip(FILTER_COLUMNS, values):
+            if value and col in schema.columns:
+                clauses.append(f"{_quote(col)} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _select(self, sheet_name, key, columns):
+        path = self._source(sheet_name)
+        if path is None:
+            return pd.DataFrame()
+        columns = list(self.schema(sheet_name).columns) if columns is None else list(columns)
+        where, params = self._where(sheet_name, key)
+        date_col = self._date_col(sheet_name)
+        # Same order as FilterEngine: by date, undated rows last, ties in sheet order
+        order = f" ORDER BY {_quote(date_col)} NULLS LAST, file_row_number" if date_col else ""
+        sql = (f"SELECT {', '.join(map(_quote, columns))} FROM read_parquet(?, file_row_number = true)"
+               f"{where}{order}")
+        return self._query(sql, [path] + params)
+
+    def sheet(self, sheet_name, columns=None):
+        return self._select(sheet_name, (None,) * (len(FILTER_COLUMNS) + 1), columns)
+
+    def filtered(self, sheet_name, key, columns=None):
+        return self._select(sheet_name, key, columns)
+
+    def _sum(self, sheet_name, col):
+        # Integer sums come back as BIGINT, as pandas would sum them, and 0 over no rows
+        total = f"SUM({_quote(col)})"
+        if pd.api.types.is_integer_dtype(self.schema(sheet_name)[col]):
+            total = f"CAST({total} AS BIGINT)"
+        return f"COALESCE({total}, 0) AS {_quote(col)}"
+
+    def totals(self, sheet_name, key, measures):
+        def query():
+            path = self._source(sheet_name)
+            if path is None or not measures:
+                return {col: 0 for col in measures}
+            where, params = self._where(sheet_name, key)
+            sums = self._query(
+                f"SELECT {', '.join(self._sum(sheet_name, c) for c in measures)} FROM read_parquet(?){where}",
+                [path] + params
+            )
+            return {col: sums[col].iloc[0] for col in measures}
+        return self._cached(sheet_name, ("totals", key, tuple(measures)), query)
+
+    def group_sum(self, sheet_name, key, by, measures):
+        def query():
+            path = self._source(sheet_name)
+            if path is None:
+                return pd.DataFrame(columns=list(by) + list(measures))
+            where, params = self._where(sheet_name, key)
+            groups = ", ".join(map(_quote, by))
+            not_null = " AND ".join(f"{_quote(c)} IS NOT NULL" for c in by)
+            where = f"{where} AND {not_null}" if where else f" WHERE {not_null}"
+            return self._query(
+                f"SELECT {groups}, {', '.join(self._sum(sheet_name, c) for c in measures)} "
+                f"FROM read_parquet(?){where} GROUP BY {groups} ORDER BY {groups}",
+                [path] + params
+            )
+        return self._cached(sheet_name, ("group_sum", key, tuple(by), tuple(measures)), query)
+
+    def partials(self, sheet_name, by, measures):
+        def query():
+            path = self._source(sheet_name)
+            if path is None:
+                return pd.DataFrame(columns=list(by) + list(measures) + [ROW_COUNT])
+            groups = ", ".join(map(_quote, by))
+            order = ", ".join(f"{_quote(c)} NULLS LAST" for c in by)
+            return self._query(
+                f"SELECT {groups}, {', '.join(self._sum(sheet_name, c) for c in measures)}, "
+                f"COUNT(*) AS {_quote(ROW_COUNT)} FROM read_parquet(?) GROUP BY {groups} ORDER BY {order}",
+                [path]
+            )
+        return self._cached(sheet_name, ("partials", tuple(by), tuple(measures)), query)
+
+    def allocation_costs(self, key):
+        def query():
+            allocation, salary = self._source("Manpower_Allocation"), self._source("Salary_Growth")
+            if not (allocation and salary and can_derive(self.schema("Manpower_Allocation"), self.schema("Salary_Growth"))):
+                return None
+            where, params = self._where("Manpower_Allocation", key)
+            not_null = " AND ".join(f"{_quote(c)} IS NOT NULL" for c in COST_KEYS)
+            where = f"{where} AND {not_null}" if where else f" WHERE {not_null}"
+            keys = ", ".join(f"a.{_quote(c)}" for c in COST_KEYS)
+            # As pandas' merge_asof: the latest Growth Month not after the month, the later
+            # sheet row where an employee has two for the same month
+            return self._query(
+                f"""WITH a AS (
+                    SELECT {", ".join(map(_quote, COST_KEYS))}, "Employee Id", "Allocation per project"
+                    FROM read_parquet(?){where}
+                ), s AS (
+                    SELECT "Employee Id", "Growth Month", "Current Salary" FROM read_parquet(?, file_row_number = true)
+                    WHERE "Employee Id" IS NOT NULL AND "Growth Month" IS NOT NULL AND "Current Salary" IS NOT NULL
+                    QUALIFY row_number() OVER (PARTITION BY "Employee Id", "Growth Month" ORDER BY file_row_number DESC) = 1
+                )
+                SELECT {keys},
+                    COALESCE(SUM(a."Allocation per project" / 100 * s."Current Salary"), 0) AS "Derived Cost",
+                    CAST(COUNT(*) - COUNT(s."Current Salary") AS BIGINT) AS "Unpriced Rows"
+                FROM a ASOF LEFT JOIN s ON a."Employee Id" = s."Employee Id" AND a."Month_Key" >= s."Growth Month"
+                GROUP BY {keys} ORDER BY {keys}""",
+                [allocation] + params + [salary]
+            )
+        return self._cached("Manpower_Allocation", ("allocation_costs", key, self.version("Salary_Growth")), query)
+
+    def distinct(self, sheet_name, col):
+        def query():
+            path = self._source(sheet_name)
+            if path is None or col not in self.schema(sheet_name).columns:
+                return []
+            values = self._query(
+                f"SELECT DISTINCT {_quote(col)} AS v FROM read_parquet(?) WHERE {_quote(col)} IS NOT NULL ORDER BY v",
+                [path]
+            )
+            return values["v"].tolist()
+        return self._cached(sheet_name, ("distinct", col), query)
+
+    def bounds(self, sheet_name, col):
+        def query():
+            path = self._source(sheet_name)
+            if path is None:
+                return None, None
+            row = self._query(f"SELECT MIN({_quote(col)}) AS lo, MAX({_quote(col)}) AS hi FROM read_parquet(?)", [path])
+            return row["lo"].iloc[0], row["hi"].iloc[0]
+        return self._cached(sheet_name, ("bounds", col), query)
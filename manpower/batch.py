@@ -0,0 +1,189 @@
+"""Write the dashboard's reports for every project, team, category, status or month.
+
+    python -m manpower.batch --by project --start 2024-05 --end 2024-05 --out reports
+    python -m manpower.batch --by month team --workers 8 --source snapshots --format parquet
+
+One report (KPIs, time series, team cost, P&L summary, compensation) is
+written per value, in ``<out>/<dimension>/<value>/`` with one CSV, Parquet
+or XLSX file per table, plus an
+``index.csv`` per dimension with every value's directory and KPIs. Values
+that would share a directory name get a short hash of the value appended. Project_PnL has no
+Team column, so team reports filter the cost, allocation and salary
+tables while their P&L figures cover every team; they say so in a Note.
+Reports are spread over a process pool; each worker builds its
+:class:`ReportEngine` once and reuses it for all the reports it is given.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from manpower.engine import ReportEngine
+from manpower.export import FORMATS, write_frame
+from manpower.filters import filter_key
+from manpower.schema import column
+from manpower.sheets import SHEET_GIDS, SheetBundle, load_sheets
+from manpower.snapshots import SnapshotStore
+
+# Dimension name -> (filter_key argument, column, sheets its values are taken from)
+DIMENSIONS = {
+    "project": ("project", 'Project Name', ["Project_PnL"]),
+    # Project_PnL has no Team column; teams come from the cost, allocation and salary sheets
+    "team": ("team", 'Team', ["Manpower_Cost_Per_Project", "Manpower_Allocation", "Salary_Growth"]),
+    "category": ("category", 'Category', ["Project_PnL"]),
+    "status": ("status", 'Status', ["Project_PnL"]),
+    "month": (None, 'Month', ["Project_PnL"]),
+}
+
+_engine = None
+
+
+def read_snapshots(store=None, sheets=None):
+    """Load every sheet from its local snapshot only (no network)"""
+    store = store or SnapshotStore()
+    sheets = SHEET_GIDS if sheets is None else sheets
+    frames, errors = {}, {}
+    for name in sheets:
+        snapshot = store.read(name)
+        if snapshot is None:
+            errors[name] = "no snapshot"
+        else:
+            frames[name] = snapshot[0]
+    return SheetBundle(frames, errors)
+
+
+def slug(value):
+    """File-system safe directory name for a dimension value"""
+    return re.sub(r'[^\w.-]+', '_', str(value)).strip('_') or "_"
+
+
+def directory_names(labels):
+    """``{label: directory}`` of unique slugs; labels sharing a slug (ignoring case) get a hash of the label appended"""
+    slugs = {label: slug(label) for label in labels}
+    counts = pd.Series([name.casefold() for name in slugs.values()], dtype=object).value_counts()
+    return {
+        label: f"{name}_{hashlib.sha1(str(label).encode()).hexdigest()[:8]}" if counts[name.casefold()] > 1 else name
+        for label, name in slugs.items()
+    }
+
+
+def dimension_values(engine, dimension):
+    """Sorted distinct values of a dimension across the sheets it is taken from"""
+    _, col, sources = DIMENSIONS[dimension]
+    values = set()
+    for name in sources:
+        if name == "Project_PnL":
+            values.update(engine.cube.options(col))
+        elif column(engine.sheets.get(name), col):
+            values.update(engine.sheets.get(name)[col].dropna().unique())
+    return sorted(values)
+
+
+def pnl_note(sheets, dimension):
+    """Why a dimension's P&L figures cover every value, or None when Project_PnL is filtered by it"""
+    col = DIMENSIONS[dimension][1]
+    if column(sheets.get("Project_PnL"), col):
+        return None
+    return f"Project_PnL has no {col} column; P&L KPIs, time series and summary are not filtered by {dimension}"
+
+
+def report_jobs(engine, dimension, date_range=None):
+    """``(dimension, label, filter_key, directory)`` for every value of a dimension"""
+    argument, col, _ = DIMENSIONS[dimension]
+    if dimension == "month":
+        months = [m for m in engine.cube.months() if not date_range or date_range[0] <= m <= date_range[1]]
+        jobs = [(m.strftime("%Y-%m"), filter_key((m, m + pd.offsets.MonthEnd(0)))) for m in months]
+    else:
+        jobs = [(value, filter_key(date_range, **{argument: value})) for value in dimension_values(engine, dimension)]
+    directories = directory_names([label for label, _ in jobs])
+    for label, key in jobs:
+        yield dimension, label, key, directories[label]
+
+
+def write_report(report, directory, fmt="csv"):
+    """Write one report: ``kpis.json`` plus a file per table in one of ``FORMATS``"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "kpis.json"), "w") as f:
+        json.dump(report["kpis"], f, indent=2, default=lambda value: value.item())
+    for name, table in report.items():
+        if name != "kpis":
+            write_frame(table, os.path.join(directory, f"{name}.{fmt}"), fmt)
+
+
+def _init_worker(sheets):
+    global _engine
+    _engine = ReportEngine(sheets)
+
+
+def _run_job(job, out_dir, fmt="csv"):
+    dimension, label, key, directory = job
+    report = _engine.report(key)
+    note = pnl_note(_engine.sheets, dimension)
+    if note:
+        report["kpis"]["Note"] = note
+    write_report(report, os.path.join(out_dir, dimension, directory), fmt)
+    return dimension, label, directory, report["kpis"]
+
+
+def run_batch(sheets, dimensions, out_dir, date_range=None, workers=None, log=print, fmt="csv"):
+    """Write every report for ``dimensions``; returns the number of reports written"""
+    engine = ReportEngine(sheets)
+    jobs = [job for dimension in dimensions for job in report_jobs(engine, dimension, date_range)]
+
+    start = time.perf_counter()
+    index = {dimension: [] for dimension in dimensions}
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sheets,)) as pool:
+        for dimension, label, directory, figures in pool.map(_run_job, jobs, [out_dir] * len(jobs), [fmt] * len(jobs), chunksize=chunksize):
+            index[dimension].append({dimension: label, "Directory": directory, **figures})
+
+    for dimension, rows in index.items():
+        if rows:
+            pd.DataFrame(rows).to_csv(os.path.join(out_dir, dimension, "index.csv"), index=False)
+        else:
+            log(f"No {dimension} values in {', '.join(DIMENSIONS[dimension][2])}; skipped")
+        note = pnl_note(sheets, dimension)
+        if rows and note:
+            log(note)
+    log(f"Wrote {len(jobs)} reports to {out_dir} in {time.perf_counter() - start:.1f}s")
+    return len(jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--by", nargs="+", choices=list(DIMENSIONS), default=["project"])
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--start", help="first month included, e.g. 2024-01")
+    parser.add_argument("--end", help="last month included, e.g. 2024-12")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--source", choices=["fetch", "snapshots"], default="fetch",
+                        help="download the sheets, or read the local snapshots only")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv", help="file format of the report tables")
+    args = parser.parse_args(argv)
+
+    sheets = read_snapshots() if args.source == "snapshots" else load_sheets()
+    for name, error in sheets.errors.items():
+        print(f"Error loading {name}: {error}", file=sys.stderr)
+    if sheets.get("Project_PnL").empty:
+        print("Project_PnL is not available; nothing to report", file=sys.stderr)
+        return 1
+
+    date_range = None
+    if args.start or args.end:
+        months = sheets.get("Project_PnL")['Month']
+        start = pd.Timestamp(args.start) if args.start else months.min()
+        end = pd.Timestamp(args.end) + pd.offsets.MonthEnd(0) if args.end else months.max()
+        date_range = (start, end)
+
+    run_batch(sheets, args.by, args.out, date_range, args.workers, fmt=args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Process-wide LRU cache for derived objects, bounded by the memory they hold"""
+import functools
+import inspect
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+BUDGET_BYTES = int(float(os.environ.get("MANPOWER_CACHE_BUDGET_MB", "1024")) * 2**20)
+
+
+def estimate_bytes(obj, seen=None):
+    """Approximate memory held by ``obj``: frames, arrays and everything reachable from its attributes.
+
+    Frames are measured shallowly (object columns count their pointers
+    only), which is close for compacted sheets whose text is categorical.
+    Objects reachable twice are counted once.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=False))
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=False))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(estimate_bytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(estimate_bytes(value, seen) for value in obj)
+    if hasattr(obj, "__dict__"):
+        return estimate_bytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+class BudgetCache:
+    """Least-recently-used cache that evicts entries once their total size exceeds a budget.
+
+    Sizes are re-estimated whenever an entry is added, since cached
+    engines keep growing their own memos after they are created. The
+    newest entry is never evicted, even if it alone is over budget.
+    """
+
+    def __init__(self, budget_bytes=BUDGET_BYTES, sizer=estimate_bytes):
+        self.budget_bytes = budget_bytes
+        self.sizer = sizer
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """The cached value for ``key``, built with ``factory()`` on a miss.
+
+        Builds are single-flight: a caller missing on a key that another
+        caller is already building waits for that build instead of
+        starting its own, so concurrent sessions never hold two copies.
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                building = self._inflight.get(key)
+                if building is None:
+                    building = self._inflight[key] = threading.Event()
+                    break
+            # If that build fails (or its entry is already evicted), the loop builds it here
+            building.wait()
+
+        try:
+            value = factory()
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                for k, v in self._entries.items():
+                    self._sizes[k] = self.sizer(v)
+                total = sum(self._sizes.values())
+                while total > self.budget_bytes and len(self._entries) > 1:
+                    evicted, _ = self._entries.popitem(last=False)
+                    total -= self._sizes.pop(evicted)
+                    self.evictions += 1
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            building.set()
+        return value
+
+    def peek(self, key):
+        """The cached value for ``key``, or None; never builds, and does not count as a use"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def memoize(self, func):
+        """Decorator caching ``func`` by its arguments; like Streamlit, ``_``-prefixed arguments are not hashed.
+
+        ``func.peek(*args)`` returns the cached result for the hashed
+        arguments, or None, without calling ``func``.
+        """
+        signature = inspect.signature(func)
+        hashed = [name for name in signature.parameters if not name.startswith("_")]
+
+        def key(bound):
+            bound.apply_defaults()
+            return (func.__module__, func.__qualname__) + tuple(bound.arguments[name] for name in hashed)
+
+        @functools.wraps(func)
+        def cached(*args, **kwargs):
+            return self.get_or_create(key(signature.bind(*args, **kwargs)), lambda: func(*args, **kwargs))
+
+        cached.peek = lambda *args, **kwargs: self.peek(key(signature.bind_partial(*args, **kwargs)))
+        cached.clear = self.clear
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def stats(self):
+        """Entry count, bytes held (as last estimated), the budget and evictions so far"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(self._sizes.get(k, 0) for k in self._entries),
+                "budget_bytes": self.budget_bytes,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session in the process
+SHARED_CACHE = BudgetCache()
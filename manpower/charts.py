@@ -0,0 +1,242 @@
+"""Plotly figure builders for the dashboard tabs (no Streamlit calls)"""
+import json
+import math
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from manpower.budget import BudgetCache
+
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_ROW_HEIGHT = 30
+# Above this many points a trace is drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+# Payload caps: points per line after downsampling, bubbles in the profitability matrix
+MAX_LINE_POINTS = 2000
+MAX_BUBBLES = 5000
+FIGURE_BUDGET_BYTES = int(float(os.environ.get("MANPOWER_FIGURE_CACHE_MB", "256")) * 2**20)
+
+
+def timeline_rows(projects_df, name_col, start_col, end_col, group_col=None):
+    """Projects with both dates, ordered for the timeline (by group, then start)"""
+    cols = [name_col, start_col, end_col] + ([group_col] if group_col else [])
+    rows = projects_df[cols].dropna(subset=[name_col, start_col, end_col])
+    sort_cols = [group_col, start_col] if group_col else [start_col]
+    return rows.sort_values(sort_cols, kind='stable')
+
+
+def timeline_page_count(rows, page_size=TIMELINE_PAGE_SIZE):
+    return max(1, math.ceil(len(rows) / page_size))
+
+
+def timeline_figure(rows, name_col, start_col, end_col, group_col=None, page=1, page_size=TIMELINE_PAGE_SIZE):
+    """Gantt-style timeline for one page of projects.
+
+    Bars are drawn as a single horizontal go.Bar trace (one per group when
+    grouping by ``group_col``) with ``base`` = start and ``x`` = duration in
+    milliseconds, so the payload grows with the page size only.
+    """
+    window = rows.iloc[(page - 1) * page_size:page * page_size]
+    starts = window[start_col]
+    durations_ms = (window[end_col] - starts).dt.total_seconds().to_numpy() * 1000
+    colors = px.colors.qualitative.Set3
+
+    fig = go.Figure()
+    if group_col:
+        groups = window[group_col].astype(str).to_numpy()
+        for i, group in enumerate(dict.fromkeys(groups)):
+            mask = groups == group
+            fig.add_trace(go.Bar(
+                name=group,
+                x=durations_ms[mask],
+                y=window[name_col].to_numpy()[mask],
+                base=starts.to_numpy()[mask],
+                orientation='h',
+                marker=dict(color=colors[i % len(colors)]),
+            ))
+    else:
+        positions = np.arange((page - 1) * page_size, (page - 1) * page_size + len(window))
+        fig.add_trace(go.Bar(
+            x=durations_ms,
+            y=window[name_col].to_numpy(),
+            base=starts.to_numpy(),
+            orientation='h',
+            marker=dict(color=[colors[i % len(colors)] for i in positions]),
+            showlegend=False
+        ))
+
+    fig.update_layout(
+        height=max(400, len(window) * TIMELINE_ROW_HEIGHT),
+        margin=dict(l=0, r=0, t=10, b=0),
+        plot_bgcolor='white',
+        xaxis_title="Timeline",
+        barmode='overlay'
+    )
+    fig.update_xaxes(type='date')
+    return fig
+
+
+def lttb(x, y, n_out):
+    """Positions of ``n_out`` points that preserve the shape of the line (x, y).
+
+    Largest-Triangle-Three-Buckets: keep the first and last point and, from
+    each of ``n_out - 2`` equal buckets in between, the point forming the
+    largest triangle with the point kept before it and the mean of the
+    next bucket. ``x`` must be sorted; datetimes are compared as integers.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x).astype(np.int64 if np.asarray(x).dtype.kind == "M" else float).astype(float)
+    y = np.asarray(y, dtype=float)
+    edges = 1 + np.arange(n_out - 1) * (n - 2) // (n_out - 2)
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        mean_x, mean_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        areas = np.abs(
+            (x[previous] - mean_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (mean_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+def time_series_figure(time_series, month_col, revenue_col, cost_col, pnl_col, max_points=MAX_LINE_POINTS):
+    """Revenue, Man Power Cost and P&L lines over the months of ``time_series``.
+
+    Long series are drawn with WebGL and without markers, and each line is
+    downsampled with :func:`lttb` to at most ``max_points`` points.
+    """
+    fig_ts = go.Figure()
+    large = len(time_series) > WEBGL_THRESHOLD
+    trace = go.Scattergl if large else go.Scatter
+    series = [
+        # Revenue - solid green
+        (revenue_col, 'Revenue', dict(color='#10b981', width=3)),
+        # Cost - dashed orange
+        (cost_col, 'Man Power Cost', dict(color='#f59e0b', width=3, dash='dash')),
+        # P&L - solid blue
+        (pnl_col, 'Project P&L', dict(color='#3b82f6', width=3)),
+    ]
+    for col, name, line in series:
+        points = time_series[[month_col, col]].dropna()
+        if len(points) > max_points:
+            points = points.iloc[lttb(points[month_col].to_numpy(), points[col].to_numpy(), max_points)]
+        fig_ts.add_trace(trace(
+            x=points[month_col],
+            y=points[col],
+            name=name,
+            mode='lines' if large else 'lines+markers',
+            line=line
+        ))
+
+    fig_ts.update_layout(
+        height=500,
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=0, r=0, t=30, b=0),
+        plot_bgcolor='white'
+    )
+
+    fig_ts.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
+    fig_ts.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
+    return fig_ts
+
+
+def margin_figure(trends, month_col, margin_col, trailing_col):
+    """Monthly and trailing 12-month margin (%) lines from a trend table"""
+    fig = go.Figure()
+    for col, name, line in [
+        (margin_col, 'Margin', dict(color='#3b82f6', width=2)),
+        (trailing_col, 'Margin (12 months)', dict(color='#8b5cf6', width=3, dash='dash')),
+    ]:
+        points = trends[[month_col, col]].dropna()
+        fig.add_trace(go.Scatter(x=points[month_col], y=points[col], name=name, mode='lines+markers', line=line))
+
+    fig.update_layout(
+        height=500,
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=0, r=0, t=30, b=0),
+        plot_bgcolor='white',
+        yaxis_ticksuffix='%'
+    )
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
+    return fig
+
+
+def profitability_rows(bubble_df, cost_col, max_bubbles=MAX_BUBBLES):
+    """The rows the profitability matrix draws: all of them, or the ``max_bubbles`` largest by cost"""
+    if len(bubble_df) <= max_bubbles:
+        return bubble_df
+    return bubble_df.nlargest(max_bubbles, cost_col)
+
+
+def profitability_figure(bubble_df, name_col, pnl_col, revenue_col, cost_col, status_col):
+    """Bubble chart of P&L against revenue, sized by cost and coloured by status (WebGL when large)"""
+    fig_bubble = px.scatter(
+        bubble_df,
+        x=pnl_col, 
+        y=revenue_col,
+        size=cost_col,
+        color=status_col,
+        hover_name=name_col,
+        color_discrete_map={'Profitable': '#10b981', 'Loss': '#ef4444'},
+        size_max=60,
+        render_mode='webgl' if len(bubble_df) > WEBGL_THRESHOLD else 'svg'
+    )
+
+    fig_bubble.update_layout(
+        height=600,
+        margin=dict(l=0, r=0, t=30, b=0),
+        plot_bgcolor='white'
+    )
+
+    fig_bubble.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb', zeroline=True, zerolinecolor='#9ca3af')
+    fig_bubble.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
+    return fig_bubble
+
+
+def team_cost_figure(team_cost, team_col, cost_col):
+    """Donut chart of cost per team"""
+    fig_donut = go.Figure(data=[go.Pie(
+        labels=team_cost[team_col],
+        values=team_cost[cost_col],
+        hole=0.5,
+        marker=dict(colors=px.colors.qualitative.Set2),
+        textinfo='label+percent'
+    )])
+
+    fig_donut.update_layout(
+        height=500,
+        showlegend=True,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig_donut
+
+
+def figure_spec(fig):
+    """The figure's Plotly JSON spec, serialized once so it can be cached and sized exactly"""
+    return pio.to_json(fig, validate=False)
+
+
+def spec_figure(spec):
+    """A figure for ``st.plotly_chart`` from a :func:`figure_spec`.
+
+    The spec came from a validated figure, so it is not validated again;
+    that would cost more than building the chart did.
+    """
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+# Built charts shared by every session, as JSON specs bounded by their length
+FIGURE_CACHE = BudgetCache(FIGURE_BUDGET_BYTES, sizer=len)
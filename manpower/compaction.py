@@ -0,0 +1,80 @@
+"""Shrink parsed sheets in memory: categoricals for repeated text, smaller numeric dtypes"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from manpower.schema import SCHEMAS
+
+# Text columns with at most this many distinct values per row become categoricals
+CATEGORY_RATIO = 0.5
+# Store the remaining (high-cardinality) text as Arrow strings instead of Python objects
+ARROW_STRINGS = os.environ.get("MANPOWER_ARROW_STRINGS", "").lower() in ("1", "true", "yes")
+
+
+def _object_bytes(codes, uniques):
+    """Deep size of an object column from its factorization, without visiting every row"""
+    sizes = np.fromiter((sys.getsizeof(u) for u in uniques), dtype=np.int64, count=len(uniques))
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return int(len(codes) * 8 + counts @ sizes)
+
+
+def sorted_categorical(codes, uniques):
+    """Categorical from a factorization, with the categories sorted (as text)"""
+    order = np.argsort(uniques.astype(str), kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    codes = np.where(codes >= 0, rank[np.maximum(codes, 0)], -1)
+    return pd.Categorical.from_codes(codes, pd.Index(uniques[order], dtype=object))
+
+
+def _downcast(values):
+    """Smallest integer dtype, or float32 when that loses nothing; None to keep the column"""
+    if values.dtype.kind in "iu":
+        smaller = pd.to_numeric(values, downcast="integer")
+        return smaller if smaller.dtype.itemsize < values.dtype.itemsize else None
+    if values.dtype == np.float64:
+        narrow = values.to_numpy().astype(np.float32)
+        wide = values.to_numpy()
+        if np.array_equal(narrow.astype(np.float64), wide, equal_nan=True):
+            return pd.Series(narrow, index=values.index, name=values.name)
+    return None
+
+
+def compact_frame(df, sheet_name=None, category_ratio=CATEGORY_RATIO, arrow_strings=ARROW_STRINGS):
+    """Return a smaller version of a parsed sheet plus ``{"before": bytes, "after": bytes}``.
+
+    Repeated text (names, roles, teams, statuses) becomes categorical;
+    integers are downcast and float64 columns become float32 only when
+    every value survives the round trip. Currency columns keep int64 so
+    element-wise arithmetic on Rupiah amounts cannot overflow. Values are
+    unchanged; only their storage is. Columns that are kept are shared
+    with ``df``, not copied.
+    """
+    schema = SCHEMAS.get(sheet_name, {})
+    columns = {}
+    before = after = int(df.index.memory_usage())
+    for name in df.columns:
+        values = df[name]
+        if values.dtype == object:
+            codes, uniques = pd.factorize(values)
+            size = _object_bytes(codes, uniques)
+            before += size
+            if len(values) and len(uniques) <= category_ratio * len(values):
+                values = pd.Series(sorted_categorical(codes, uniques), index=df.index, name=name)
+            elif arrow_strings and pd.api.types.infer_dtype(uniques, skipna=True) == "string":
+                values = values.astype("string[pyarrow]")
+            else:
+                after += size
+                columns[name] = values
+                continue
+        else:
+            before += int(values.memory_usage(index=False, deep=True))
+            column_schema = schema.get(name)
+            if not (column_schema and column_schema.kind == "currency"):
+                values = _downcast(values) if values.dtype.kind in "iuf" else None
+                values = df[name] if values is None else values
+        after += int(values.memory_usage(index=False, deep=True))
+        columns[name] = values
+    return pd.DataFrame(columns, index=df.index, copy=False), {"before": before, "after": after}
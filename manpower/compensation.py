@@ -0,0 +1,110 @@
+"""Per-employee compensation roll-up that answers date ranges from monthly partials"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MEMO_SIZE = 16
+
+
+class CompensationRollup:
+    """Per-employee max of each numeric column (and first of ``first_cols``) over a month range.
+
+    Rows are pre-reduced once to one partial per (employee, month). A date
+    range is answered by slicing those partials with a binary search and
+    reducing them per employee. When a range widens a range already
+    answered, only the newly covered months are reduced and merged into
+    the cached result.
+    """
+
+    def __init__(self, df, month_col, numeric_cols, first_cols=(), key_col='Employee Name', memo_size=MEMO_SIZE):
+        self.key_col = key_col
+        self.numeric_cols = list(numeric_cols)
+        self.first_cols = [c for c in first_cols if c in df.columns]
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+        agg = {col: 'max' for col in self.numeric_cols}
+        agg.update({col: 'first' for col in self.first_cols})
+        self._agg = agg
+
+        if month_col in df.columns and pd.api.types.is_datetime64_any_dtype(df[month_col]):
+            months = df[month_col]
+        else:
+            months = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        keyed = df[[key_col] + list(agg)].assign(_month=months)
+        partials = keyed.groupby([key_col, '_month'], dropna=False, observed=True, sort=False).agg(agg).reset_index()
+        partials = partials[partials[key_col].notna()]
+        partials = partials.sort_values('_month', kind='stable', na_position='last').reset_index(drop=True)
+
+        self.partials = partials
+        self.months = partials['_month'].to_numpy()
+        self.n_dated = int(len(self.months) - np.isnat(self.months).sum())
+        self._dtypes = {col: partials[col].dtype for col in self.numeric_cols}
+
+    def _slice(self, start, end):
+        dated = self.months[:self.n_dated]
+        lo = int(np.searchsorted(dated, np.datetime64(start), side='left'))
+        hi = int(np.searchsorted(dated, np.datetime64(end), side='right'))
+        return lo, max(lo, hi)
+
+    def _reduce(self, lo, hi):
+        return self.partials.iloc[lo:hi].groupby(self.key_col, observed=True).agg(self._agg)
+
+    def _merge(self, earlier, later):
+        """Combine two per-employee results; ``earlier`` covers the earlier months"""
+        index = earlier.index.union(later.index)
+        earlier, later = earlier.reindex(index), later.reindex(index)
+        merged = pd.DataFrame(index=index)
+        for col in self.numeric_cols:
+            merged[col] = np.fmax(earlier[col].to_numpy(dtype=float), later[col].to_numpy(dtype=float))
+        for col in self.first_cols:
+            merged[col] = earlier[col].combine_first(later[col])
+        return merged
+
+    def _restore_dtypes(self, result):
+        for col, dtype in self._dtypes.items():
+            if dtype.kind in 'iu' and result[col].dtype != dtype and not result[col].isna().any():
+                result[col] = result[col].astype(dtype)
+        return result
+
+    def _per_employee(self, date_range):
+        if date_range is None:
+            return self._reduce(0, len(self.partials))
+
+        lo, hi = self._slice(*date_range)
+        with self._lock:
+            cached = [(key, value) for key, value in self._memo.items() if key is not None]
+        for (start, end), (_, _, cached_lo, cached_hi, per_employee) in cached:
+            if lo <= cached_lo and cached_hi <= hi:
+                if lo < cached_lo:
+                    per_employee = self._merge(self._reduce(lo, cached_lo), per_employee)
+                if cached_hi < hi:
+                    per_employee = self._merge(per_employee, self._reduce(cached_hi, hi))
+                return self._restore_dtypes(per_employee)
+        return self._reduce(lo, hi)
+
+    def query(self, date_range=None):
+        """Return ``(employee_max, totals)`` for a ``(start, end)`` range or None for all months.
+
+        ``employee_max`` has one row per employee; ``totals`` maps each
+        numeric column to its sum over employees.
+        """
+        with self._lock:
+            if date_range in self._memo:
+                self._memo.move_to_end(date_range)
+                employee_max, totals = self._memo[date_range][:2]
+                return employee_max, totals
+
+        per_employee = self._per_employee(date_range)
+        employee_max = per_employee.reset_index()
+        totals = {col: employee_max[col].sum() for col in self.numeric_cols}
+        lo, hi = self._slice(*date_range) if date_range is not None else (0, len(self.partials))
+
+        with self._lock:
+            self._memo[date_range] = (employee_max, totals, lo, hi, per_employee)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return employee_max, totals
@@ -0,0 +1,63 @@
+"""Pre-aggregated Project_PnL cube for KPIs, the time series and filter options"""
+import pandas as pd
+
+from manpower.filters import FILTER_COLUMNS, FilterEngine
+
+MEASURES = ['Revenue', 'Man Power Cost', 'PnL']
+
+
+def with_margin(totals):
+    """Add Margin (PnL as a percentage of Revenue) to summed measures"""
+    revenue = totals.get('Revenue', 0)
+    totals['Margin'] = (totals.get('PnL', 0) / revenue * 100) if revenue > 0 else 0
+    return totals
+
+
+class PnLCube:
+    """Revenue, Man Power Cost and PnL summed per (month, project, team, category, status).
+
+    Built once per data version; every query filters the cube through the
+    same :class:`FilterEngine` rules as the raw rows and rolls it up, so
+    the answers match the row-level sums without touching the rows.
+    """
+
+    def __init__(self, df, month_col='Month'):
+        if month_col not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[month_col]):
+            month_col = None
+        self.month_col = month_col
+        self.dims = [c for c in [month_col] + FILTER_COLUMNS if c and c in df.columns]
+        self.measures = [c for c in MEASURES if c in df.columns]
+
+        if self.dims:
+            cube = df.groupby(self.dims, dropna=False, observed=True, sort=False)[self.measures].sum().reset_index()
+        else:
+            cube = df[self.measures].sum().to_frame().T
+        self.cube = cube
+        self.engine = FilterEngine(cube, month_col)
+        self._options = {col: sorted(df[col].dropna().unique().tolist()) for col in self.dims if col != month_col}
+
+    def options(self, col):
+        """Sorted distinct values of a dimension, for the sidebar selectboxes"""
+        return self._options.get(col, [])
+
+    def month_bounds(self):
+        """First and last month in the data, for the date range picker"""
+        months = self.cube[self.month_col]
+        return months.min(), months.max()
+
+    def months(self):
+        """Distinct months in the data, ascending"""
+        if not self.month_col:
+            return []
+        return [pd.Timestamp(m) for m in sorted(self.cube[self.month_col].dropna().unique())]
+
+    def totals(self, key):
+        """Sum of each measure for a filter tuple, plus Margin from the summed PnL and Revenue"""
+        sums = self.engine.apply(key)[self.measures].sum()
+        return with_margin({col: sums[col] for col in self.measures})
+
+    def time_series(self, key):
+        """Measures summed per month for a filter tuple"""
+        if not self.month_col:
+            return pd.DataFrame(columns=self.measures)
+        return self.engine.apply(key).groupby(self.month_col)[self.measures].sum().reset_index()
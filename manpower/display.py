@@ -0,0 +1,31 @@
+"""Table helpers that keep values numeric until the browser formats them"""
+import numpy as np
+import pandas as pd
+
+
+def is_percent_column(col):
+    """Growth and % columns are shown as percentages, other numbers as Rupiah"""
+    return 'Growth' in col or '%' in col or 'growth' in col.lower()
+
+
+def with_total_row(df, totals):
+    """Return ``df`` plus one grand-total row, without changing column dtypes.
+
+    Each column is extended with a single array append: numeric columns get
+    their (numeric) total or NaN, text columns get their label or None. This
+    avoids a ``pd.concat`` of a numeric frame with a one-row object frame,
+    which would turn every column into object dtype.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        total = totals.get(col)
+        if values.dtype.kind in 'iufb':
+            tail = np.array([np.nan if total is None else total], dtype=float)
+            columns[col] = np.concatenate([values.astype(float, copy=False), tail])
+        elif values.dtype.kind == 'M':
+            tail = np.array([np.datetime64('NaT') if total is None else total], dtype=values.dtype)
+            columns[col] = np.concatenate([values, tail])
+        else:
+            columns[col] = np.concatenate([values.astype(object, copy=False), np.array([total], dtype=object)])
+    return pd.DataFrame(columns)
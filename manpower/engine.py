@@ -0,0 +1,170 @@
+"""Report computations behind every dashboard tab, usable without Streamlit"""
+import pandas as pd
+
+from manpower.compensation import CompensationRollup
+from manpower.cube import PnLCube
+from manpower.display import is_percent_column, with_total_row
+from manpower.filters import FilterEngine
+from manpower.schema import column
+
+# Column the date range filter applies to, per sheet
+DATE_COLUMNS = {
+    "Project_PnL": 'Month',
+    "Manpower_Cost_Per_Project": 'Month_Key',
+    "Manpower_Allocation": 'Month_Key',
+    "Salary_Growth": 'Growth Month'
+}
+
+PNL_SUMMARY_COLUMNS = ['Project Name', 'Category', 'Status', 'PnL', 'Man Power Cost', 'Revenue', 'Margin']
+COMPENSATION_KEYS = ['Employee Name', 'Employee_id', 'Employee Id', 'Role', 'Team']
+COMPENSATION_EXCLUDE = COMPENSATION_KEYS + ['Growth Month', 'Month', 'Date', 'month', 'Join Date']
+
+
+def kpis(pnl_totals, employees_df):
+    """Headline figures: revenue, man power cost and P&L for the filters, plus headcount"""
+    return {
+        "Total Revenue": pnl_totals.get('Revenue', 0),
+        "Total Man Power Cost": pnl_totals.get('Man Power Cost', 0),
+        "Total P&L": pnl_totals.get('PnL', 0),
+        "Margin": pnl_totals.get('Margin', 0),
+        "Active Employees": len(employees_df) if not employees_df.empty else 0,
+    }
+
+
+def team_cost_breakdown(cost_df, team_col, cost_col):
+    """Cost summed per team, largest first"""
+    team_cost = cost_df.groupby(team_col, observed=True)[cost_col].sum().reset_index().dropna()
+    team_cost = team_cost.sort_values(cost_col, ascending=False)
+    return team_cost
+
+
+def pnl_summary(filtered_pnl_df, pnl_totals):
+    """Project_PnL rows for the summary table plus a GRAND TOTAL row from the cube totals.
+
+    Returns ``(table, currency_cols, percent_cols)``, or None when a
+    required column is missing. Values stay numeric.
+    """
+    proj_name_col, category_col, status_col, pnl_col, cost_col, revenue_col, margin_col = (
+        column(filtered_pnl_df, name) for name in PNL_SUMMARY_COLUMNS
+    )
+    if not all([proj_name_col, pnl_col, cost_col, revenue_col]):
+        return None
+
+    summary_df = filtered_pnl_df[[c for c in PNL_SUMMARY_COLUMNS if c in filtered_pnl_df.columns]]
+    grand_total = {
+        proj_name_col: "GRAND TOTAL",
+        pnl_col: pnl_totals[pnl_col],
+        cost_col: pnl_totals[cost_col],
+        revenue_col: pnl_totals[revenue_col],
+    }
+    if category_col:
+        grand_total[category_col] = f"{summary_df[category_col].nunique()} Categories"
+    if status_col:
+        grand_total[status_col] = f"{summary_df[status_col].nunique()} Status"
+    if margin_col:
+        grand_total[margin_col] = pnl_totals['Margin']
+
+    return with_total_row(summary_df, grand_total), [pnl_col, cost_col, revenue_col], [margin_col] if margin_col else []
+
+
+def compensation_columns(salary_df):
+    """``(key_cols, numeric_cols, first_cols)`` of Salary_Growth for the compensation roll-up"""
+    key_cols = [c for c in COMPENSATION_KEYS if c in salary_df.columns]
+    numeric_cols = [
+        c for c in salary_df.columns
+        if c not in COMPENSATION_EXCLUDE and pd.api.types.is_numeric_dtype(salary_df[c])
+    ]
+    first_cols = [c for c in ['Role', 'Team'] if c in salary_df.columns and c not in key_cols]
+    return key_cols, numeric_cols, first_cols
+
+
+def compensation_summary(employee_max, numeric_totals, numeric_cols):
+    """Per-employee maxima with a grand total row (sums; averages for percentages).
+
+    Returns ``(table, figures, currency_cols, percent_cols)`` where
+    ``figures`` holds the headline numbers shown under the table.
+    """
+    grand_total = {'Employee Name': 'GRAND TOTAL'}
+    if 'Employee Id' in employee_max.columns:
+        grand_total['Employee Id'] = None
+    if 'Role' in employee_max.columns:
+        grand_total['Role'] = f"{employee_max['Role'].nunique()} Roles"
+    if 'Team' in employee_max.columns:
+        grand_total['Team'] = f"{employee_max['Team'].nunique()} Teams"
+    grand_total.update(numeric_totals)
+
+    n_employees = len(employee_max)
+    percent_cols = [col for col in numeric_cols if is_percent_column(col)]
+    currency_cols = [col for col in numeric_cols if col not in percent_cols]
+    for col in percent_cols:
+        grand_total[col] = numeric_totals[col] / n_employees if n_employees > 0 else 0
+
+    figures = {"Unique Employees": n_employees}
+    total_cost_col = column(employee_max, 'Total Cost')
+    if total_cost_col:
+        figures["Total Compensation Cost"] = numeric_totals.get(total_cost_col, 0)
+    current_sal_col = column(employee_max, 'Current Salary')
+    if current_sal_col:
+        figures["Average Salary"] = numeric_totals.get(current_sal_col, 0) / n_employees if n_employees > 0 else 0
+    return with_total_row(employee_max, grand_total), figures, currency_cols, percent_cols
+
+
+class ReportEngine:
+    """Every tab's numbers for any filter tuple, computed from one loaded :class:`SheetBundle`.
+
+    Filter engines, the P&L cube and the compensation roll-ups are built
+    on first use and reused for every later report, so producing reports
+    for many filter tuples costs one build plus cheap queries.
+    """
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+        pnl_df = sheets.get("Project_PnL")
+        self.cube = PnLCube(pnl_df, column(pnl_df, 'Month'))
+        self._engines = {}
+        self._rollups = {}
+
+    def filtered(self, sheet_name, key):
+        """The sheet with a filter tuple applied (shared; do not modify)"""
+        df = self.sheets.get(sheet_name)
+        if df.empty:
+            return df
+        if sheet_name not in self._engines:
+            self._engines[sheet_name] = FilterEngine(df, column(df, DATE_COLUMNS.get(sheet_name, '')))
+        return self._engines[sheet_name].apply(key)
+
+    def compensation(self, key):
+        """``(table, figures, currency_cols, percent_cols)`` for the Compensation tab, or None"""
+        salary_df = self.filtered("Salary_Growth", (None,) + key[1:])
+        if salary_df.empty:
+            return None
+        key_cols, numeric_cols, first_cols = compensation_columns(salary_df)
+        if not key_cols or not numeric_cols:
+            return None
+        if key[1:] not in self._rollups:
+            self._rollups[key[1:]] = CompensationRollup(salary_df, DATE_COLUMNS["Salary_Growth"], numeric_cols, first_cols)
+        employee_max, numeric_totals = self._rollups[key[1:]].query(key[0])
+        return compensation_summary(employee_max, numeric_totals, numeric_cols)
+
+    def report(self, key):
+        """All report tables for a filter tuple from :func:`filter_key`, keyed by name"""
+        totals = self.cube.totals(key)
+        report = {
+            "kpis": kpis(totals, self.sheets.get("Employees")),
+            "time_series": self.cube.time_series(key),
+        }
+
+        cost_df = self.filtered("Manpower_Cost_Per_Project", key)
+        team_col, cost_col = column(cost_df, 'Team'), column(cost_df, 'Cost')
+        if team_col and cost_col and not cost_df.empty:
+            report["team_cost"] = team_cost_breakdown(cost_df, team_col, cost_col)
+
+        summary = pnl_summary(self.filtered("Project_PnL", key), totals)
+        if summary is not None:
+            report["pnl_summary"] = summary[0]
+
+        compensation = self.compensation(key)
+        if compensation is not None:
+            report["compensation"] = compensation[0]
+            report["kpis"].update(compensation[1])
+        return report
@@ -0,0 +1,94 @@
+"""Indexed filtering over one loaded sheet, built once per data version"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Equality filters in the order they appear in the filter tuple
+FILTER_COLUMNS = ['Project Name', 'Team', 'Category', 'Status']
+MEMO_SIZE = 64
+
+
+def filter_key(date_range=None, project=None, team=None, category=None, status=None):
+    """Build the hashable filter tuple used as the memo key"""
+    date_range = (pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])) if date_range else None
+    return (date_range, project, team, category, status)
+
+
+class FilterEngine:
+    """Answer sidebar filter queries on a frame without scanning it.
+
+    The frame is stored sorted by ``date_col`` so a date range is a
+    contiguous slice found by binary search. Equality filters use per-value
+    arrays of row positions (built lazily from categorical codes), which are
+    clipped to the date slice and intersected. Results are memoized per
+    filter tuple; they are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, df, date_col=None, memo_size=MEMO_SIZE):
+        if date_col and date_col in df.columns and pd.api.types.is_datetime64_any_dtype(df[date_col]):
+            order = np.argsort(df[date_col].to_numpy(), kind='stable')
+            if not (order[1:] > order[:-1]).all():
+                df = df.take(order)
+            self.dates = df[date_col].to_numpy()
+            self.n_dated = int(len(self.dates) - np.isnat(self.dates).sum())
+        else:
+            self.dates = None
+            self.n_dated = 0
+        self.df = df
+        self.memo_size = memo_size
+        self._indexes = {}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index(self, col):
+        """Map each value of ``col`` to the sorted row positions holding it"""
+        index = self._indexes.get(col)
+        if index is None:
+            codes, uniques = pd.factorize(self.df[col])
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            starts = np.searchsorted(codes[order], 0)
+            bounds = starts + np.concatenate([[0], np.cumsum(counts)])
+            index = {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+            self._indexes[col] = index
+        return index
+
+    def _date_slice(self, date_range):
+        if date_range is None or self.dates is None:
+            return 0, len(self.df)
+        start, end = date_range
+        dated = self.dates[:self.n_dated]
+        lo = int(np.searchsorted(dated, np.datetime64(start), side='left'))
+        hi = int(np.searchsorted(dated, np.datetime64(end), side='right'))
+        return lo, max(lo, hi)
+
+    def positions(self, key):
+        """Row positions matching ``key``, or a ``(lo, hi)`` slice if only dates apply"""
+        date_range, *values = key
+        lo, hi = self._date_slice(date_range)
+        selected = None
+        for col, value in zip(FILTER_COLUMNS, values):
+            if not value or col not in self.df.columns:
+                continue
+            rows = self._index(col).get(value, np.empty(0, dtype=np.intp))
+            rows = rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return (lo, hi) if selected is None else selected
+
+    def apply(self, key):
+        """Return the filtered frame for a filter tuple from :func:`filter_key`"""
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        rows = self.positions(key)
+        result = self.df.iloc[rows[0]:rows[1]] if isinstance(rows, tuple) else self.df.take(rows)
+
+        with self._lock:
+            self._memo[key] = result
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
@@ -0,0 +1,245 @@
+"""Streaming ingest: parse a sheet export chunk by chunk into preallocated columns"""
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from manpower.compaction import CATEGORY_RATIO, compact_frame, sorted_categorical
+from manpower.schema import MAX_ERROR_EXAMPLES, SCHEMAS, column_kind, parse_frame, parse_into
+from manpower.sheets import FETCH_TIMEOUT, export_url, http_session
+
+CHUNK_ROWS = int(os.environ.get("MANPOWER_CHUNK_ROWS", "50000"))
+# Stream sheets that have no snapshot yet instead of downloading them whole
+STREAM_INGEST = os.environ.get("MANPOWER_STREAM_INGEST", "").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+
+class HashingReader:
+    """File wrapper that hashes and counts the bytes read through it"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+        self._sha = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        self._sha.update(data)
+        return data
+
+    def hexdigest(self):
+        return self._sha.hexdigest()
+
+
+class ColumnStore:
+    """Growable column arrays that parsed chunks are appended to.
+
+    Numbers and dates go into preallocated NumPy arrays (grown by half
+    when full). Text is stored as int32 codes into a per-column
+    vocabulary, so repeated names cost four bytes per row while loading.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.rows = 0
+        self.arrays = {}
+        self.vocab = {}
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity = int(capacity * 1.5) + 1
+        for name, array in self.arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.rows] = array[:self.rows]
+            self.arrays[name] = grown
+        self.capacity = capacity
+
+    def _new_column(self, name, values):
+        if values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+            self.vocab[name] = {}
+            dtype = np.int32
+        else:
+            dtype = values.dtype
+        array = np.empty(self.capacity, dtype=dtype)
+        if dtype == np.int32 and name in self.vocab:
+            array[:self.rows] = -1
+        elif dtype.kind == "M":
+            array[:self.rows] = np.datetime64("NaT")
+        elif dtype.kind == "f":
+            array[:self.rows] = np.nan
+        self.arrays[name] = array
+
+    def _encode(self, name, values):
+        codes, uniques = pd.factorize(values.astype(object))
+        vocab = self.vocab[name]
+        mapping = np.fromiter((vocab.setdefault(u, len(vocab)) for u in uniques), dtype=np.int32, count=len(uniques))
+        return np.where(codes >= 0, mapping[np.maximum(codes, 0)], -1).astype(np.int32)
+
+    def append(self, chunk):
+        """Append a parsed chunk; its columns are coerced to the types seen first"""
+        n = len(chunk)
+        if self.rows + n > self.capacity:
+            self._grow(self.rows + n)
+        for name in chunk.columns:
+            values = chunk[name]
+            if name not in self.arrays:
+                self._new_column(name, values)
+            array = self.arrays[name]
+            if name in self.vocab:
+                data = self._encode(name, values)
+            elif array.dtype.kind == "M":
+                data = pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[ns]")
+            else:
+                data = pd.to_numeric(values, errors="coerce").to_numpy()
+                if data.dtype != array.dtype and not np.can_cast(data.dtype, array.dtype, casting="safe"):
+                    # e.g. integers so far, then a chunk with blanks: switch the column to float
+                    array = self.arrays[name] = array.astype(np.result_type(array.dtype, data.dtype, np.float64))
+            array[self.rows:self.rows + n] = data
+        self.rows += n
+
+    def to_frame(self):
+        """The rows appended, handing the arrays over; text becomes sorted categoricals when repetitive, else objects.
+
+        Numeric arrays are trimmed to the row count in place and become the
+        frame's columns without a copy, so the store is empty afterwards.
+        """
+        columns = {}
+        for name, array in self.arrays.items():
+            if name not in self.vocab:
+                array.resize(self.rows, refcheck=False)
+                columns[name] = array
+                continue
+            data = array[:self.rows]
+            if name in self.vocab:
+                uniques = np.array(list(self.vocab[name]), dtype=object)
+                if self.rows and len(uniques) <= CATEGORY_RATIO * self.rows:
+                    columns[name] = sorted_categorical(data, uniques)
+                else:
+                    values = uniques.take(np.maximum(data, 0)) if len(uniques) else np.full(self.rows, None, dtype=object)
+                    values[data < 0] = np.nan
+                    columns[name] = values
+        self.arrays, self.vocab, self.rows = {}, {}, 0
+        return pd.DataFrame(columns, copy=False)
+
+
+def _merge_reports(total, report):
+    if total is None:
+        return report
+    for name, error in report["errors"].items():
+        merged = total["errors"].setdefault(name, {"kind": error["kind"], "count": 0, "examples": []})
+        merged["count"] += error["count"]
+        for example in error["examples"]:
+            if example not in merged["examples"] and len(merged["examples"]) < MAX_ERROR_EXAMPLES:
+                merged["examples"].append(example)
+    return total
+
+
+def ingest_stream(stream, sheet_name=None, total_bytes=None, chunk_rows=CHUNK_ROWS, on_chunk=None):
+    """Parse a CSV export from a binary stream in chunks; returns ``(df, report, content_hash)``.
+
+    Each chunk is type-converted against the sheet's schema and appended
+    to a :class:`ColumnStore` sized from the first chunk and
+    ``total_bytes``, so only one raw chunk is held at a time.
+    Undeclared columns that are text in the first chunk stay text in every
+    chunk and are inferred once over the whole column at the end, as a
+    whole-file parse would. ``on_chunk(chunk, rows, bytes_read)`` is called
+    after every chunk.
+    """
+    reader = HashingReader(stream)
+    store, report, text_columns = None, None, []
+    for raw_chunk in pd.read_csv(reader, chunksize=chunk_rows):
+        chunk, chunk_report = parse_frame(raw_chunk, sheet_name, text_columns)
+        report = _merge_reports(report, chunk_report)
+        if store is None:
+            schema = SCHEMAS.get(sheet_name, {})
+            text_columns = [name for name in chunk.columns
+                            if column_kind(name, schema) == "infer" and chunk[name].dtype == object]
+            rows_per_byte = len(chunk) / max(reader.bytes_read, 1)
+            estimate = total_bytes * rows_per_byte * 1.1 if total_bytes else chunk_rows * 4
+            store = ColumnStore(max(estimate, len(chunk)))
+        store.append(chunk)
+        if on_chunk:
+            on_chunk(chunk, store.rows, reader.bytes_read)
+
+    if store is None:
+        df, report = parse_frame(pd.DataFrame(), sheet_name)
+    else:
+        df = store.to_frame()
+        for name in text_columns:
+            parse_into(df, name, "infer", report)
+    df, report["memory"] = compact_frame(df, sheet_name)
+    return df, report, reader.hexdigest()
+
+
+class StreamingIngest:
+    """Stream one sheet export on a background thread and snapshot the result.
+
+    While it runs, ``rows``, ``bytes_read``/``total_bytes`` and ``sums``
+    (running totals of every numeric column) describe the data parsed so
+    far, e.g. for a progress bar and provisional KPIs.
+    """
+
+    def __init__(self, store, sheet_name, gid):
+        self.store = store
+        self.sheet_name = sheet_name
+        self.gid = gid
+        self.rows = 0
+        self.bytes_read = 0
+        self.total_bytes = None
+        self.sums = {}
+        self.error = None
+        self.done = threading.Event()
+
+    def progress(self):
+        """Fraction of the export read so far, or None if its size is unknown"""
+        if not self.total_bytes:
+            return None
+        return min(1.0, self.bytes_read / self.total_bytes)
+
+    def _on_chunk(self, chunk, rows, bytes_read):
+        sums = dict(self.sums)
+        for name in chunk.select_dtypes("number").columns:
+            sums[name] = sums.get(name, 0) + chunk[name].sum()
+        self.sums = sums
+        self.rows, self.bytes_read = rows, bytes_read
+
+    def run(self):
+        try:
+            with http_session().get(export_url(self.gid), stream=True, timeout=FETCH_TIMEOUT) as response:
+                response.raise_for_status()
+                length = response.headers.get("Content-Length")
+                self.total_bytes = int(length) if length else None
+                # Content-Length and tell() count bytes on the wire, which may be gzipped
+                body_bytes = None if response.headers.get("Content-Encoding") else self.total_bytes
+                response.raw.decode_content = True
+                df, report, digest = ingest_stream(
+                    response.raw, self.sheet_name, body_bytes,
+                    on_chunk=lambda chunk, rows, _: self._on_chunk(chunk, rows, response.raw.tell())
+                )
+            self.store.write(self.sheet_name, df, digest, datetime.now(), report)
+        except Exception as e:
+            logger.warning("Streaming ingest of %s failed: %s", self.sheet_name, e)
+            self.error = str(e)
+        finally:
+            self.done.set()
+
+
+_jobs_lock = threading.Lock()
+_jobs = {}
+
+
+def start_ingest(store, sheet_name, gid):
+    """Start streaming a sheet, or return the job already streaming it"""
+    with _jobs_lock:
+        job = _jobs.get((store.directory, sheet_name))
+        if job is None or job.done.is_set():
+            job = _jobs[store.directory, sheet_name] = StreamingIngest(store, sheet_name, gid)
+            threading.Thread(target=job.run, name=f"ingest-{sheet_name}", daemon=True).start()
+    return job
@@ -0,0 +1,210 @@
+"""Opt-in timing, memory and cache instrumentation for dashboard reruns.
+
+Code marks hot paths with :func:`span` and cached loaders with
+:func:`track_cache`. Both do nothing unless a :func:`run` is active in the
+current context, so the cost when instrumentation is off is one context
+variable lookup per call. A finished run is appended to a JSON lines file
+(``MANPOWER_METRICS_JSONL``) and folded into a Prometheus text file
+(``MANPOWER_METRICS_PROM``) when those are configured.
+"""
+import contextvars
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Record every rerun, not only those with the sidebar panel switched on
+ENABLED = os.environ.get("MANPOWER_METRICS", "").lower() in ("1", "true", "yes")
+JSONL_PATH = os.environ.get("MANPOWER_METRICS_JSONL")
+PROM_PATH = os.environ.get("MANPOWER_METRICS_PROM")
+
+_current = contextvars.ContextVar("manpower_metrics_run", default=None)
+_cache_missed = contextvars.ContextVar("manpower_metrics_cache_missed", default=None)
+
+
+def rss_bytes():
+    """Current resident set size of the process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Run:
+    """Spans and cache lookups recorded during one rerun (or one fragment rerun)"""
+
+    def __init__(self, label, session=None):
+        self.label = label
+        self.session = session
+        self.started = datetime.now()
+        self.seconds = None
+        self.rss = None
+        self.spans = []
+        self.cache = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, seconds, rss_delta):
+        with self._lock:
+            self.spans.append({"name": name, "seconds": seconds, "rss_delta": rss_delta})
+
+    def add_cache(self, name, hit):
+        with self._lock:
+            counts = self.cache.setdefault(name, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def to_record(self):
+        return {
+            "ts": self.started.isoformat(timespec="milliseconds"),
+            "session": self.session,
+            "label": self.label,
+            "seconds": self.seconds,
+            "rss_bytes": self.rss,
+            "spans": self.spans,
+            "cache": self.cache,
+        }
+
+
+@contextmanager
+def span(name):
+    """Time the block (and its RSS change) as ``name`` in the active run, if any"""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    rss = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add_span(name, time.perf_counter() - start, rss_bytes() - rss)
+
+
+@contextmanager
+def run(label, enabled=True, session=None):
+    """Record everything measured inside the block as one run.
+
+    Yields the :class:`Run`, or None when disabled. Inside an already
+    active run this is just a :func:`span`, so a fragment measures itself
+    whether it runs as part of a full rerun or on its own.
+    """
+    if _current.get() is not None:
+        with span(label):
+            yield _current.get()
+        return
+    if not enabled:
+        yield None
+        return
+
+    current = Run(label, session)
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+        current.seconds = time.perf_counter() - start
+        current.rss = rss_bytes()
+        publish(current)
+
+
+def track_cache(name, cache):
+    """Wrap ``func`` in the Streamlit ``cache`` decorator, counting hits and misses as ``name``"""
+    def decorate(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            missed = _cache_missed.get()
+            if missed is not None:
+                missed.append(True)
+            return func(*args, **kwargs)
+
+        cached = cache(compute)
+
+        @functools.wraps(func)
+        def lookup(*args, **kwargs):
+            current = _current.get()
+            if current is None:
+                return cached(*args, **kwargs)
+            token = _cache_missed.set([])
+            try:
+                result = cached(*args, **kwargs)
+                current.add_cache(name, hit=not _cache_missed.get())
+            finally:
+                _cache_missed.reset(token)
+            return result
+
+        lookup.clear = cached.clear
+        lookup.peek = cached.peek
+        return lookup
+    return decorate
+
+
+_totals_lock = threading.Lock()
+_totals = {"runs": {}, "spans": {}, "cache": {}}
+
+
+def publish(current, jsonl_path=None, prom_path=None):
+    """Append a finished run to the JSON lines file and refresh the Prometheus file"""
+    jsonl_path = jsonl_path or JSONL_PATH
+    prom_path = prom_path or PROM_PATH
+    with _totals_lock:
+        runs = _totals["runs"].setdefault(current.label, [0, 0.0])
+        runs[0] += 1
+        runs[1] += current.seconds
+        for s in current.spans:
+            spans = _totals["spans"].setdefault(s["name"], [0, 0.0])
+            spans[0] += 1
+            spans[1] += s["seconds"]
+        for name, counts in current.cache.items():
+            cache = _totals["cache"].setdefault(name, {"hits": 0, "misses": 0})
+            cache["hits"] += counts["hits"]
+            cache["misses"] += counts["misses"]
+
+        if jsonl_path:
+            with open(jsonl_path, "a") as f:
+                f.write(json.dumps(current.to_record()) + "\n")
+        if prom_path:
+            _write_prometheus(prom_path, current.rss)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_prometheus(path, rss):
+    """Write the process totals in the Prometheus text format, atomically (for the textfile collector)"""
+    lines = [
+        "# HELP manpower_run_seconds Wall time of dashboard reruns.",
+        "# TYPE manpower_run_seconds summary",
+    ]
+    for label, (count, total) in sorted(_totals["runs"].items()):
+        lines.append(f'manpower_run_seconds_count{{run="{_label(label)}"}} {count}')
+        lines.append(f'manpower_run_seconds_sum{{run="{_label(label)}"}} {total:.6f}')
+    lines += [
+        "# HELP manpower_span_seconds Wall time of instrumented steps.",
+        "# TYPE manpower_span_seconds summary",
+    ]
+    for name, (count, total) in sorted(_totals["spans"].items()):
+        lines.append(f'manpower_span_seconds_count{{span="{_label(name)}"}} {count}')
+        lines.append(f'manpower_span_seconds_sum{{span="{_label(name)}"}} {total:.6f}')
+    lines += [
+        "# HELP manpower_cache_requests_total Cache lookups by result.",
+        "# TYPE manpower_cache_requests_total counter",
+    ]
+    for name, counts in sorted(_totals["cache"].items()):
+        lines.append(f'manpower_cache_requests_total{{cache="{_label(name)}",result="hit"}} {counts["hits"]}')
+        lines.append(f'manpower_cache_requests_total{{cache="{_label(name)}",result="miss"}} {counts["misses"]}')
+    lines += [
+        "# HELP manpower_rss_bytes Resident set size after the last run.",
+        "# TYPE manpower_rss_bytes gauge",
+        f"manpower_rss_bytes {rss}",
+    ]
+    with open(path + ".tmp", "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,161 @@
+"""Derive manpower cost from allocations and salaries, and check it against the cost sheets"""
+import numpy as np
+import pandas as pd
+
+from manpower.schema import column
+
+# Relative difference from the sheet value above which a row is flagged
+TOLERANCE = 0.01
+COST_KEYS = ['Month_Key', 'Project Name', 'Team']
+PNL_KEYS = ['Month', 'Project Name']
+ALLOCATION_COLUMNS = COST_KEYS + ['Employee Id', 'Allocation per project']
+SALARY_COLUMNS = ['Employee Id', 'Growth Month', 'Current Salary']
+
+
+def _shared_codes(left, right):
+    """Integer codes for two key columns that are equal exactly where the values are.
+
+    Compacted sheets hold ids as categoricals with different categories
+    per sheet (or as plain numbers), so they are factorized together.
+    """
+    numeric = pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right)
+    dtype = float if numeric else object
+    codes, _ = pd.factorize(np.concatenate([left.to_numpy(dtype=dtype), right.to_numpy(dtype=dtype)]))
+    return codes[:len(left)], codes[len(left):]
+
+
+def _align_categories(left, right, keys):
+    """Give categorical keys the same categories on both sides, so merging compares codes"""
+    for key in keys:
+        if isinstance(left[key].dtype, pd.CategoricalDtype) and isinstance(right[key].dtype, pd.CategoricalDtype):
+            categories = left[key].cat.categories.union(right[key].cat.categories)
+            left[key] = left[key].cat.set_categories(categories)
+            right[key] = right[key].cat.set_categories(categories)
+
+
+def salary_as_of(allocation_df, salary_df, id_col='Employee Id', month_col='Month_Key',
+                 growth_col='Growth Month', salary_col='Current Salary'):
+    """Each allocation row's salary effective in its month: the latest Growth Month not after it.
+
+    One as-of merge on (employee, month) over both sheets sorted by month.
+    Returns a float array aligned with ``allocation_df``; NaN where the
+    employee has no salary row on or before that month.
+    """
+    left_ids, right_ids = _shared_codes(allocation_df[id_col], salary_df[id_col])
+    left = pd.DataFrame({"key": left_ids, "month": allocation_df[month_col].to_numpy(),
+                         "row": np.arange(len(allocation_df))})
+    right = pd.DataFrame({"key": right_ids, "month": salary_df[growth_col].to_numpy(),
+                          "salary": salary_df[salary_col].to_numpy(dtype=float)})
+    left = left[left["key"] >= 0].dropna(subset=["month"]).sort_values("month", kind="stable")
+    right = right[right["key"] >= 0].dropna(subset=["month", "salary"]).sort_values("month", kind="stable")
+
+    salaries = np.full(len(allocation_df), np.nan)
+    if left.empty or right.empty:
+        return salaries
+    merged = pd.merge_asof(left, right, on="month", by="key", direction="backward")
+    salaries[merged["row"].to_numpy()] = merged["salary"].to_numpy()
+    return salaries
+
+
+def can_derive(allocation_df, salary_df):
+    """Whether the sheets (or their schemas) have the columns :func:`derived_costs` needs"""
+    return (all(column(allocation_df, c) for c in ALLOCATION_COLUMNS)
+            and all(column(salary_df, c) for c in SALARY_COLUMNS))
+
+
+def derived_costs(allocation_df, salary_df, keys=COST_KEYS, allocation_col='Allocation per project'):
+    """Cost per ``keys`` group from allocation share × effective salary, in one grouped pass.
+
+    Returns the groups with ``Derived Cost`` and ``Unpriced Rows`` (rows
+    whose employee had no salary yet, which are left out of the cost).
+    """
+    salaries = salary_as_of(allocation_df, salary_df)
+    share = allocation_df[allocation_col].to_numpy(dtype=float) / 100
+    frame = allocation_df[keys].copy()
+    frame["Derived Cost"] = share * salaries
+    frame["Unpriced Rows"] = np.isnan(salaries).astype(np.int64)
+    return frame.groupby(keys, observed=True, sort=True)[["Derived Cost", "Unpriced Rows"]].sum().reset_index()
+
+
+def _within(frame, other, cols):
+    """Mask of ``frame`` rows whose ``cols`` values occur together in some row of ``other``"""
+    if frame.empty or other.empty:
+        return np.zeros(len(frame), dtype=bool)
+    as_index = lambda df: pd.MultiIndex.from_frame(df[cols].astype(object))
+    return as_index(frame).isin(as_index(other))
+
+
+def compare_costs(derived, sheet_df, keys, sheet_col, tolerance=TOLERANCE, scope=None):
+    """Derived costs next to the sheet's, summed per ``keys``, with the difference and a flag.
+
+    Groups present on only one side are flagged as well. With ``scope`` (a
+    prefix of ``keys``), derived groups are kept only where the sheet has a
+    row with the same ``scope`` values: for when ``sheet_df`` was filtered
+    on columns the allocations do not have.
+    """
+    sheet = sheet_df.groupby(keys, observed=True, sort=True)[sheet_col].sum().reset_index()
+    sheet = sheet.rename(columns={sheet_col: "Sheet Cost"})
+    derived = (derived[_within(derived, sheet, scope)] if scope else derived).copy()
+    _align_categories(derived, sheet, keys)
+    table = derived.merge(sheet, on=keys, how="outer", indicator=True, sort=True)
+    table["Unpriced Rows"] = table["Unpriced Rows"].fillna(0).astype(np.int64)
+    table["Difference"] = table["Derived Cost"].fillna(0) - table["Sheet Cost"].fillna(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table["Difference %"] = (table["Difference"] / table["Sheet Cost"].abs() * 100).replace([np.inf, -np.inf], np.nan)
+    table["Flagged"] = (
+        (table.pop("_merge") != "both")
+        | (table["Difference"].abs() > tolerance * table["Sheet Cost"].abs())
+    )
+    for key in keys:
+        if isinstance(table[key].dtype, pd.CategoricalDtype):
+            table[key] = table[key].astype(object)
+    return table
+
+
+def compare_sheets(derived, cost_df=None, pnl_df=None, tolerance=TOLERANCE, scoped=False):
+    """Compare :func:`derived_costs` with the cost sheets, given as rows or already summed per key.
+
+    Returns ``{name: table}``: ``"cost_per_project"`` compares with
+    Manpower_Cost_Per_Project per month, project and team, and
+    ``"project_pnl"`` with Project_PnL's Man Power Cost per month and
+    project. A comparison is left out when a sheet lacks its columns.
+
+    ``scoped`` is for cost sheets filtered by Category or Status, which
+    the allocations do not record: only the months and projects left in
+    each sheet are compared.
+    """
+    tables = {}
+    if cost_df is not None and all(column(cost_df, c) for c in COST_KEYS + ['Cost']):
+        scope = COST_KEYS[:2] if scoped else None
+        tables["cost_per_project"] = compare_costs(derived, cost_df, COST_KEYS, 'Cost', tolerance, scope)
+    if pnl_df is not None and all(column(pnl_df, c) for c in PNL_KEYS + ['Man Power Cost']):
+        per_project = derived.groupby(COST_KEYS[:2], observed=True, sort=True)[["Derived Cost", "Unpriced Rows"]].sum()
+        per_project = per_project.reset_index().rename(columns={'Month_Key': 'Month'})
+        scope = PNL_KEYS if scoped else None
+        tables["project_pnl"] = compare_costs(per_project, pnl_df, PNL_KEYS, 'Man Power Cost', tolerance, scope)
+    return tables
+
+
+def reconcile(allocation_df, salary_df, cost_df=None, pnl_df=None, tolerance=TOLERANCE, scoped=False):
+    """Check the cost sheets against costs derived from allocations and salaries (see :func:`compare_sheets`)"""
+    if not can_derive(allocation_df, salary_df):
+        return {}
+    return compare_sheets(derived_costs(allocation_df, salary_df), cost_df, pnl_df, tolerance, scoped)
+
+
+def reconcile_query(backend, key, tolerance=TOLERANCE):
+    """:func:`reconcile` for the rows matching a filter tuple, through a :class:`QueryBackend`.
+
+    The backend derives the costs and sums the cost sheets per key, so
+    only those groups are held here, never the sheets' rows.
+    """
+    derived = backend.allocation_costs(key)
+    if derived is None:
+        return {}
+    sums = {}
+    for sheet_name, keys, measure in (("Manpower_Cost_Per_Project", COST_KEYS, 'Cost'),
+                                      ("Project_PnL", PNL_KEYS, 'Man Power Cost')):
+        if all(column(backend.schema(sheet_name), c) for c in keys + [measure]):
+            sums[sheet_name] = backend.group_sum(sheet_name, key, keys, [measure])
+    return compare_sheets(derived, sums.get("Manpower_Cost_Per_Project"), sums.get("Project_PnL"),
+                          tolerance, scoped=any(key[3:]))
@@ -0,0 +1,165 @@
+"""Process-wide background refresh of the loaded sheets"""
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from manpower.sheets import MAX_WORKERS, SHEET_GIDS, SheetBundle
+from manpower.snapshots import SnapshotStore, load_sheets_with_snapshots, refresh_sheets
+from manpower.workbook import WORKBOOK_INGEST
+
+REFRESH_SECONDS = float(os.environ.get("MANPOWER_REFRESH_SECONDS", "600"))
+# Each sheet's next refresh is spread over +/- this fraction of the interval
+REFRESH_JITTER = float(os.environ.get("MANPOWER_REFRESH_JITTER", "0.1"))
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Keep one :class:`SheetBundle` fresh from a daemon thread, so no request waits for a fetch.
+
+    Every sheet is re-checked about every ``interval`` seconds (jittered
+    per sheet so they do not all fall due together). Refreshes of the same
+    sheet are single-flight: a caller asking for a sheet that is already
+    being refreshed waits for that refresh instead of starting another.
+    New data is swapped in by replacing the whole bundle, so a reader
+    holding :meth:`current` always sees one complete, consistent version.
+    Without ``keep_frames`` the bundle only tracks versions and the data
+    stays in the snapshots, for a backend that queries them directly.
+    """
+
+    def __init__(self, sheets=None, store=None, interval=REFRESH_SECONDS, jitter=REFRESH_JITTER,
+                 max_workers=MAX_WORKERS, keep_frames=True):
+        self.sheets = SHEET_GIDS if sheets is None else sheets
+        self.store = store or SnapshotStore()
+        self.interval = interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.keep_frames = keep_frames
+        self._bundle = None
+        self._due = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _next_due(self, soon=False):
+        if soon:
+            return time.monotonic() + random.uniform(0, self.jitter * self.interval)
+        return time.monotonic() + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def current(self):
+        """The latest bundle; the first call loads it (from snapshots where possible)"""
+        bundle = self._bundle
+        if bundle is not None:
+            return bundle
+        with self._load_lock:
+            if self._bundle is None:
+                started = datetime.now()
+                bundle = load_sheets_with_snapshots(
+                    self.sheets, self.store, self.max_workers, revalidate=False, load_frames=self.keep_frames
+                )
+                with self._lock:
+                    self._bundle = bundle
+                    for name in self.sheets:
+                        # Sheets served from an existing snapshot are re-checked soon
+                        served_stale = name in bundle.fetched_at and bundle.fetched_at[name] < started
+                        self._due[name] = self._next_due(soon=served_stale)
+            return self._bundle
+
+    def start(self):
+        """Start the background thread (idempotent); returns self"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="sheet-refresh", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self.current()
+        while not self._stop.is_set():
+            with self._lock:
+                wait = min(self._due.values(), default=time.monotonic() + self.interval) - time.monotonic()
+            if self._stop.wait(max(0.0, min(wait, self.interval))):
+                break
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, at in self._due.items() if at <= now]
+            if due and WORKBOOK_INGEST:
+                # One workbook download covers every sheet, so refresh them all together
+                due = list(self.sheets)
+            if due:
+                try:
+                    self.refresh(due)
+                except Exception as e:
+                    logger.warning("Scheduled refresh failed: %s", e)
+
+    def refresh(self, names=None):
+        """Refresh sheets now, merged with any refresh of the same sheets already running"""
+        names = list(self.sheets) if names is None else list(names)
+        self.current()
+        with self._lock:
+            mine = {name: threading.Event() for name in names if name not in self._inflight}
+            theirs = [self._inflight[name] for name in names if name in self._inflight]
+            self._inflight.update(mine)
+        try:
+            if mine:
+                results, errors = refresh_sheets(self.store, {name: self.sheets[name] for name in mine}, self.max_workers)
+                self._swap(results, errors)
+        finally:
+            with self._lock:
+                for name, done in mine.items():
+                    del self._inflight[name]
+                    self._due[name] = self._next_due()
+                    done.set()
+        for done in theirs:
+            done.wait()
+        return self._bundle
+
+    def _swap(self, results, errors):
+        """Replace the bundle with one that has the refreshed sheets.
+
+        Unchanged sheets keep their frames and version; only their fetch
+        time moves on, since the source was checked.
+        """
+        current = self._bundle
+        changed, checked = {}, {}
+        for name, (df, digest, fetched_at, report) in results.items():
+            if digest == current.hashes.get(name):
+                checked[name] = fetched_at
+                continue
+            if df is None and self.keep_frames:
+                # Unchanged since the last snapshot, but newer than what is being served
+                snapshot = self.store.read(name)
+                if snapshot is None:
+                    continue
+                df = snapshot[0]
+            changed[name] = (df, digest, fetched_at, report)
+        for name, error in errors.items():
+            logger.warning("Refresh of %s failed: %s", name, error)
+
+        with self._lock:
+            current = self._bundle
+            frames, hashes = dict(current.frames), dict(current.hashes)
+            fetched_at, reports = dict(current.fetched_at), dict(current.reports)
+            failed = dict(current.errors)
+            for name, (df, digest, fetched, report) in changed.items():
+                hashes[name], fetched_at[name], reports[name] = digest, fetched, report
+                if self.keep_frames:
+                    frames[name] = df
+                failed.pop(name, None)
+            fetched_at.update(checked)
+            for name, error in errors.items():
+                if name not in hashes:
+                    failed[name] = error
+            for name in results:
+                failed.pop(name, None)
+            if changed or checked or failed != current.errors:
+                self._bundle = SheetBundle(frames, failed, hashes=hashes, fetched_at=fetched_at, reports=reports)
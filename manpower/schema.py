@@ -0,0 +1,235 @@
+"""Declared per-sheet schema and the one-pass column parser built on it"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# kind is one of: text, id, currency, percent, number, date
+Column = namedtuple("Column", ["kind", "aliases"])
+
+
+def col(kind, *aliases):
+    return Column(kind, list(aliases))
+
+
+SCHEMAS = {
+    "Employees": {
+        "Employee Id": col("id", "Employee_id", "employee id"),
+        "Employee Name": col("text", "employee name"),
+        "Role": col("text", "role"),
+        "Team": col("text", "team"),
+        "Status": col("text", "status"),
+        "Join Date": col("date", "join date"),
+        "Salary": col("currency", "Current Salary", "salary"),
+    },
+    "Salary_Growth": {
+        "Employee Id": col("id", "Employee_id", "employee id"),
+        "Employee Name": col("text", "employee name"),
+        "Role": col("text", "role"),
+        "Team": col("text", "team"),
+        "Growth Month": col("date", "growth month", "Month", "month"),
+        "Join Date": col("date", "join date"),
+        "Current Salary": col("currency", "current salary", "Salary"),
+        "Total Cost": col("currency", "total cost"),
+    },
+    "Projects": {
+        "Project Name": col("text", "project name"),
+        "Category": col("text", "category"),
+        "Status": col("text", "status"),
+        "Start Date": col("date", "start date"),
+        "End Date": col("date", "end date"),
+    },
+    "Manpower_Cost_Per_Project": {
+        "Month_Key": col("date", "Month", "month"),
+        "Project Name": col("text", "project name"),
+        "Team": col("text", "team"),
+        "Category": col("text", "category"),
+        "Status": col("text", "status"),
+        "Cost": col("currency", "cost"),
+    },
+    "Manpower_Allocation": {
+        "Month_Key": col("date", "Month", "month"),
+        "Employee Id": col("id", "Employee_id", "employee id"),
+        "Employee Name": col("text", "employee name"),
+        "Role": col("text", "role"),
+        "Team": col("text", "team"),
+        "Project Name": col("text", "project name"),
+        "Status Allocation": col("text", "status allocation"),
+        "Allocation per project": col("percent", "allocation per project"),
+        "Total Allocation": col("percent", "total allocation"),
+        "Total Cost": col("currency", "total cost"),
+    },
+    "Project_PnL": {
+        "Month": col("date", "month", "Date"),
+        "Project Name": col("text", "project name"),
+        "Category": col("text", "category"),
+        "Status": col("text", "status"),
+        "Revenue": col("currency", "revenue"),
+        "Man Power Cost": col("currency", "man power cost", "Cost", "cost"),
+        "PnL": col("currency", "pnl", "P&L"),
+        "Margin": col("percent", "margin"),
+    },
+}
+
+# Fallbacks for columns a schema does not declare
+TEXT_COLS = ['Employee Name', 'Project Name', 'Role', 'Team', 'Category', 'Status', 'Status Allocation', 'Employee_id', 'Employee Id']
+DATE_COLS = ['Start Date', 'End Date', 'Month', 'Growth Month', 'Month_Key', 'month', 'Join Date']
+
+MAX_ERROR_EXAMPLES = 3
+
+
+def column(df, name):
+    """Return ``name`` if the frame has that (canonical) column, else None"""
+    return name if name in df.columns else None
+
+
+def resolve_columns(columns, schema):
+    """Map raw header names to canonical schema names via case-insensitive aliases"""
+    by_lower = {}
+    for raw in columns:
+        by_lower.setdefault(raw.lower(), raw)
+
+    renames = {}
+    for canonical, spec in schema.items():
+        for name in [canonical] + spec.aliases:
+            raw = by_lower.get(name.lower())
+            if raw is not None and raw not in renames:
+                renames[raw] = canonical
+                break
+    return renames
+
+
+def _to_arrow_strings(values):
+    try:
+        return pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(values.astype(str), type=pa.string())
+
+
+def _parse_integer_text(values, strip):
+    """Strip separators with Arrow string kernels and cast what is left to int64.
+
+    Digit strings longer than 18 digits may not fit in int64 and are left
+    missing (reported as failed) rather than raising.
+    """
+    s = _to_arrow_strings(values)
+    for token in strip:
+        s = pc.replace_substring(s, token, '')
+    s = pc.utf8_trim_whitespace(s)
+    s = pc.if_else(pc.match_substring_regex(s, r'^-?\d{1,18}$'), s, None)
+    return pd.Series(pc.cast(s, pa.int64()).to_numpy(zero_copy_only=False))
+
+
+def _parse_unique(values, kind):
+    """Parse the distinct raw strings of a column in one vectorized pass"""
+    if kind == "currency":
+        return _parse_integer_text(values, ['Rp', '.', ',', ' '])
+    if kind == "number":
+        return _parse_integer_text(values, ['Rp', '.', ',', '%', ' '])
+
+    s = pd.Series(values, dtype=object).astype(str).str.strip()
+    if kind == "date":
+        return pd.to_datetime(s, errors='coerce')
+
+    # percent: whichever separator comes last is the decimal mark
+    s = s.str.replace(r'[%\s]', '', regex=True)
+    comma_decimal = s.str.rfind(',') > s.str.rfind('.')
+    s = s.where(comma_decimal, s.str.replace(',', '', regex=False))
+    s = s.where(~comma_decimal, s.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(s, errors='coerce')
+
+
+def parse_column(series, kind):
+    """Convert one raw column to ``kind``; returns ``(parsed, failed_mask)``.
+
+    Values are factorized first so each distinct string is parsed once,
+    which matters for the heavily repeated months, rates and salaries.
+    """
+    already_parsed = (
+        pd.api.types.is_datetime64_any_dtype(series) if kind == "date"
+        else pd.api.types.is_numeric_dtype(series)
+    )
+    if already_parsed:
+        return series, np.zeros(len(series), dtype=bool)
+
+    codes, uniques = pd.factorize(series)
+    if not len(uniques):
+        empty = pd.Series(pd.NaT if kind == "date" else np.nan, index=series.index)
+        return empty, np.zeros(len(series), dtype=bool)
+
+    parsed_uniques = _parse_unique(uniques, kind)
+    blank = pd.Series(uniques, dtype=object).astype(str).str.strip() == ''
+    bad_uniques = (parsed_uniques.isna() & ~blank).to_numpy()
+
+    values = parsed_uniques.to_numpy()
+    missing = codes < 0
+    if missing.any() and values.dtype.kind in "iu":
+        values = values.astype(float)
+    values = values.take(codes)
+    if missing.any():
+        values[missing] = np.datetime64("NaT") if kind == "date" else np.nan
+    failed = ~missing & bad_uniques.take(codes)
+    return pd.Series(values, index=series.index, name=series.name), failed
+
+
+def column_kind(name, schema):
+    """How a column is parsed: its declared kind, a name-based fallback, or "infer" for numbers if any convert"""
+    if name in schema:
+        return schema[name].kind
+    if name in TEXT_COLS:
+        return "text"
+    if name in DATE_COLS:
+        return "date"
+    return "infer"
+
+
+def parse_into(df, name, kind, report):
+    """Parse ``df[name]`` in place as ``kind``, recording values that failed in ``report["errors"]``"""
+    raw = df[name]
+    parsed, failed = parse_column(raw, "number" if kind == "infer" else kind)
+    if kind == "infer":
+        # Undeclared columns only become numeric if something converts
+        if not parsed.notna().any():
+            return
+        kind = "number"
+
+    df[name] = parsed
+    if failed.any():
+        report["errors"][name] = {
+            "kind": kind,
+            "count": int(failed.sum()),
+            "examples": raw[failed].astype(str).unique()[:MAX_ERROR_EXAMPLES].tolist(),
+        }
+
+
+def parse_frame(df, sheet_name=None, text_columns=()):
+    """Resolve headers and parse every column of a raw export in one pass.
+
+    Returns ``(df, report)`` where the report lists header renames, declared
+    columns that are missing and, per column, how many non-empty values
+    failed to parse along with a few examples. ``text_columns`` are kept
+    as text, as strings even where the reader saw numbers.
+    """
+    df.columns = df.columns.str.strip()
+    schema = SCHEMAS.get(sheet_name, {})
+    renames = resolve_columns(df.columns, schema)
+    df = df.rename(columns=renames)
+
+    report = {
+        "renamed": {raw: canonical for raw, canonical in renames.items() if raw != canonical},
+        "missing": [name for name in schema if name not in df.columns],
+        "errors": {},
+    }
+
+    for name in df.columns:
+        if name in text_columns:
+            if df[name].dtype != object:
+                df[name] = df[name].astype(object).where(df[name].isna(), df[name].astype(str))
+            continue
+        kind = column_kind(name, schema)
+        if kind not in ("text", "id"):
+            parse_into(df, name, kind, report)
+
+    return df, report
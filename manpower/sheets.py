@@ -0,0 +1,149 @@
+"""Fetch and parse the Google Sheets exports behind the dashboard"""
+import contextvars
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from manpower.compaction import compact_frame
+from manpower.metrics import span
+from manpower.schema import parse_frame
+
+# CONFIGURATION
+SHEET_ID = "1k1hQsLcO1dtG1ENtULgJrgjMyXx3z_ONOtKY4Ag1TR4"
+SHEET_GIDS = {
+    "Employees": 613206813,
+    "Salary_Growth": 1085376893,
+    "Projects": 932391633,
+    "Manpower_Cost_Per_Project": 1316058601,
+    "Manpower_Allocation": 1938083475,
+    "Project_PnL": 329914575
+}
+
+# Override with e.g. "http://127.0.0.1:8000/{gid}.csv" to point at a local stand-in server
+EXPORT_URL = os.environ.get(
+    "MANPOWER_EXPORT_URL",
+    "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+)
+MAX_WORKERS = 6
+FETCH_TIMEOUT = 60
+
+
+class SheetBundle:
+    """All sheets from one load, plus the error for every sheet that failed"""
+
+    def __init__(self, frames, errors, hashes=None, fetched_at=None, reports=None):
+        self.frames = frames
+        self.errors = errors
+        self.hashes = hashes or {}
+        self.fetched_at = fetched_at or {}
+        self.reports = reports or {}
+
+    def get(self, sheet_name):
+        """Return the sheet, or an empty frame if it failed to load"""
+        return self.frames.get(sheet_name, pd.DataFrame())
+
+
+def export_url(gid, sheet_id=SHEET_ID):
+    """Build the CSV export URL for one sheet tab"""
+    return EXPORT_URL.format(sheet_id=sheet_id, gid=gid)
+
+
+_session_lock = threading.Lock()
+_session = None
+
+
+def http_session():
+    """Process-wide HTTP session: keep-alive connections pooled per host, gzip accepted"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def download(url):
+    """GET a URL over the shared session and return the (decompressed) body"""
+    response = http_session().get(url, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def download_sheet(gid):
+    """Download the raw CSV export bytes for one sheet tab"""
+    return download(export_url(gid))
+
+
+def content_hash(raw):
+    """Hash of a raw export, used to tell whether a sheet has changed"""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def parse_csv(raw, sheet_name=None):
+    """Parse raw CSV export bytes against the sheet's schema and compact the result.
+
+    Returns ``(df, report)``; the report includes the frame's memory use
+    before and after compaction under ``"memory"``.
+    """
+    df, report = parse_frame(pd.read_csv(io.BytesIO(raw)), sheet_name)
+    df, report["memory"] = compact_frame(df, sheet_name)
+    return df, report
+
+
+def run_per_sheet(func, sheets, max_workers=MAX_WORKERS):
+    """Call ``func(name, gid)`` for every sheet on a bounded thread pool.
+
+    Returns ``(results, errors)`` keyed by sheet name; an exception in one
+    sheet is recorded in ``errors`` and does not affect the others. Each
+    call runs in a copy of the caller's context, so instrumentation spans
+    recorded by the workers land in the caller's run.
+    """
+    results, errors = {}, {}
+    if not sheets:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sheets))) as pool:
+        futures = {pool.submit(contextvars.copy_context().run, func, name, gid): name for name, gid in sheets.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+
+    return results, errors
+
+
+def _fetch_with_hash(sheet_name, gid):
+    with span(f"fetch:{sheet_name}"):
+        raw = download_sheet(gid)
+    with span(f"parse:{sheet_name}"):
+        df, report = parse_csv(raw, sheet_name)
+    return df, content_hash(raw), datetime.now(), report
+
+
+def load_sheets(sheets=None, max_workers=MAX_WORKERS):
+    """Fetch and parse several sheets concurrently on a bounded thread pool.
+
+    Each sheet is parsed by the worker that downloaded it, so parsing overlaps
+    with the remaining downloads. A failing sheet is recorded in
+    ``SheetBundle.errors`` and does not affect the others.
+    """
+    sheets = SHEET_GIDS if sheets is None else sheets
+    results, errors = run_per_sheet(_fetch_with_hash, sheets, max_workers)
+    return SheetBundle(
+        {name: r[0] for name, r in results.items()},
+        errors,
+        hashes={name: r[1] for name, r in results.items()},
+        fetched_at={name: r[2] for name, r in results.items()},
+        reports={name: r[3] for name, r in results.items()},
+    )
@@ -0,0 +1,231 @@
+"""On-disk Parquet snapshots of parsed sheets, served stale-while-revalidate"""
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from manpower.compaction import compact_frame
+from manpower.metrics import span
+from manpower.sheets import (
+    MAX_WORKERS,
+    SHEET_GIDS,
+    SheetBundle,
+    content_hash,
+    download_sheet,
+    parse_csv,
+    run_per_sheet,
+)
+from manpower.workbook import WORKBOOK_INGEST, download_sheets
+
+SNAPSHOT_DIR = os.environ.get("MANPOWER_SNAPSHOT_DIR", ".snapshots")
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """One Parquet file per sheet version plus a JSON metadata sidecar naming the current one.
+
+    Data files are named by content hash and never rewritten with other
+    data, so a reader holding a version keeps reading that version while a
+    refresh writes the next. The previous version's file is kept until the
+    one after it is written.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+
+    def _path(self, sheet_name, ext):
+        return os.path.join(self.directory, f"{sheet_name}.{ext}")
+
+    def data_path(self, sheet_name, version):
+        """Path of the Parquet file of one version (content hash) of the sheet, whether or not it exists"""
+        return self._path(sheet_name, f"{version[:16]}.parquet")
+
+    def read_meta(self, sheet_name):
+        """Return the snapshot metadata, or None if there is no snapshot"""
+        try:
+            with open(self._path(sheet_name, "json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.data_path(sheet_name, meta["content_hash"])):
+            return None
+        meta["fetched_at"] = datetime.fromisoformat(meta["fetched_at"])
+        return meta
+
+    def read(self, sheet_name):
+        """Return ``(df, meta)`` for a sheet, or None if there is no usable snapshot"""
+        meta = self.read_meta(sheet_name)
+        if meta is None:
+            return None
+        try:
+            with span(f"snapshot:{sheet_name}"):
+                df = pd.read_parquet(self.data_path(sheet_name, meta["content_hash"]))
+        except Exception as e:
+            logger.warning("Ignoring unreadable snapshot for %s: %s", sheet_name, e)
+            return None
+        return df, meta
+
+    def write(self, sheet_name, df, digest, fetched_at, report=None):
+        """Write the version's data file, then atomically point the metadata at it"""
+        os.makedirs(self.directory, exist_ok=True)
+        previous = self.read_meta(sheet_name)
+        data_path = self.data_path(sheet_name, digest)
+        df.to_parquet(data_path + ".tmp", index=False)
+        os.replace(data_path + ".tmp", data_path)
+        self._write_meta(sheet_name, {
+            "sheet": sheet_name,
+            "content_hash": digest,
+            "fetched_at": fetched_at.isoformat(),
+            "checked_at": fetched_at.isoformat(),
+            "rows": len(df),
+            "parse_report": report or {},
+        })
+        keep = {data_path} | ({self.data_path(sheet_name, previous["content_hash"])} if previous else set())
+        self._remove_versions(sheet_name, keep)
+
+    def _remove_versions(self, sheet_name, keep):
+        """Delete the sheet's data files other than ``keep`` (and the unversioned file of older releases)"""
+        pattern = os.path.join(glob.escape(self.directory), f"{glob.escape(sheet_name)}.*.parquet")
+        for path in glob.glob(pattern) + [self._path(sheet_name, "parquet")]:
+            if path not in keep:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def touch(self, sheet_name, checked_at):
+        """Record that the source was checked and found unchanged"""
+        meta = self.read_meta(sheet_name)
+        if meta is None:
+            return
+        meta["fetched_at"] = meta["fetched_at"].isoformat()
+        meta["checked_at"] = checked_at.isoformat()
+        self._write_meta(sheet_name, meta)
+
+    def _write_meta(self, sheet_name, meta):
+        meta_path = self._path(sheet_name, "json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+def refresh_sheet(store, sheet_name, gid, force=False, raw=None):
+    """Download a sheet and replace its snapshot only if the content changed.
+
+    Returns ``(df, digest, fetched_at, report)``; ``df`` is None when the
+    content was unchanged and therefore not re-parsed, and ``fetched_at``
+    is when the source was read either way. ``force`` always
+    parses and rewrites, e.g. when the existing snapshot is unreadable.
+    ``raw`` is CSV that was already downloaded, e.g. split from a workbook.
+    """
+    if raw is None:
+        with span(f"fetch:{sheet_name}"):
+            raw = download_sheet(gid)
+    digest = content_hash(raw)
+    now = datetime.now()
+    meta = store.read_meta(sheet_name)
+    if not force and meta is not None and meta["content_hash"] == digest:
+        store.touch(sheet_name, now)
+        return None, digest, now, meta.get("parse_report", {})
+
+    with span(f"parse:{sheet_name}"):
+        df, report = parse_csv(raw, sheet_name)
+    try:
+        store.write(sheet_name, df, digest, now, report)
+    except Exception as e:
+        logger.warning("Could not write snapshot for %s: %s", sheet_name, e)
+    return df, digest, now, report
+
+
+def refresh_sheets(store, sheets, max_workers=MAX_WORKERS, force=False):
+    """:func:`refresh_sheet` for several sheets; returns ``(results, errors)`` keyed by sheet name.
+
+    In workbook mode (``MANPOWER_WORKBOOK_INGEST``) every sheet comes from
+    one workbook download; otherwise each worker downloads and parses its
+    own sheet.
+    """
+    if not WORKBOOK_INGEST:
+        return run_per_sheet(lambda name, gid: refresh_sheet(store, name, gid, force), sheets, max_workers)
+    raws, errors = download_sheets(sheets, max_workers)
+    results, parse_errors = run_per_sheet(
+        lambda name, gid: refresh_sheet(store, name, gid, force, raws[name]),
+        {name: gid for name, gid in sheets.items() if name in raws}, max_workers
+    )
+    errors.update(parse_errors)
+    return results, errors
+
+
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+
+def refresh_in_background(store, sheets, max_workers=MAX_WORKERS):
+    """Revalidate snapshots on a daemon thread; sheets already refreshing are skipped"""
+    with _refresh_lock:
+        pending = {name: gid for name, gid in sheets.items() if name not in _refreshing}
+        _refreshing.update(pending)
+    if not pending:
+        return None
+
+    def run():
+        try:
+            _, errors = refresh_sheets(store, pending, max_workers)
+            for name, error in errors.items():
+                logger.warning("Background refresh of %s failed: %s", name, error)
+        finally:
+            with _refresh_lock:
+                _refreshing.difference_update(pending)
+
+    thread = threading.Thread(target=run, name="snapshot-refresh", daemon=True)
+    thread.start()
+    return thread
+
+
+def load_sheets_with_snapshots(sheets=None, store=None, max_workers=MAX_WORKERS, revalidate=True, load_frames=True):
+    """Serve sheets from local snapshots and revalidate them in the background.
+
+    Sheets without a snapshot are fetched synchronously (concurrently) and
+    snapshotted; sheets with one are returned straight from disk while a
+    background thread checks the source for changes (unless ``revalidate``
+    is false, e.g. when a :class:`RefreshScheduler` does that instead).
+    Without ``load_frames`` the bundle holds no frames, only each sheet's
+    version, for backends that query the snapshot files directly.
+    """
+    sheets = SHEET_GIDS if sheets is None else sheets
+    store = store or SnapshotStore()
+    frames, errors, hashes, fetched_at, reports = {}, {}, {}, {}, {}
+    stale, missing = {}, {}
+
+    for name, gid in sheets.items():
+        snapshot = store.read(name) if load_frames else store.read_meta(name)
+        if snapshot is None:
+            missing[name] = gid
+            continue
+        if load_frames:
+            frames[name], meta = snapshot
+        else:
+            meta = snapshot
+        hashes[name] = meta["content_hash"]
+        fetched_at[name] = meta["fetched_at"]
+        reports[name] = meta.get("parse_report", {})
+        if load_frames and "memory" not in reports[name]:
+            # Written before compaction existed
+            frames[name], reports[name]["memory"] = compact_frame(frames[name], name)
+        stale[name] = gid
+
+    results, fetch_errors = refresh_sheets(store, missing, max_workers, force=True)
+    for name, (df, digest, fetched, report) in results.items():
+        hashes[name], fetched_at[name], reports[name] = digest, fetched, report
+        if load_frames:
+            frames[name] = df
+    errors.update(fetch_errors)
+
+    if stale and revalidate:
+        refresh_in_background(store, stale, max_workers)
+
+    return SheetBundle(frames, errors, hashes=hashes, fetched_at=fetched_at, reports=reports)
@@ -0,0 +1,130 @@
+"""Server-side paging, sorting and text search for large tables"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 50
+MEMO_SIZE = 32
+
+
+class TableEngine:
+    """Serve pages of a frame sorted by any column and filtered by a text search.
+
+    Sort orders are computed once per column and kept. A search is matched
+    against the distinct values of each search column rather than every row.
+    The row positions for each (search, sort) query are memoized, so paging
+    through a result only reads the rows on the requested page.
+    """
+
+    def __init__(self, df, search_cols=(), memo_size=MEMO_SIZE):
+        self.df = df
+        self.search_cols = [c for c in search_cols if c in df.columns]
+        self.memo_size = memo_size
+        self._orders = {}
+        self._codes = {}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _order(self, col):
+        """Ascending row order for ``col``, missing values last"""
+        order = self._orders.get(col)
+        if order is None:
+            values = self.df[col]
+            if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+                order = np.argsort(values.to_numpy(), kind='stable')
+            else:
+                codes, _ = pd.factorize(values, sort=True)
+                codes = np.where(codes < 0, len(codes), codes)
+                order = np.argsort(codes, kind='stable')
+            self._orders[col] = order
+        return order
+
+    def _factorized(self, col):
+        if col not in self._codes:
+            codes, uniques = pd.factorize(self.df[col])
+            self._codes[col] = (codes, pd.Index(uniques).astype(str).str.lower())
+        return self._codes[col]
+
+    def _search_mask(self, text):
+        mask = np.zeros(len(self.df), dtype=bool)
+        for col in self.search_cols:
+            codes, uniques = self._factorized(col)
+            hits = np.flatnonzero(uniques.str.contains(text, regex=False))
+            if len(hits):
+                mask |= np.isin(codes, hits)
+        return mask
+
+    def positions(self, search="", sort_col=None, descending=False):
+        """Row positions for a query, or None when it is the frame's own order"""
+        search = (search or "").strip().lower()
+        if not search and not sort_col:
+            return None
+        key = (search, sort_col, descending)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        if sort_col:
+            order = self._order(sort_col)
+            if descending:
+                # Reverse the non-missing part only, so missing values stay last
+                n_missing = int(self.df[sort_col].isna().sum())
+                order = np.concatenate([order[:len(order) - n_missing][::-1], order[len(order) - n_missing:]])
+        else:
+            order = np.arange(len(self.df))
+        if search:
+            order = order[self._search_mask(search)[order]]
+
+        with self._lock:
+            self._memo[key] = order
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return order
+
+    def count(self, search="", sort_col=None, descending=False):
+        rows = self.positions(search, sort_col, descending)
+        return len(self.df) if rows is None else len(rows)
+
+    def page(self, page=1, page_size=PAGE_SIZE, search="", sort_col=None, descending=False):
+        """One page (1-based) of the query result"""
+        start = (page - 1) * page_size
+        rows = self.positions(search, sort_col, descending)
+        if rows is None:
+            return self.df.iloc[start:start + page_size]
+        return self.df.iloc[rows[start:start + page_size]]
+
+
+def employee_rollup(allocation_df, month_col=None):
+    """Per-employee Total Allocation and Total Cost from Manpower_Allocation.
+
+    Total Allocation and Total Cost are per employee and month, repeated on
+    each of the employee's project rows, so they are taken once per
+    (employee, month) before rolling up: cost is summed over months and
+    allocation averaged.
+    """
+    if 'Employee Name' not in allocation_df.columns:
+        return pd.DataFrame()
+    month_col = month_col if month_col in allocation_df.columns else None
+    keys = ['Employee Name'] + ([month_col] if month_col else [])
+
+    agg = {}
+    for col in ['Employee Id', 'Role', 'Team', 'Total Allocation', 'Total Cost']:
+        if col in allocation_df.columns:
+            agg[col] = 'first'
+    monthly = allocation_df.groupby(keys, observed=True, sort=False).agg(agg).reset_index()
+
+    rollup_agg = {col: 'first' for col in ['Employee Id', 'Role', 'Team'] if col in monthly.columns}
+    if 'Total Allocation' in monthly.columns:
+        rollup_agg['Total Allocation'] = 'mean'
+    if 'Total Cost' in monthly.columns:
+        rollup_agg['Total Cost'] = 'sum'
+    rollup = monthly.groupby('Employee Name', observed=True).agg(rollup_agg)
+
+    if month_col:
+        rollup['Months'] = monthly.groupby('Employee Name', observed=True)[month_col].nunique()
+    if 'Project Name' in allocation_df.columns:
+        rollup['Projects'] = allocation_df.groupby('Employee Name', observed=True)['Project Name'].nunique()
+    return rollup.reset_index()
@@ -0,0 +1,249 @@
+"""Running totals, trailing averages and period-over-period changes of Project_PnL, kept per data version"""
+import numpy as np
+import pandas as pd
+
+from manpower.cube import MEASURES
+from manpower.display import with_total_row
+
+# Trailing averages over this many months
+WINDOWS = (3, 12)
+KEYS = ['Project Name', 'Category']
+
+
+def _month_numbers(months):
+    """Months since 1970-01 of a datetime column; rows without a date get -1"""
+    values = months.to_numpy(dtype="datetime64[ns]")
+    numbers = values.astype("datetime64[M]").astype(np.int64)
+    numbers[np.isnat(values)] = -1
+    return numbers
+
+
+def _month_range(months, date_range):
+    """``(lo, hi)`` positions of the months within ``date_range`` (all of them without one)"""
+    if date_range is None:
+        return 0, len(months)
+    lo = int(months.searchsorted(pd.Timestamp(date_range[0]).to_period("M").to_timestamp(), side="left"))
+    hi = int(months.searchsorted(pd.Timestamp(date_range[1]), side="right"))
+    return lo, max(lo, hi)
+
+
+def _lagged(values, end, lag):
+    """``values`` at ``end - lag`` along the last axis, NaN where that is before the first month"""
+    end = np.asarray(end) - lag
+    lagged = np.take(values, np.clip(end, 0, None), axis=-1).astype(float)
+    return np.where(end >= 0, lagged, np.nan)
+
+
+def _margin(pnl, revenue):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(revenue > 0, pnl / revenue * 100, np.nan)
+
+
+def trend_metrics(months, sums, date_range=None, month_col='Month'):
+    """The monthly trend table for measures summed per month over the whole history.
+
+    ``months`` are consecutive month starts and ``sums`` maps each measure
+    to its totals in those months. Trailing averages and changes look back
+    before ``date_range`` where the history allows (NaN where it does not);
+    running totals start at the beginning of the range.
+    """
+    lo, hi = _month_range(months, date_range)
+    positions = np.arange(lo, hi)
+    table = {month_col: months[lo:hi]}
+    prefixes = {}
+    for measure, values in sums.items():
+        values = np.asarray(values, dtype=float)
+        prefix = prefixes[measure] = np.concatenate([[0.0], np.cumsum(values)])
+        table[measure] = values[lo:hi]
+        table[f"{measure} Running Total"] = prefix[lo + 1:hi + 1] - prefix[lo]
+        for window in WINDOWS:
+            table[f"{measure} {window}M Avg"] = (prefix[positions + 1] - _lagged(prefix, positions + 1, window)) / window
+        table[f"{measure} MoM"] = values[lo:hi] - _lagged(values, positions, 1)
+        table[f"{measure} YoY"] = values[lo:hi] - _lagged(values, positions, 12)
+    if 'PnL' in sums and 'Revenue' in sums:
+        table['Margin'] = _margin(table['PnL'], table['Revenue'])
+        trailing = {m: prefixes[m][positions + 1] - _lagged(prefixes[m], positions + 1, 12) for m in ('PnL', 'Revenue')}
+        table['Margin 12M'] = _margin(trailing['PnL'], trailing['Revenue'])
+    return pd.DataFrame(table)
+
+
+def monthly_sums(time_series, month_col, measures):
+    """``(months, sums)`` for :func:`trend_metrics` from a per-month time series, filling missing months with 0"""
+    dated = time_series.dropna(subset=[month_col])
+    if dated.empty:
+        return pd.DatetimeIndex([]), {m: np.zeros(0) for m in measures}
+    numbers = _month_numbers(dated[month_col])
+    first = numbers.min()
+    sums = {}
+    for measure in measures:
+        sums[measure] = np.bincount(numbers - first, weights=dated[measure].to_numpy(dtype=float))
+    months = pd.DatetimeIndex(np.arange(first, numbers.max() + 1).astype("datetime64[M]").astype("datetime64[ns]"))
+    return months, sums
+
+
+class TrendEngine:
+    """Project_PnL measures per (project, category) and month, held as prefix sums for trend queries.
+
+    For each measure (and the row count) a ``groups × (months + 1)`` array
+    holds running totals along consecutive months, so the total of any
+    window of months is one subtraction per group and a selection of
+    groups is one masked sum. :meth:`extend` builds the engine for a newer
+    version of the sheet from this one by aggregating only the months after
+    the last one held, as long as every earlier month is unchanged.
+    Needs a month column and at least one of ``KEYS``. ``df`` may hold the
+    sheet's rows or, with ``count_col``, rows already summed per month and
+    group with the number of rows behind each in ``count_col``. Engines are
+    not modified after they are built and may be shared.
+    """
+
+    def __init__(self, df, month_col='Month', count_col=None, _parts=None):
+        self.month_col = month_col
+        self.count_col = count_col
+        self.keys = [c for c in KEYS if c in df.columns]
+        self.measures = [c for c in MEASURES if c in df.columns]
+        if _parts is None:
+            _parts = self._build(df)
+        self.groups, self.first, self.prefix, self.rows, self.fingerprint = _parts
+        self.months = pd.DatetimeIndex(
+            np.arange(self.first, self.first + self.rows.shape[1] - 1).astype("datetime64[M]").astype("datetime64[ns]")
+        )
+
+    def _columns(self):
+        return [self.month_col] + self.keys + self.measures + ([self.count_col] if self.count_col else [])
+
+    def _fingerprint(self, df):
+        """Row count and a content hash per month number, to tell whether a month changed"""
+        numbers = _month_numbers(df[self.month_col])
+        hashes = pd.util.hash_pandas_object(df[self._columns()], index=False).to_numpy()
+        frame = pd.DataFrame({"month": numbers, "hash": hashes})
+        return frame[numbers >= 0].groupby("month")["hash"].agg(["sum", "size"])
+
+    def _aggregate(self, df, numbers):
+        """Measures and row counts summed per (group key tuple, month number), dated rows only"""
+        dated = numbers >= 0
+        counts = [self.count_col] if self.count_col else []
+        frame = df.loc[dated, self.keys + self.measures + counts].copy()
+        frame["_month"] = numbers[dated]
+        grouped = frame.groupby(self.keys + ["_month"], observed=True, dropna=False, sort=False)
+        sums = grouped[self.measures].sum()
+        sums["_rows"] = grouped[self.count_col].sum() if self.count_col else grouped.size()
+        return sums
+
+    def _place(self, sums, groups, first, n_months):
+        """Group index (extended with new keys), and ``{column: groups × n_months}`` arrays of ``sums``"""
+        pairs = sums.index.droplevel("_month")
+        if groups is None:
+            groups = pairs[:0]
+        ids = groups.get_indexer(pairs)
+        if (ids < 0).any():
+            groups = groups.append(pairs[ids < 0].unique())
+            ids = groups.get_indexer(pairs)
+        cols = sums.index.get_level_values("_month").to_numpy() - first
+        arrays = {}
+        for col in self.measures + ["_rows"]:
+            values = np.zeros((len(groups), n_months))
+            values[ids, cols] = sums[col].to_numpy(dtype=float)
+            arrays[col] = values
+        return groups, arrays
+
+    def _build(self, df):
+        numbers = _month_numbers(df[self.month_col])
+        dated = numbers[numbers >= 0]
+        first, last = (int(dated.min()), int(dated.max())) if len(dated) else (0, -1)
+        groups, arrays = self._place(self._aggregate(df, numbers), None, first, last - first + 1)
+        prefix = {m: _with_prefix(arrays[m]) for m in self.measures}
+        return groups, first, prefix, _with_prefix(arrays["_rows"]), self._fingerprint(df)
+
+    def extend(self, df):
+        """The engine for a newer version of the sheet, incremental when only later months were added"""
+        same_columns = (self.keys == [c for c in KEYS if c in df.columns]
+                        and self.measures == [c for c in MEASURES if c in df.columns])
+        if not same_columns or self.fingerprint.empty:
+            return TrendEngine(df, self.month_col, self.count_col)
+        fingerprint = self._fingerprint(df)
+        if not fingerprint[fingerprint.index <= self.fingerprint.index.max()].equals(self.fingerprint):
+            return TrendEngine(df, self.month_col, self.count_col)
+
+        numbers = _month_numbers(df[self.month_col])
+        last_held = self.first + self.rows.shape[1] - 2
+        added = numbers > last_held
+        if not added.any():
+            return TrendEngine(df, self.month_col, self.count_col, (self.groups, self.first, self.prefix, self.rows, fingerprint))
+        new_df = df[added]
+        n_new = int(numbers[added].max()) - last_held
+        groups, arrays = self._place(self._aggregate(new_df, numbers[added]), self.groups, last_held + 1, n_new)
+        grown = len(groups) - len(self.groups)
+        prefix = {m: _append(self.prefix[m], grown, arrays[m]) for m in self.measures}
+        rows = _append(self.rows, grown, arrays["_rows"])
+        return TrendEngine(df, self.month_col, self.count_col, (groups, self.first, prefix, rows, fingerprint))
+
+    @staticmethod
+    def covers(key):
+        """Whether a filter tuple can be answered here: team and status are not held per group"""
+        return not key[2] and not key[4]
+
+    def _selected(self, key):
+        """Boolean mask of the groups matching the project and category filters of ``key``"""
+        mask = np.ones(len(self.groups), dtype=bool)
+        for col, value in (('Project Name', key[1]), ('Category', key[3])):
+            if value and col in self.keys:
+                mask &= (self.groups.get_level_values(col) == value)
+        return mask
+
+    def series(self, key):
+        """:func:`trend_metrics` of the groups matching ``key`` (see :meth:`covers`)"""
+        mask = self._selected(key)
+        sums = {m: np.diff(self.prefix[m][mask].sum(axis=0)) for m in self.measures}
+        return trend_metrics(self.months, sums, key[0], self.month_col)
+
+    def summary(self, key):
+        """Per (project, category) totals over the date range, with year-over-year and trailing 12-month figures.
+
+        Only groups with rows in the range are listed, largest revenue
+        first, followed by a GRAND TOTAL row.
+        """
+        lo, hi = _month_range(self.months, key[0])
+        mask = self._selected(key) & (self.rows[:, hi] - self.rows[:, lo] > 0)
+        table = self.groups[mask].to_frame(index=False)
+        totals = {}
+        for m in self.measures:
+            prefix = self.prefix[m][mask]
+            table[m] = prefix[:, hi] - prefix[:, lo]
+            totals[m] = table[m].sum()
+            if m in ('Revenue', 'PnL'):
+                # Against the same months a year earlier
+                table[f"{m} YoY"] = table[m] - (_lagged(prefix, hi, 12) - _lagged(prefix, lo, 12))
+                table[f"{m} 12M"] = prefix[:, hi] - _lagged(prefix, hi, 12)
+                totals[f"{m} YoY"] = table[f"{m} YoY"].sum(min_count=1)
+                totals[f"{m} 12M"] = table[f"{m} 12M"].sum(min_count=1)
+        if 'PnL' in self.measures and 'Revenue' in self.measures:
+            table['Margin'] = _margin(table['PnL'], table['Revenue'])
+            table['Margin 12M'] = _margin(table['PnL 12M'], table['Revenue 12M'])
+            totals['Margin'] = _margin(np.float64(totals['PnL']), np.float64(totals['Revenue']))
+            totals['Margin 12M'] = _margin(np.float64(totals['PnL 12M']), np.float64(totals['Revenue 12M']))
+        if 'Revenue' in table.columns:
+            table = table.sort_values('Revenue', ascending=False, kind="stable")
+        totals[self.keys[0]] = "GRAND TOTAL"
+        if 'Category' in self.keys[1:]:
+            totals['Category'] = f"{table['Category'].nunique()} Categories"
+        return with_total_row(table.reset_index(drop=True), totals)
+
+
+def _with_prefix(values):
+    """Running totals along the months with a leading zero column"""
+    prefix = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=prefix[:, 1:])
+    return prefix
+
+
+def _append(prefix, new_groups, values):
+    """``prefix`` with ``new_groups`` zero rows and the running totals of the new months' ``values``"""
+    prefix = np.vstack([prefix, np.zeros((new_groups, prefix.shape[1]))]) if new_groups else prefix
+    return np.hstack([prefix, prefix[:, -1:] + np.cumsum(values, axis=1)])
+
+
+def trend_engine(df, month_col='Month', count_col=None, previous=None):
+    """A :class:`TrendEngine` for ``df``, extended from ``previous`` (an earlier version's engine) when that is possible"""
+    if previous is not None and (previous.month_col, previous.count_col) == (month_col, count_col):
+        return previous.extend(df)
+    return TrendEngine(df, month_col, count_col)
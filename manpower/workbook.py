@@ -0,0 +1,121 @@
+"""Download the whole spreadsheet as one XLSX export and split it into per-sheet CSV"""
+import csv
+import io
+import logging
+import os
+from datetime import date, datetime, time
+
+from manpower.metrics import span
+from manpower.sheets import MAX_WORKERS, SHEET_ID, download, download_sheet, run_per_sheet
+
+# Override with e.g. "http://127.0.0.1:8000/workbook.xlsx" to point at a local stand-in server
+WORKBOOK_URL = os.environ.get(
+    "MANPOWER_WORKBOOK_URL",
+    "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx"
+)
+# Fetch every sheet with one workbook download instead of one CSV export per gid
+WORKBOOK_INGEST = os.environ.get("MANPOWER_WORKBOOK_INGEST", "").lower() in ("1", "true", "yes")
+# Data rows inspected for each column's number format
+FORMAT_SAMPLE_ROWS = 20
+
+logger = logging.getLogger(__name__)
+
+
+def _cell_text(value, percent=False):
+    """A cell value as the CSV export would write it, closely enough for the schema parser"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        if percent:
+            return f"{value * 100:.10g}%"
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return f"{value:.15g}" if isinstance(value, float) else str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ") if value.time() != time() else value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _percent_columns(worksheet, sample_rows=FORMAT_SAMPLE_ROWS):
+    """Positions of the columns formatted as percentages, judged from the first data rows.
+
+    Reading formats for every cell is several times slower than reading
+    values only, and sheet columns are formatted as a whole.
+    """
+    percent = set()
+    for row in worksheet.iter_rows(min_row=2, max_row=1 + sample_rows):
+        for i, cell in enumerate(row):
+            if cell.value is not None and "%" in (cell.number_format or ""):
+                percent.add(i)
+    return percent
+
+
+def worksheet_csv(worksheet):
+    """CSV bytes for one worksheet, trailing empty rows dropped"""
+    percent = _percent_columns(worksheet)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    pending_blank = 0
+    for row in worksheet.iter_rows(values_only=True):
+        values = [_cell_text(value, i in percent) for i, value in enumerate(row)]
+        if not any(values):
+            pending_blank += 1
+            continue
+        for _ in range(pending_blank):
+            writer.writerow([])
+        pending_blank = 0
+        writer.writerow(values)
+    return out.getvalue().encode("utf-8")
+
+
+def split_workbook(raw, sheet_names):
+    """``{sheet_name: csv_bytes}`` for the requested sheets found in an XLSX workbook"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(raw), read_only=True, data_only=True)
+    try:
+        return {name: worksheet_csv(workbook[name]) for name in sheet_names if name in workbook.sheetnames}
+    finally:
+        workbook.close()
+
+
+def download_workbook(sheet_id=SHEET_ID):
+    """Download the raw XLSX export of the whole spreadsheet"""
+    return download(WORKBOOK_URL.format(sheet_id=sheet_id))
+
+
+def download_sheets(sheets, max_workers=MAX_WORKERS, workbook=None):
+    """Raw CSV bytes for several sheets; returns ``(raws, errors)`` keyed by sheet name.
+
+    With ``workbook`` (default ``WORKBOOK_INGEST``) the spreadsheet is
+    downloaded once and split locally. Sheets it does not contain, or all
+    of them if the workbook cannot be downloaded or read, fall back to one
+    CSV export per gid.
+    """
+    workbook = WORKBOOK_INGEST if workbook is None else workbook
+    raws = {}
+    if workbook and sheets:
+        try:
+            with span("fetch:workbook"):
+                raw = download_workbook()
+            with span("split:workbook"):
+                raws = split_workbook(raw, sheets)
+        except Exception as e:
+            logger.warning("Workbook download failed, falling back to per-sheet CSV: %s", e)
+        else:
+            for name in sheets:
+                if name not in raws:
+                    logger.warning("Sheet %s not found in the workbook, fetching its CSV export", name)
+
+    def fetch(name, gid):
+        with span(f"fetch:{name}"):
+            return download_sheet(gid)
+
+    fallback = {name: gid for name, gid in sheets.items() if name not in raws}
+    fetched, errors = run_per_sheet(fetch, fallback, max_workers)
+    raws.update(fetched)
+    return raws, errors
@@ -1,9 +1,49 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import functools
+import math
+import time
+import uuid
 from datetime import datetime
 
+from manpower import metrics
+from manpower.backends import QUERY_BACKEND, ROW_COUNT, DuckDBBackend, PandasBackend
+from manpower.budget import SHARED_CACHE
+from manpower.charts import (
+    FIGURE_CACHE,
+    MAX_LINE_POINTS,
+    TIMELINE_PAGE_SIZE,
+    figure_spec,
+    margin_figure,
+    profitability_figure,
+    profitability_rows,
+    spec_figure,
+    team_cost_figure,
+    time_series_figure,
+    timeline_figure,
+    timeline_page_count,
+    timeline_rows,
+)
+from manpower.compensation import CompensationRollup
+from manpower.cube import PnLCube
+from manpower.engine import (
+    DATE_COLUMNS,
+    compensation_columns,
+    compensation_summary,
+    kpis,
+    pnl_summary,
+)
+from manpower.export import FORMATS, export_file, file_name, formats_for
+from manpower.filters import FilterEngine, filter_key
+from manpower.ingest import STREAM_INGEST, start_ingest
+from manpower.schema import column
+from manpower.tables import PAGE_SIZE, TableEngine, employee_rollup
+from manpower.sheets import SHEET_GIDS
+from manpower.reconcile import TOLERANCE as RECONCILE_TOLERANCE, reconcile_query
+from manpower.scheduler import RefreshScheduler
+from manpower.snapshots import SnapshotStore
+from manpower.trends import KEYS as TREND_KEYS, TrendEngine, monthly_sums, trend_engine, trend_metrics
+
 # Page configuration
 st.set_page_config(
     page_title="Man Power Cost Analysis Dashboard",
@@ -59,17 +99,6 @@ def check_auth():
 if not check_auth():
     st.stop()
 
-# CONFIGURATION
-SHEET_ID = "1k1hQsLcO1dtG1ENtULgJrgjMyXx3z_ONOtKY4Ag1TR4"
-SHEET_GIDS = {
-    "Employees": 613206813,
-    "Salary_Growth": 1085376893,
-    "Projects": 932391633,
-    "Manpower_Cost_Per_Project": 1316058601,
-    "Manpower_Allocation": 1938083475,
-    "Project_PnL": 329914575
-}
-
 # Session state
 if 'selected_projects' not in st.session_state:
     st.session_state.selected_projects = None
@@ -81,44 +110,54 @@ if 'selected_category' not in st.session_state:
     st.session_state.selected_category = None
 if 'selected_status' not in st.session_state:
     st.session_state.selected_status = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
-@st.cache_data(ttl=600, show_spinner=False)
-def load_sheet(sheet_name, gid):
-    """Load and properly parse data from Google Sheets"""
-    try:
-        url = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={gid}"
-        df = pd.read_csv(url)
-        df.columns = df.columns.str.strip()
-        
-        # Parse numeric columns
-        for col in df.columns:
-            if col not in ['Employee Name', 'Project Name', 'Role', 'Team', 'Category', 'Status', 'Status Allocation', 'Employee_id', 'Employee Id']:
-                try:
-                    if df[col].dtype == 'object':
-                        df[col] = df[col].astype(str).str.replace('Rp', '', regex=False)
-                        df[col] = df[col].str.replace('.', '', regex=False)
-                        df[col] = df[col].str.replace(',', '', regex=False)
-                        df[col] = df[col].str.replace('%', '', regex=False)
-                        df[col] = df[col].str.strip()
-                        converted = pd.to_numeric(df[col], errors='coerce')
-                        if not converted.isna().all():
-                            df[col] = converted
-                except:
-                    pass
-        
-        # Parse date columns
-        date_cols = ['Start Date', 'End Date', 'Month', 'Growth Month', 'Month_Key', 'month', 'Join Date']
-        for col in date_cols:
-            if col in df.columns:
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                except:
-                    pass
+@st.cache_resource(show_spinner=False)
+def get_refresh_scheduler():
+    """One background refresher per process, shared by every session"""
+    return RefreshScheduler(SHEET_GIDS, keep_frames=QUERY_BACKEND == "pandas").start()
+
+
+# Sheets are compacted and shared by every session (not a per-session copy). The
+# scheduler refreshes them in the background, so this never waits for a fetch
+# once the first load is done.
+def load_all_sheets():
+    """The current bundle of every sheet in SHEET_GIDS"""
+    return get_refresh_scheduler().current()
+
+def stream_missing_sheets():
+    """First load with MANPOWER_STREAM_INGEST: stream sheets that have no snapshot yet.
+    
+    Shows progress and provisional KPIs from the Project_PnL rows parsed so
+    far, and returns once every sheet is snapshotted (or has failed, in
+    which case the regular loader fetches it and reports the error).
+    """
+    store = SnapshotStore()
+    jobs = {name: start_ingest(store, name, gid) for name, gid in SHEET_GIDS.items() if store.read_meta(name) is None}
+    if not jobs:
+        return
+    
+    progress_bar = st.progress(0.0)
+    provisional = st.empty()
+    while not all(job.done.is_set() for job in jobs.values()):
+        fractions = [job.progress() or 0.0 for job in jobs.values()]
+        rows = sum(job.rows for job in jobs.values())
+        progress_bar.progress(sum(fractions) / len(fractions), text=f"Loading data from Google Sheets... {rows:,} rows")
         
-        return df
-    except Exception as e:
-        st.error(f"Error loading {sheet_name}: {str(e)}")
-        return pd.DataFrame()
+        pnl_job = jobs.get("Project_PnL")
+        if pnl_job is not None and pnl_job.rows:
+            sums = pnl_job.sums
+            with provisional.container():
+                st.caption(f"Provisional totals from the first {pnl_job.rows:,} Project_PnL rows")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("💰 Total Revenue", format_currency(sums.get('Revenue', 0)))
+                col2.metric("💼 Total Man Power Cost", format_currency(sums.get('Man Power Cost', 0)))
+                col3.metric("📈 Total P&L", format_currency(sums.get('PnL', 0)))
+        time.sleep(0.5)
+    
+    progress_bar.empty()
+    provisional.empty()
 
 def format_currency(value):
     """Format as Rupiah"""
@@ -126,49 +165,554 @@ def format_currency(value):
         return "Rp 0"
     return f"Rp {value:,.0f}".replace(",", ".")
 
-def find_col(df, names):
-    """Find column by multiple possible names (case-insensitive)"""
-    if df.empty:
-        return None
-    df_cols_lower = {col.lower(): col for col in df.columns}
-    for name in names:
-        if name.lower() in df_cols_lower:
-            return df_cols_lower[name.lower()]
-    return None
+# Display formats, applied by st.dataframe in the browser; "'." groups thousands
+# with dots, as format_currency does for the KPI cards
+CURRENCY_FORMAT = "Rp %'.,d"
+PERCENT_FORMAT = "%.2f%%"
+
+def money_columns(currency_cols=(), percent_cols=()):
+    """Column config that shows numeric columns as Rupiah or percentages"""
+    config = {col: st.column_config.NumberColumn(format=CURRENCY_FORMAT) for col in currency_cols}
+    config.update({col: st.column_config.NumberColumn(format=PERCENT_FORMAT) for col in percent_cols})
+    return config
+
+def allocation_table(per_employee, df):
+    """Paging/sorting engine for allocation rows or their per-employee roll-up"""
+    if per_employee:
+        return TableEngine(employee_rollup(df, 'Month_Key'), ['Employee Name', 'Role'])
+    return TableEngine(df, ['Employee Name', 'Role', 'Project Name'])
+
+@metrics.track_cache("reconciliation", SHARED_CACHE.memoize)
+def get_reconciliation(versions, filters, _backend):
+    """Reconcile the cost sheets once per data version and filter state"""
+    return reconcile_query(_backend, filters)
+
+@metrics.track_cache("allocation_table", SHARED_CACHE.memoize)
+def get_allocation_table(version, filters, per_employee, _df):
+    """Build the allocation table engine once per data version and filter state"""
+    return allocation_table(per_employee, _df)
+
+@metrics.track_cache("filter_engine", SHARED_CACHE.memoize)
+def get_filter_engine(version, date_col, _df):
+    """Build the indexed filter engine once per sheet data version"""
+    return FilterEngine(_df, date_col)
+
+@metrics.track_cache("pnl_cube", SHARED_CACHE.memoize)
+def get_pnl_cube(version, month_col, _df):
+    """Build the pre-aggregated P&L cube once per data version"""
+    return PnLCube(_df, month_col)
+
+@metrics.track_cache("trend_engine", SHARED_CACHE.memoize)
+def get_trend_engine(version, month_col, _partials, _previous=None):
+    """Build the P&L trend engine once per data version, extending ``_previous`` when only months were added.
+
+    ``_partials`` returns the sheet summed per month and trend key; it is only queried on a miss.
+    """
+    return trend_engine(_partials(), month_col, ROW_COUNT, _previous)
+
+def current_filters():
+    """Filter tuple for the current sidebar selections"""
+    return filter_key(
+        st.session_state.date_range,
+        st.session_state.selected_projects,
+        st.session_state.selected_teams,
+        st.session_state.selected_category,
+        st.session_state.selected_status
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_duckdb_backend(versions):
+    """One DuckDB connection per data version, over the snapshots the scheduler keeps"""
+    return DuckDBBackend(dict(versions), cache=SHARED_CACHE)
+
+def get_query_backend(sheets):
+    """The MANPOWER_QUERY_BACKEND every tab queries through, for this bundle"""
+    if QUERY_BACKEND == "duckdb":
+        return get_duckdb_backend(tuple(sorted(sheets.hashes.items())))
+    # Without a data version (e.g. a failed sheet) the engines are built per rerun, not cached
+    return PandasBackend(
+        sheets,
+        lambda version, date_col, df: get_filter_engine(version, date_col, df) if version else FilterEngine(df, date_col),
+        lambda version, month_col, df: get_pnl_cube(version, month_col, df) if version else PnLCube(df, month_col)
+    )
+
+@metrics.track_cache("compensation_rollup", SHARED_CACHE.memoize)
+def get_compensation_rollup(version, other_filters, numeric_cols, first_cols, _df):
+    """Build the per-employee compensation roll-up once per data version and non-date filters"""
+    return CompensationRollup(_df, DATE_COLUMNS["Salary_Growth"], numeric_cols, first_cols)
+
+def performance_enabled():
+    """Instrument this rerun: always with MANPOWER_METRICS set, otherwise when the sidebar panel is on"""
+    return metrics.ENABLED or st.session_state.get("perf_panel", False)
+
+def tab_fragment(func):
+    """Run a tab as a fragment, measured as one step of the rerun or, when only the tab reruns, as its own run"""
+    @functools.wraps(func)
+    def render(view):
+        with metrics.run(f"tab:{func.__name__.removeprefix('render_')}", performance_enabled(), st.session_state.session_id):
+            func(view)
+    return st.fragment(render)
+
+@metrics.track_cache("figures", FIGURE_CACHE.memoize)
+def get_figure(name, version, filters, params, _build):
+    """Build a chart's JSON spec once per data version, filter tuple and chart parameters, for every session"""
+    return figure_spec(_build())
+
+def show_chart(name, build, version=None, filters=(), params=()):
+    """st.plotly_chart of ``build()``, reusing the cached spec when the data version is known.
+
+    Timed on its own since building and serializing a figure can outweigh
+    preparing its data.
+    """
+    with metrics.span(f"chart:{name}"):
+        fig = spec_figure(get_figure(name, version, filters, params, build)) if version else build()
+        st.plotly_chart(fig, use_container_width=True)
+
+def export_controls(tab, datasets):
+    """Download buttons for a tab's data, typed as queried; each file is written in chunks only when clicked.
+    
+    ``datasets`` maps a file name to its frame.
+    """
+    with st.expander("⬇️ Export"):
+        fmt = st.radio("Format", list(FORMATS), horizontal=True, key=f"export_format_{tab}")
+        for ui, (name, df) in zip(st.columns(len(datasets)), datasets.items()):
+            if fmt not in formats_for(df):
+                ui.caption(f"{name}: {len(df):,} rows do not fit in one Excel sheet")
+                continue
+            ui.download_button(
+                f"{name} ({len(df):,} rows)", data=functools.partial(export_file, df, fmt),
+                file_name=file_name(name, fmt), mime=FORMATS[fmt], key=f"export_{tab}_{name}", on_click="ignore"
+            )
+
+@tab_fragment
+def render_timeline(view):
+    """Tab 1: project timeline"""
+    projects_df = view.backend.sheet("Projects")
+    
+    st.subheader("📅 Project Timeline")
+    
+    start_col = column(projects_df, 'Start Date')
+    end_col = column(projects_df, 'End Date')
+    proj_col = column(projects_df, 'Project Name')
+    
+    if start_col and end_col and proj_col and not projects_df.empty:
+        group_col = None
+        if column(projects_df, 'Category') and st.checkbox("Group by Category", key="timeline_group"):
+            group_col = 'Category'
+        timeline_df = timeline_rows(projects_df, proj_col, start_col, end_col, group_col)
+        
+        if not timeline_df.empty:
+            n_pages = timeline_page_count(timeline_df)
+            page = 1
+            # A refresh or filter change can leave fewer pages than the stored one
+            if st.session_state.get("timeline_page", 1) > n_pages:
+                st.session_state.timeline_page = 1
+            if n_pages > 1:
+                page = st.number_input(
+                    f"Page (of {n_pages}, {TIMELINE_PAGE_SIZE} projects per page)",
+                    min_value=1, max_value=n_pages, key="timeline_page"
+                )
+            
+            show_chart(
+                "timeline", lambda: timeline_figure(timeline_df, proj_col, start_col, end_col, group_col, page),
+                view.backend.version("Projects"), params=(group_col, page)
+            )
+        else:
+            st.info("No timeline data available")
+    else:
+        st.warning("Missing required columns for timeline chart")
+
+# Time series views: the suffix of the trend table columns each one plots
+TREND_VIEWS = {
+    "Monthly": None,
+    "Running total": "Running Total",
+    "3-month average": "3M Avg",
+    "12-month average": "12M Avg",
+    "Month over month": "MoM",
+    "Year over year": "YoY",
+    "Margin": "Margin",
+}
 
-def apply_filters(df, date_col=None):
-    """Apply filters to dataframe"""
-    if df.empty:
-        return pd.DataFrame()
+@tab_fragment
+def render_time_series(view):
+    """Tab 2: time series"""
+    pnl_month_col, pnl_revenue_col, pnl_cost_col, pnl_pnl_col = view.pnl_cols('Month', 'Revenue', 'Man Power Cost', 'PnL')
+    filtered_pnl_df = view.filtered("Project_PnL")
+    
+    st.subheader("📈 Time Series Analysis")
+    
+    if pnl_month_col and pnl_revenue_col and pnl_cost_col and pnl_pnl_col and not filtered_pnl_df.empty:
+        view_name = st.radio("Show", list(TREND_VIEWS), horizontal=True, key="ts_metric")
+        suffix = TREND_VIEWS[view_name]
+        if suffix:
+            # Windows and changes look back before the date range, from the trend engine
+            trends = view.trends()
+            if suffix == "Margin":
+                build = lambda: margin_figure(trends, pnl_month_col, 'Margin', 'Margin 12M')
+            else:
+                build = lambda: time_series_figure(
+                    trends, pnl_month_col, f"{pnl_revenue_col} {suffix}", f"{pnl_cost_col} {suffix}", f"{pnl_pnl_col} {suffix}"
+                )
+            show_chart("time_series_trend", build, view.backend.version("Project_PnL"), view.filters, params=(suffix,))
+            export_controls("time_series", {"pnl_trends": trends, "project_pnl": filtered_pnl_df})
+            return
+        
+        series_filters = view.filters
+        time_series = view.backend.time_series(series_filters)
+        
+        # Long series are downsampled; zooming in re-queries the window at full resolution
+        if len(time_series) > MAX_LINE_POINTS:
+            months = time_series[pnl_month_col].tolist()
+            start, end = st.select_slider(
+                "🔍 Zoom", options=months, value=(months[0], months[-1]),
+                format_func=lambda m: m.strftime('%b %Y'), key="ts_zoom"
+            )
+            if (start, end) != (months[0], months[-1]):
+                series_filters = ((start, end),) + view.filters[1:]
+                time_series = view.backend.time_series(series_filters)
+            if len(time_series) > MAX_LINE_POINTS:
+                st.caption(f"{len(time_series):,} points per line, downsampled to {MAX_LINE_POINTS:,}; zoom in for full resolution")
+        
+        show_chart(
+            "time_series", lambda: time_series_figure(time_series, pnl_month_col, pnl_revenue_col, pnl_cost_col, pnl_pnl_col),
+            view.backend.version("Project_PnL"), series_filters
+        )
+        export_controls("time_series", {"pnl_time_series": time_series, "project_pnl": filtered_pnl_df})
+    else:
+        st.warning("Missing required columns for time series chart")
+
+@tab_fragment
+def render_profitability(view):
+    """Tab 3: profitability matrix"""
+    proj_name_col, pnl_revenue_col, pnl_cost_col, pnl_pnl_col, status_col = view.pnl_cols('Project Name', 'Revenue', 'Man Power Cost', 'PnL', 'Status')
+    filtered_pnl_df = view.filtered("Project_PnL")
     
-    filtered_df = df.copy()
+    st.subheader("🎯 Project Profitability Matrix")
     
-    # Date filter
-    if st.session_state.date_range and date_col and date_col in filtered_df.columns:
-        if pd.api.types.is_datetime64_any_dtype(filtered_df[date_col]):
-            start_date, end_date = st.session_state.date_range
-            mask = (filtered_df[date_col] >= pd.Timestamp(start_date)) & (filtered_df[date_col] <= pd.Timestamp(end_date))
-            filtered_df = filtered_df[mask]
+    if pnl_pnl_col and pnl_revenue_col and pnl_cost_col and status_col and not filtered_pnl_df.empty:
+        bubble_df = filtered_pnl_df[[proj_name_col, pnl_pnl_col, pnl_revenue_col, pnl_cost_col, status_col]].dropna()
+        
+        if not bubble_df.empty:
+            n_rows = len(bubble_df)
+            bubble_df = profitability_rows(bubble_df, pnl_cost_col)
+            if len(bubble_df) < n_rows:
+                st.caption(f"Showing the {len(bubble_df):,} largest of {n_rows:,} rows by cost; filter by project to see the rest")
+            show_chart(
+                "profitability",
+                lambda: profitability_figure(bubble_df, proj_name_col, pnl_pnl_col, pnl_revenue_col, pnl_cost_col, status_col),
+                view.backend.version("Project_PnL"), view.filters
+            )
+        else:
+            st.info("No profitability data available")
+    else:
+        st.warning("Missing required columns for profitability matrix")
+
+@tab_fragment
+def render_cost_breakdown(view):
+    """Tab 4: cost breakdown by team"""
+    cost_schema = view.backend.schema("Manpower_Cost_Per_Project")
     
-    # Project filter
-    if st.session_state.selected_projects and 'Project Name' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Project Name'] == st.session_state.selected_projects]
+    st.subheader("🥧 Cost Breakdown by Team")
     
-    # Team filter  
-    if st.session_state.selected_teams and 'Team' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Team'] == st.session_state.selected_teams]
+    team_col = column(cost_schema, 'Team')
+    cost_col = column(cost_schema, 'Cost')
     
-    # Category filter
-    if st.session_state.selected_category and 'Category' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Category'] == st.session_state.selected_category]
+    if team_col and cost_col:
+        # Summed where the rows are, largest team first
+        team_cost = view.backend.group_sum("Manpower_Cost_Per_Project", view.filters, [team_col], [cost_col])
+        team_cost = team_cost.dropna().sort_values(cost_col, ascending=False)
+        
+        if not team_cost.empty:
+            show_chart(
+                "cost_breakdown", lambda: team_cost_figure(team_cost, team_col, cost_col),
+                view.backend.version("Manpower_Cost_Per_Project"), view.filters
+            )
+            export_controls("cost_breakdown", {"team_cost": team_cost,
+                                               "manpower_cost": view.filtered("Manpower_Cost_Per_Project")})
+        else:
+            st.info("No cost data available")
+    else:
+        st.warning("Missing required columns for cost breakdown")
+
+@tab_fragment
+def render_pnl_summary(view):
+    """Tab 5: P&L summary table"""
+    filtered_pnl_df = view.filtered("Project_PnL")
+    
+    st.subheader("📊 Project P&L Summary")
+    
+    if st.radio("View", ["Rows", "Per project trends"], horizontal=True, key="pnl_summary_view") != "Rows":
+        engine = view.trend_engine() if not filtered_pnl_df.empty else None
+        if engine is None:
+            st.warning("Missing required columns for P&L trends")
+        elif not TrendEngine.covers(view.filters):
+            st.info("Per project trends are kept per project and category; clear the Team and Status filters to see them")
+        else:
+            trends_df = engine.summary(view.filters)
+            percent_cols = [c for c in ('Margin', 'Margin 12M') if c in trends_df.columns]
+            currency_cols = [c for c in trends_df.columns if c not in percent_cols and c not in engine.keys]
+            st.caption("YoY compares with the same months a year earlier; 12M is the 12 months to the end of the range")
+            st.dataframe(trends_df, column_config=money_columns(currency_cols, percent_cols), use_container_width=True, height=600)
+            export_controls("pnl_summary", {"pnl_trends": trends_df, "project_pnl": filtered_pnl_df})
+        return
+    
+    # Grand total comes from the P&L cube; values stay numeric
+    summary = pnl_summary(filtered_pnl_df, view.pnl_totals) if not filtered_pnl_df.empty else None
+    if summary is not None:
+        display_df, currency_cols, percent_cols = summary
+        st.dataframe(display_df, column_config=money_columns(currency_cols, percent_cols), use_container_width=True, height=600)
+        export_controls("pnl_summary", {"pnl_summary": display_df, "project_pnl": filtered_pnl_df})
+    else:
+        st.warning("Missing required columns for P&L summary")
+
+@tab_fragment
+def render_allocation(view):
+    """Tab 6: employee allocation"""
+    filtered_allocation_df = view.filtered("Manpower_Allocation")
+    
+    st.subheader("👥 Employee Cost Allocation")
+    
+    if not filtered_allocation_df.empty:
+        emp_name_col = column(filtered_allocation_df, 'Employee Name')
+        alloc_proj_col = column(filtered_allocation_df, 'Allocation per project')
+        total_alloc_col = column(filtered_allocation_df, 'Total Allocation')
+        total_cost_col = column(filtered_allocation_df, 'Total Cost')
+        
+        if emp_name_col:
+            view_mode = st.radio("Show", ["Allocation rows", "Per employee"], horizontal=True, key="alloc_view")
+            per_employee = view_mode == "Per employee"
+            alloc_version = view.backend.version("Manpower_Allocation")
+            if alloc_version:
+                table = get_allocation_table(alloc_version, view.filters, per_employee, filtered_allocation_df)
+            else:
+                table = allocation_table(per_employee, filtered_allocation_df)
+            
+            search_ui, sort_ui, order_ui = st.columns([2, 2, 1])
+            with search_ui:
+                search = st.text_input("🔎 Search employee, role or project", key="alloc_search")
+            with sort_ui:
+                sort_by = st.selectbox("Sort by", ["Sheet order"] + list(table.df.columns), key=f"alloc_sort_{per_employee}")
+            with order_ui:
+                descending = st.checkbox("Descending", key="alloc_desc")
+            sort_by = None if sort_by == "Sheet order" else sort_by
+            
+            n_rows = table.count(search, sort_by, descending)
+            n_pages = max(1, math.ceil(n_rows / PAGE_SIZE))
+            if st.session_state.get("alloc_page", 1) > n_pages:
+                st.session_state.alloc_page = 1
+            page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, key="alloc_page")
+            
+            page_df = table.page(page, PAGE_SIZE, search, sort_by, descending)
+            first_row = (page - 1) * PAGE_SIZE + 1 if n_rows else 0
+            st.caption(f"Showing {first_row:,}–{first_row + len(page_df) - 1 if n_rows else 0:,} of {n_rows:,} rows")
+            
+            column_config = money_columns(
+                [c for c in [total_cost_col] if c],
+                [c for c in [alloc_proj_col, total_alloc_col] if c and c in page_df.columns]
+            )
+            st.dataframe(page_df, column_config=column_config, use_container_width=True, height=600)
+            datasets = {"allocation_per_employee": table.df} if per_employee else {}
+            export_controls("allocation", {**datasets, "manpower_allocation": filtered_allocation_df})
+        else:
+            st.warning("Missing required columns for allocation table")
+    else:
+        st.info("No allocation data available")
+
+@tab_fragment
+def render_compensation(view):
+    """Tab 7: compensation"""
+    filtered_salary_df = view.filtered("Salary_Growth")
     
-    # Status filter
-    if st.session_state.selected_status and 'Status' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Status'] == st.session_state.selected_status]
+    st.subheader("💰 Employee Compensation & Benefit Structure")
     
-    return filtered_df
+    if not filtered_salary_df.empty:
+        # Employee key columns, numeric columns to take the MAX of, and categorical columns to take first
+        groupby_cols, numeric_cols, first_cols = compensation_columns(filtered_salary_df)
+        
+        if groupby_cols and numeric_cols:
+            # TAHAP 1: MAX values per employee, served from cached per-month partials
+            rollup = view.compensation_rollup(numeric_cols, first_cols)
+            employee_max, numeric_totals = rollup.query(view.filters[0])
+            
+            # TAHAP 2: Grand Total (SUM of all MAX values); formatting happens in the browser
+            display_comp_df, figures, currency_cols, percent_cols = compensation_summary(employee_max, numeric_totals, numeric_cols)
+            
+            st.dataframe(display_comp_df, column_config=money_columns(currency_cols, percent_cols), use_container_width=True, height=600)
+            
+            # Show summary metrics
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("👥 Unique Employees", figures["Unique Employees"])
+            with col2:
+                if "Total Compensation Cost" in figures:
+                    st.metric("💰 Total Compensation Cost", format_currency(figures["Total Compensation Cost"]))
+            with col3:
+                if "Average Salary" in figures:
+                    st.metric("📊 Average Salary", format_currency(figures["Average Salary"]))
+            export_controls("compensation", {"compensation_summary": display_comp_df, "salary_growth": filtered_salary_df})
+        else:
+            st.dataframe(filtered_salary_df.head(50), use_container_width=True, height=600)
+    else:
+        st.info("No compensation data available")
 
-def main():
+@tab_fragment
+def render_reconciliation(view):
+    """Tab 8: cost reconciliation"""
+    st.subheader("🧮 Cost Reconciliation")
+    st.caption(
+        "Cost derived from Allocation per project × each employee's salary as of that month (Salary_Growth), "
+        f"compared with the cost sheets; differences over {RECONCILE_TOLERANCE:.0%} are flagged"
+    )
+    
+    names = ["Manpower_Allocation", "Salary_Growth", "Manpower_Cost_Per_Project", "Project_PnL"]
+    versions = tuple(view.backend.version(name) for name in names)
+    if not (versions[0] and versions[1]):
+        st.info("No allocation or salary data available")
+        return
+    # Costs are derived and the cost sheets summed by the query backend; only the groups come back
+    with metrics.span("reconcile"):
+        if all(versions):
+            tables = get_reconciliation(versions, view.filters, view.backend)
+        else:
+            tables = reconcile_query(view.backend, view.filters)
+    if not tables:
+        st.warning("Missing required columns for cost reconciliation")
+        return
+    if any(view.filters[3:]):
+        st.caption(
+            "Allocations have no Category or Status, so with those filters only the months and projects "
+            "left in each cost sheet are compared; allocations outside them are not flagged"
+        )
+    
+    labels = {"cost_per_project": "Manpower_Cost_Per_Project (month × project × team)",
+              "project_pnl": "Project_PnL Man Power Cost (month × project)"}
+    choice = st.radio("Compare with", [labels[name] for name in tables], horizontal=True, key="reconcile_sheet")
+    compared = next(name for name in tables if labels[name] == choice)
+    table = tables[compared]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🚩 Flagged", f"{int(table['Flagged'].sum()):,} of {len(table):,}")
+    with col2:
+        st.metric("🧮 Derived Cost", format_currency(table['Derived Cost'].sum()))
+    with col3:
+        st.metric("📄 Sheet Cost", format_currency(table['Sheet Cost'].sum()))
+    
+    if st.checkbox("Only flagged rows", value=True, key="reconcile_flagged"):
+        table = table[table['Flagged']]
+    st.dataframe(
+        table,
+        column_config=money_columns(['Derived Cost', 'Sheet Cost', 'Difference'], ['Difference %']),
+        use_container_width=True, hide_index=True, height=600
+    )
+    export_controls("reconciliation", {f"reconciliation_{compared}": table})
+
+TABS = {
+    "📅 Timeline": render_timeline,
+    "📈 Time Series": render_time_series,
+    "🎯 Profitability": render_profitability,
+    "🥧 Cost Breakdown": render_cost_breakdown,
+    "📊 P&L Summary": render_pnl_summary,
+    "👥 Allocation": render_allocation,
+    "💰 Compensation": render_compensation,
+    "🧮 Reconciliation": render_reconciliation
+}
+
+class DashboardView:
+    """Everything a tab needs, with filtered sheets computed only on first use"""
+    
+    def __init__(self, backend, filters, pnl_totals):
+        self.backend = backend
+        self.filters = filters
+        self.pnl_totals = pnl_totals
+        self._filtered = {}
+    
+    def pnl_cols(self, *names):
+        """Canonical Project_PnL column names, or None for each one that is missing"""
+        pnl_schema = self.backend.schema("Project_PnL")
+        return tuple(column(pnl_schema, name) for name in names)
+    
+    def filtered(self, sheet_name, dates=True):
+        """The sheet with the sidebar filters applied, optionally ignoring the date range"""
+        if (sheet_name, dates) not in self._filtered:
+            filters = self.filters if dates else (None,) + self.filters[1:]
+            with metrics.span(f"filter:{sheet_name}"):
+                self._filtered[sheet_name, dates] = self.backend.filtered(sheet_name, filters)
+        return self._filtered[sheet_name, dates]
+    
+    def compensation_rollup(self, numeric_cols, first_cols):
+        """Per-employee Salary_Growth roll-up for the non-date filters; query it with a date range"""
+        salary_df = self.filtered("Salary_Growth", dates=False)
+        version = self.backend.version("Salary_Growth")
+        if version:
+            return get_compensation_rollup(version, self.filters[1:], tuple(numeric_cols), tuple(first_cols), salary_df)
+        return CompensationRollup(salary_df, DATE_COLUMNS["Salary_Growth"], numeric_cols, first_cols)
+    
+    def trend_engine(self):
+        """The Project_PnL :class:`TrendEngine` for this data version, or None without a version or columns"""
+        month_col, = self.pnl_cols('Month')
+        version = self.backend.version("Project_PnL")
+        keys = [c for c in self.pnl_cols(*TREND_KEYS) if c]
+        if not (version and month_col and keys):
+            return None
+        measures = self.backend.pnl_measures()
+        # Extend the engine of the version this session saw before, while the cache still holds it
+        seen = st.session_state.get("trend_version")
+        st.session_state.trend_version = version
+        previous = get_trend_engine.peek(seen, month_col) if seen and seen != version else None
+        with metrics.span("trend_engine"):
+            return get_trend_engine(
+                version, month_col, lambda: self.backend.partials("Project_PnL", [month_col] + keys, measures), previous
+            )
+    
+    def trends(self):
+        """Monthly trend metrics of Project_PnL for the filters; team and status filters are summed per month first"""
+        month_col, = self.pnl_cols('Month')
+        engine = self.trend_engine() if TrendEngine.covers(self.filters) else None
+        if engine is not None:
+            return engine.series(self.filters)
+        time_series = self.backend.time_series((None,) + self.filters[1:])
+        months, sums = monthly_sums(time_series, month_col, self.backend.pnl_measures())
+        return trend_metrics(months, sums, self.filters[0], month_col)
+
+def show_performance_panel(run, sheets):
+    """Sidebar diagnostics for the last full rerun: time and memory per step, cache hits and misses"""
+    st.sidebar.metric("⏱️ Rerun time", f"{run.seconds * 1000:,.0f} ms")
+    st.sidebar.caption(f"Process memory: {run.rss / 2**20:,.0f} MB")
+    if run.spans:
+        steps = pd.DataFrame(run.spans)
+        steps["ms"] = steps.pop("seconds") * 1000
+        steps["RSS Δ (MB)"] = steps.pop("rss_delta") / 2**20
+        st.sidebar.dataframe(
+            steps.rename(columns={"name": "Step"}),
+            column_config={"ms": st.column_config.NumberColumn(format="%.1f"),
+                           "RSS Δ (MB)": st.column_config.NumberColumn(format="%.1f")},
+            hide_index=True, use_container_width=True
+        )
+    if run.cache:
+        cache = pd.DataFrame.from_dict(run.cache, orient="index").rename_axis("Cache").reset_index()
+        st.sidebar.dataframe(cache, hide_index=True, use_container_width=True)
+    
+    memory = []
+    for name, df in sheets.frames.items():
+        sizes = sheets.reports.get(name, {}).get("memory", {})
+        memory.append({"Sheet": name, "Rows": len(df), "MB": sizes.get("after", 0) / 2**20,
+                       "Uncompacted MB": sizes.get("before", 0) / 2**20})
+    if memory:
+        st.sidebar.dataframe(
+            pd.DataFrame(memory),
+            column_config={"MB": st.column_config.NumberColumn(format="%.1f"),
+                           "Uncompacted MB": st.column_config.NumberColumn(format="%.1f")},
+            hide_index=True, use_container_width=True
+        )
+    for label, cache in (("Shared cache", SHARED_CACHE), ("Figure cache", FIGURE_CACHE)):
+        stats = cache.stats()
+        st.sidebar.caption(
+            f"{label}: {stats['entries']} entries, {stats['bytes'] / 2**20:,.0f} of "
+            f"{stats['budget_bytes'] / 2**20:,.0f} MB, {stats['evictions']} evicted"
+        )
+
+def render_dashboard():
     # Add logout button in sidebar
     st.sidebar.markdown("---")
     if st.sidebar.button("🚪 Logout"):
@@ -177,39 +721,47 @@ def main():
     
     st.title("📊 Man Power Cost Analysis Dashboard")
     st.markdown("Real-time insights into employee allocation, project costs, and profitability")
-    st.markdown(f"**Data Last Update:** {datetime.now().strftime('%b %d, %Y, %I:%M:%S %p')}")
-    st.markdown("---")
     
     # Load data
-    with st.spinner("Loading data from Google Sheets..."):
-        employees_df = load_sheet("Employees", SHEET_GIDS["Employees"])
-        salary_growth_df = load_sheet("Salary_Growth", SHEET_GIDS["Salary_Growth"])
-        projects_df = load_sheet("Projects", SHEET_GIDS["Projects"])
-        manpower_cost_df = load_sheet("Manpower_Cost_Per_Project", SHEET_GIDS["Manpower_Cost_Per_Project"])
-        manpower_allocation_df = load_sheet("Manpower_Allocation", SHEET_GIDS["Manpower_Allocation"])
-        project_pnl_df = load_sheet("Project_PnL", SHEET_GIDS["Project_PnL"])
-    
-    if project_pnl_df.empty:
+    if STREAM_INGEST:
+        stream_missing_sheets()
+    with st.spinner("Loading data from Google Sheets..."), metrics.span("load_sheets"):
+        sheets = load_all_sheets()
+    
+    last_update = min(sheets.fetched_at.values()) if sheets.fetched_at else datetime.now()
+    st.markdown(f"**Data Last Update:** {last_update.strftime('%b %d, %Y, %I:%M:%S %p')}")
+    st.markdown("---")
+    
+    for sheet_name, error in sheets.errors.items():
+        st.error(f"Error loading {sheet_name}: {error}")
+    
+    for sheet_name, report in sheets.reports.items():
+        if report.get("errors"):
+            with st.expander(f"⚠️ Some values in {sheet_name} could not be parsed"):
+                st.json(report["errors"])
+    
+    backend = get_query_backend(sheets)
+    employees_df = backend.sheet("Employees")
+    project_pnl_schema = backend.schema("Project_PnL")
+    
+    if "Project_PnL" not in sheets.hashes or project_pnl_schema.columns.empty:
         st.error("⚠️ Unable to load data. Make sure spreadsheet is public!")
         st.stop()
     
-    # Detect column names
-    pnl_month_col = find_col(project_pnl_df, ['Month', 'month', 'Date'])
-    pnl_revenue_col = find_col(project_pnl_df, ['Revenue', 'revenue'])
-    pnl_cost_col = find_col(project_pnl_df, ['Man Power Cost', 'man power cost', 'Cost', 'cost'])
-    pnl_pnl_col = find_col(project_pnl_df, ['PnL', 'pnl', 'P&L'])
-    proj_name_col = find_col(project_pnl_df, ['Project Name', 'project name'])
-    status_col = find_col(project_pnl_df, ['Status', 'status'])
-    category_col = find_col(project_pnl_df, ['Category', 'category'])
-    margin_col = find_col(project_pnl_df, ['Margin', 'margin'])
+    # Column names are resolved to the canonical schema at load time
+    pnl_month_col = column(project_pnl_schema, 'Month')
+    proj_name_col = column(project_pnl_schema, 'Project Name')
+    status_col = column(project_pnl_schema, 'Status')
+    category_col = column(project_pnl_schema, 'Category')
     
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     
     # 1. Date range filter
-    if pnl_month_col and pd.api.types.is_datetime64_any_dtype(project_pnl_df[pnl_month_col]):
-        min_date = project_pnl_df[pnl_month_col].min().date()
-        max_date = project_pnl_df[pnl_month_col].max().date()
+    if pnl_month_col and pd.api.types.is_datetime64_any_dtype(project_pnl_schema[pnl_month_col]):
+        min_month, max_month = backend.bounds("Project_PnL", pnl_month_col)
+        min_date = min_month.date()
+        max_date = max_month.date()
         
         date_range = st.sidebar.date_input(
             "📅 Select Date Range",
@@ -223,19 +775,19 @@ def main():
     
     # 2. Project filter
     if proj_name_col:
-        projects = ["All Projects"] + sorted(project_pnl_df[proj_name_col].dropna().unique().tolist())
+        projects = ["All Projects"] + backend.distinct("Project_PnL", proj_name_col)
         selected_proj = st.sidebar.selectbox("📊 Select Project", projects)
         st.session_state.selected_projects = None if selected_proj == "All Projects" else selected_proj
     
     # 3. Category filter
     if category_col:
-        categories = ["All Categories"] + sorted(project_pnl_df[category_col].dropna().unique().tolist())
+        categories = ["All Categories"] + backend.distinct("Project_PnL", category_col)
         selected_cat = st.sidebar.selectbox("📂 Select Category", categories)
         st.session_state.selected_category = None if selected_cat == "All Categories" else selected_cat
     
     # 4. Status filter
     if status_col:
-        statuses = ["All Status"] + sorted(project_pnl_df[status_col].dropna().unique().tolist())
+        statuses = ["All Status"] + backend.distinct("Project_PnL", status_col)
         selected_stat = st.sidebar.selectbox("✅ Select Status", statuses)
         st.session_state.selected_status = None if selected_stat == "All Status" else selected_stat
     
@@ -248,357 +800,33 @@ def main():
         st.session_state.date_range = None
         st.rerun()
     
-    # Apply filters
-    filtered_pnl_df = apply_filters(project_pnl_df, pnl_month_col)
-    filtered_cost_df = apply_filters(manpower_cost_df, find_col(manpower_cost_df, ['Month_Key', 'Month']))
-    filtered_allocation_df = apply_filters(manpower_allocation_df, find_col(manpower_allocation_df, ['Month_Key', 'Month']))
-    filtered_salary_df = apply_filters(salary_growth_df, find_col(salary_growth_df, ['Growth Month', 'Month']))
-    
-    # KPI Metrics
+    # KPI Metrics (rolled up by the query backend; with pandas, from the P&L cube)
+    filters = current_filters()
+    with metrics.span("kpi"):
+        pnl_totals = backend.pnl_totals(filters)
+    headline = kpis(pnl_totals, employees_df)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_revenue = filtered_pnl_df[pnl_revenue_col].sum() if pnl_revenue_col and not filtered_pnl_df.empty else 0
-        st.metric("💰 Total Revenue", format_currency(total_revenue))
+        st.metric("💰 Total Revenue", format_currency(headline["Total Revenue"]))
     
     with col2:
-        total_cost = filtered_pnl_df[pnl_cost_col].sum() if pnl_cost_col and not filtered_pnl_df.empty else 0
-        st.metric("💼 Total Man Power Cost", format_currency(total_cost))
+        st.metric("💼 Total Man Power Cost", format_currency(headline["Total Man Power Cost"]))
     
     with col3:
-        total_pnl = filtered_pnl_df[pnl_pnl_col].sum() if pnl_pnl_col and not filtered_pnl_df.empty else 0
-        st.metric("📈 Total P&L", format_currency(total_pnl))
+        st.metric("📈 Total P&L", format_currency(headline["Total P&L"]))
     
     with col4:
-        active_employees = len(employees_df) if not employees_df.empty else 0
-        st.metric("👥 Active Employees", active_employees)
+        st.metric("👥 Active Employees", headline["Active Employees"])
     
     st.markdown("---")
     
-    # TABS untuk setiap chart
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "📅 Timeline", 
-        "📈 Time Series", 
-        "🎯 Profitability", 
-        "🥧 Cost Breakdown",
-        "📊 P&L Summary",
-        "👥 Allocation",
-        "💰 Compensation"
-    ])
-    
-    # TAB 1: PROJECT TIMELINE
-    with tab1:
-        st.subheader("📅 Project Timeline")
-        
-        start_col = find_col(projects_df, ['Start Date', 'start date'])
-        end_col = find_col(projects_df, ['End Date', 'end date'])
-        proj_col = find_col(projects_df, ['Project Name', 'project name'])
-        
-        if start_col and end_col and proj_col and not projects_df.empty:
-            timeline_df = projects_df[[proj_col, start_col, end_col]].dropna().sort_values(start_col)
-            
-            if not timeline_df.empty:
-                fig_timeline = go.Figure()
-                colors = px.colors.qualitative.Set3
-                
-                for idx, row in timeline_df.iterrows():
-                    duration = row[end_col] - row[start_col]
-                    fig_timeline.add_trace(go.Bar(
-                        name=row[proj_col],
-                        x=[duration],
-                        y=[row[proj_col]],
-                        orientation='h',
-                        base=row[start_col],
-                        marker=dict(color=colors[idx % len(colors)]),
-                        showlegend=False
-                    ))
-                
-                fig_timeline.update_layout(
-                    height=max(400, len(timeline_df) * 30),
-                    margin=dict(l=0, r=0, t=10, b=0),
-                    plot_bgcolor='white',
-                    xaxis_title="Timeline"
-                )
-                
-                st.plotly_chart(fig_timeline, use_container_width=True)
-            else:
-                st.info("No timeline data available")
-        else:
-            st.warning("Missing required columns for timeline chart")
+    view = DashboardView(backend, filters, pnl_totals)
     
-    # TAB 2: TIME SERIES
-    with tab2:
-        st.subheader("📈 Time Series Analysis")
-        
-        if pnl_month_col and pnl_revenue_col and pnl_cost_col and pnl_pnl_col and not filtered_pnl_df.empty:
-            time_series = filtered_pnl_df.groupby(pnl_month_col).agg({
-                pnl_revenue_col: 'sum',
-                pnl_cost_col: 'sum',
-                pnl_pnl_col: 'sum'
-            }).reset_index()
-            
-            fig_ts = go.Figure()
-            
-            # Revenue - solid green
-            fig_ts.add_trace(go.Scatter(
-                x=time_series[pnl_month_col], 
-                y=time_series[pnl_revenue_col],
-                name='Revenue', 
-                mode='lines+markers',
-                line=dict(color='#10b981', width=3)
-            ))
-            
-            # Cost - dashed orange
-            fig_ts.add_trace(go.Scatter(
-                x=time_series[pnl_month_col], 
-                y=time_series[pnl_cost_col],
-                name='Man Power Cost', 
-                mode='lines+markers',
-                line=dict(color='#f59e0b', width=3, dash='dash')
-            ))
-            
-            # P&L - solid blue
-            fig_ts.add_trace(go.Scatter(
-                x=time_series[pnl_month_col], 
-                y=time_series[pnl_pnl_col],
-                name='Project P&L', 
-                mode='lines+markers',
-                line=dict(color='#3b82f6', width=3)
-            ))
-            
-            fig_ts.update_layout(
-                height=500,
-                hovermode='x unified',
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                margin=dict(l=0, r=0, t=30, b=0),
-                plot_bgcolor='white'
-            )
-            
-            fig_ts.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
-            fig_ts.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
-            
-            st.plotly_chart(fig_ts, use_container_width=True)
-        else:
-            st.warning("Missing required columns for time series chart")
-    
-    # TAB 3: PROFITABILITY MATRIX
-    with tab3:
-        st.subheader("🎯 Project Profitability Matrix")
-        
-        if pnl_pnl_col and pnl_revenue_col and pnl_cost_col and status_col and not filtered_pnl_df.empty:
-            bubble_df = filtered_pnl_df[[proj_name_col, pnl_pnl_col, pnl_revenue_col, pnl_cost_col, status_col]].dropna()
-            
-            if not bubble_df.empty:
-                fig_bubble = px.scatter(
-                    bubble_df,
-                    x=pnl_pnl_col, 
-                    y=pnl_revenue_col,
-                    size=pnl_cost_col,
-                    color=status_col,
-                    hover_name=proj_name_col,
-                    color_discrete_map={'Profitable': '#10b981', 'Loss': '#ef4444'},
-                    size_max=60
-                )
-                
-                fig_bubble.update_layout(
-                    height=600,
-                    margin=dict(l=0, r=0, t=30, b=0),
-                    plot_bgcolor='white'
-                )
-                
-                fig_bubble.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb', zeroline=True, zerolinecolor='#9ca3af')
-                fig_bubble.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#e5e7eb')
-                
-                st.plotly_chart(fig_bubble, use_container_width=True)
-            else:
-                st.info("No profitability data available")
-        else:
-            st.warning("Missing required columns for profitability matrix")
-    
-    # TAB 4: COST BREAKDOWN
-    with tab4:
-        st.subheader("🥧 Cost Breakdown by Team")
-        
-        team_col = find_col(filtered_cost_df, ['Team', 'team'])
-        cost_col = find_col(filtered_cost_df, ['Cost', 'cost'])
-        
-        if team_col and cost_col and not filtered_cost_df.empty:
-            team_cost = filtered_cost_df.groupby(team_col)[cost_col].sum().reset_index().dropna()
-            team_cost = team_cost.sort_values(cost_col, ascending=False)
-            
-            if not team_cost.empty:
-                fig_donut = go.Figure(data=[go.Pie(
-                    labels=team_cost[team_col],
-                    values=team_cost[cost_col],
-                    hole=0.5,
-                    marker=dict(colors=px.colors.qualitative.Set2),
-                    textinfo='label+percent'
-                )])
-                
-                fig_donut.update_layout(
-                    height=500,
-                    showlegend=True,
-                    margin=dict(l=0, r=0, t=30, b=0)
-                )
-                
-                st.plotly_chart(fig_donut, use_container_width=True)
-            else:
-                st.info("No cost data available")
-        else:
-            st.warning("Missing required columns for cost breakdown")
-    
-    # TAB 5: P&L SUMMARY TABLE
-    with tab5:
-        st.subheader("📊 Project P&L Summary")
-        
-        if not filtered_pnl_df.empty and all([proj_name_col, pnl_pnl_col, pnl_cost_col, pnl_revenue_col]):
-            summary_cols = [proj_name_col, category_col, status_col, pnl_pnl_col, pnl_cost_col, pnl_revenue_col, margin_col]
-            summary_cols = [c for c in summary_cols if c]
-            
-            summary_df = filtered_pnl_df[summary_cols].copy()
-            
-            # Calculate grand total
-            total_pnl_val = summary_df[pnl_pnl_col].sum()
-            total_cost_val = summary_df[pnl_cost_col].sum()
-            total_revenue_val = summary_df[pnl_revenue_col].sum()
-            total_margin_val = (total_pnl_val / total_revenue_val * 100) if total_revenue_val > 0 else 0
-            
-            # Format display
-            display_df = summary_df.copy()
-            display_df[pnl_pnl_col] = summary_df[pnl_pnl_col].apply(format_currency)
-            display_df[pnl_cost_col] = summary_df[pnl_cost_col].apply(format_currency)
-            display_df[pnl_revenue_col] = summary_df[pnl_revenue_col].apply(format_currency)
-            if margin_col:
-                display_df[margin_col] = summary_df[margin_col].apply(lambda x: f"{x:.2f}%")
-            
-            # Add grand total
-            grand_total = {
-                proj_name_col: "GRAND TOTAL",
-                pnl_pnl_col: format_currency(total_pnl_val),
-                pnl_cost_col: format_currency(total_cost_val),
-                pnl_revenue_col: format_currency(total_revenue_val),
-            }
-            
-            if category_col:
-                grand_total[category_col] = f"{summary_df[category_col].nunique()} Categories"
-            if status_col:
-                grand_total[status_col] = f"{summary_df[status_col].nunique()} Status"
-            if margin_col:
-                grand_total[margin_col] = f"{total_margin_val:.2f}%"
-            
-            grand_total_df = pd.DataFrame([grand_total])
-            display_df = pd.concat([display_df, grand_total_df], ignore_index=True)
-            
-            st.dataframe(display_df, use_container_width=True, height=600)
-        else:
-            st.warning("Missing required columns for P&L summary")
-    
-    # TAB 6: EMPLOYEE ALLOCATION
-    with tab6:
-        st.subheader("👥 Employee Cost Allocation")
-        
-        if not filtered_allocation_df.empty:
-            emp_name_col = find_col(filtered_allocation_df, ['Employee Name', 'employee name'])
-            role_col = find_col(filtered_allocation_df, ['Role', 'role'])
-            alloc_proj_col = find_col(filtered_allocation_df, ['Allocation per project', 'allocation per project'])
-            total_alloc_col = find_col(filtered_allocation_df, ['Total Allocation', 'total allocation'])
-            total_cost_col = find_col(filtered_allocation_df, ['Total Cost', 'total cost'])
-            
-            if emp_name_col:
-                st.dataframe(filtered_allocation_df.head(50), use_container_width=True, height=600)
-            else:
-                st.warning("Missing required columns for allocation table")
-        else:
-            st.info("No allocation data available")
-    
-# TAB 7: COMPENSATION
-    with tab7:
-        st.subheader("💰 Employee Compensation & Benefit Structure")
-        
-        if not filtered_salary_df.empty:
-            # Identify all columns
-            groupby_cols = []
-            for col_name in ['Employee Name', 'Employee_id', 'Employee Id', 'Role', 'Team']:
-                if col_name in filtered_salary_df.columns:
-                    groupby_cols.append(col_name)
-            
-            # Identify numeric columns for aggregation
-            exclude_cols = ['Employee Name', 'Employee_id', 'Employee Id', 'Role', 'Team', 
-                          'Growth Month', 'Month', 'Date', 'month', 'Join Date']
-            
-            numeric_cols = []
-            for col in filtered_salary_df.columns:
-                if col not in exclude_cols and pd.api.types.is_numeric_dtype(filtered_salary_df[col]):
-                    numeric_cols.append(col)
-            
-            # TAHAP 1: Get MAX values per employee for numeric columns
-            if groupby_cols and numeric_cols:
-                # Group by employee and get max for numeric, first for categorical
-                agg_dict = {}
-                for col in numeric_cols:
-                    agg_dict[col] = 'max'
-                
-                # Add non-groupby categorical columns
-                for col in ['Role', 'Team']:
-                    if col in filtered_salary_df.columns and col not in groupby_cols:
-                        agg_dict[col] = 'first'
-                
-                employee_max = filtered_salary_df.groupby('Employee Name', as_index=False).agg(agg_dict)
-                
-                # TAHAP 2: Calculate Grand Total (SUM of all MAX values)
-                grand_total = {'Employee Name': 'GRAND TOTAL'}
-                
-                # Add categorical columns to grand total
-                if 'Employee_id' in employee_max.columns or 'Employee Id' in employee_max.columns:
-                    grand_total[find_col(employee_max, ['Employee_id', 'Employee Id']) or 'Employee Id'] = '-'
-                if 'Role' in employee_max.columns:
-                    grand_total['Role'] = f"{employee_max['Role'].nunique()} Roles"
-                if 'Team' in employee_max.columns:
-                    grand_total['Team'] = f"{employee_max['Team'].nunique()} Teams"
-                
-                # Calculate sum for numeric columns
-                numeric_totals = {}
-                for col in numeric_cols:
-                    numeric_totals[col] = employee_max[col].sum()
-                    grand_total[col] = numeric_totals[col]
-                
-                # Create display dataframe with formatting
-                display_comp_df = employee_max.copy()
-                
-                # Format numeric columns
-                for col in numeric_cols:
-                    if 'Growth' in col or '%' in col or 'growth' in col.lower():
-                        # Format as percentage
-                        display_comp_df[col] = employee_max[col].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "0.00%")
-                        grand_total[col] = f"{numeric_totals[col] / len(employee_max):.2f}%" if len(employee_max) > 0 else "0.00%"
-                    else:
-                        # Format as currency
-                        display_comp_df[col] = employee_max[col].apply(lambda x: format_currency(x) if pd.notna(x) else "Rp 0")
-                        grand_total[col] = format_currency(numeric_totals[col])
-                
-                # Add grand total row
-                grand_total_df = pd.DataFrame([grand_total])
-                display_comp_df = pd.concat([display_comp_df, grand_total_df], ignore_index=True)
-                
-                st.dataframe(display_comp_df, use_container_width=True, height=600)
-                
-                # Show summary metrics
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("👥 Unique Employees", len(employee_max))
-                with col2:
-                    total_cost_col = find_col(employee_max, ['Total Cost', 'total cost'])
-                    if total_cost_col:
-                        st.metric("💰 Total Compensation Cost", format_currency(numeric_totals.get(total_cost_col, 0)))
-                with col3:
-                    current_sal_col = find_col(employee_max, ['Current Salary', 'current salary', 'Salary'])
-                    if current_sal_col:
-                        avg_salary = numeric_totals.get(current_sal_col, 0) / len(employee_max) if len(employee_max) > 0 else 0
-                        st.metric("📊 Average Salary", format_currency(avg_salary))
-            else:
-                st.dataframe(filtered_salary_df.head(50), use_container_width=True, height=600)
-        else:
-            st.info("No compensation data available")
+    # Only the selected tab does any work; each one is a fragment, so
+    # interacting inside it reruns that tab alone
+    active_tab = st.radio("View", list(TABS), horizontal=True, key="active_tab", label_visibility="collapsed")
+    TABS[active_tab](view)
     
     # Footer
     st.markdown("---")
@@ -608,5 +836,15 @@ def main():
         </div>
     """, unsafe_allow_html=True)
 
+def main():
+    with metrics.run("rerun", performance_enabled(), st.session_state.session_id) as run:
+        render_dashboard()
+    
+    # Opt-in diagnostics; fragment-only reruns are recorded to the metrics files but not shown here
+    st.sidebar.markdown("---")
+    st.sidebar.checkbox("⏱️ Performance diagnostics", key="perf_panel")
+    if run is not None and st.session_state.perf_panel:
+        show_performance_panel(run, load_all_sheets())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,44 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.synthetic import generate
+from manpower.sheets import SHEET_GIDS, parse_csv
+
+
+@pytest.fixture(scope="session")
+def synthetic_sheets():
+    """Every synthetic sheet, parsed and compacted as a load would; shared, so copy before changing one"""
+    return {name: parse_csv(raw, name)[0] for name, raw in generate(3_000, seed=1).items()}
+
+
+@pytest.fixture
+def sheet_server(monkeypatch):
+    """Local stand-in for the Google Sheets exports.
+
+    Serves a synthetic CSV for every gid at ``/{gid}.csv``; tests change
+    ``routes`` (path -> ``(status, body)``) to make responses fail.
+    """
+    routes = {f"/{SHEET_GIDS[name]}.csv": (200, raw) for name, raw in generate(200).items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body = routes.get(self.path, (404, b"not found"))
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr("manpower.sheets.EXPORT_URL", base + "/{gid}.csv")
+    monkeypatch.setattr("manpower.workbook.WORKBOOK_URL", base + "/workbook.xlsx")
+    yield routes
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate
+from manpower.backends import ROW_COUNT, PandasBackend
+from manpower.filters import filter_key
+from manpower.reconcile import reconcile_query
+from manpower.sheets import SheetBundle, content_hash, parse_csv
+from manpower.snapshots import SnapshotStore
+from manpower.trends import TrendEngine
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    pytest.importorskip("duckdb")
+    from manpower.backends import DuckDBBackend
+
+    store = SnapshotStore(str(tmp_path_factory.mktemp("snapshots")))
+    frames, hashes = {}, {}
+    for name, raw in generate(3_000).items():
+        frames[name], report = parse_csv(raw, name)
+        hashes[name] = content_hash(raw)
+        store.write(name, frames[name], hashes[name], datetime.now(), report)
+    return PandasBackend(SheetBundle(frames, {}, hashes=hashes)), DuckDBBackend(hashes, store)
+
+
+def keys(backend):
+    months = backend.distinct("Project_PnL", "Month")
+    project = backend.distinct("Project_PnL", "Project Name")[0]
+    category = backend.distinct("Project_PnL", "Category")[0]
+    year = (months[6], months[17])
+    return [filter_key(), filter_key(year), filter_key(year, project=project),
+            filter_key(category=category), filter_key(year, team=backend.distinct("Project_PnL", "Team")[0])]
+
+
+def same(left, right):
+    """Frames equal up to row order, dtypes and categorical versus plain text"""
+    left, right = (df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+                   .sort_values(list(df.columns)).reset_index(drop=True) for df in (left, right))
+    pd.testing.assert_frame_equal(left, right, check_dtype=False)
+
+
+def test_aggregates_match(backends):
+    pandas, duckdb = backends
+    for key in keys(pandas):
+        assert len(pandas.filtered("Project_PnL", key)) > 0
+        assert duckdb.pnl_totals(key) == pytest.approx(pandas.pnl_totals(key))
+        same(pandas.time_series(key), duckdb.time_series(key))
+        same(pandas.group_sum("Manpower_Cost_Per_Project", key, ['Team'], ['Cost']),
+             duckdb.group_sum("Manpower_Cost_Per_Project", key, ['Team'], ['Cost']))
+        same(pandas.filtered("Manpower_Allocation", key), duckdb.filtered("Manpower_Allocation", key))
+    for col in ("Project Name", "Category", "Status"):
+        assert pandas.distinct("Project_PnL", col) == duckdb.distinct("Project_PnL", col)
+    assert pandas.bounds("Project_PnL", "Month") == duckdb.bounds("Project_PnL", "Month")
+
+
+def test_partials_feed_the_same_trends(backends):
+    pandas, duckdb = backends
+    by, measures = ['Month', 'Project Name', 'Category'], pandas.pnl_measures()
+    partials = [backend.partials("Project_PnL", by, measures) for backend in backends]
+    same(*partials)
+    assert partials[0][ROW_COUNT].sum() == len(pandas.sheet("Project_PnL"))
+
+    rows = TrendEngine(pandas.sheet("Project_PnL", columns=by + measures))
+    for key in keys(pandas)[:4]:
+        for engine in (TrendEngine(df, count_col=ROW_COUNT) for df in partials):
+            pd.testing.assert_frame_equal(engine.series(key), rows.series(key))
+            same(engine.summary(key), rows.summary(key))
+
+
+def test_reconciliation_matches(backends):
+    pandas, duckdb = backends
+    for key in keys(pandas):
+        derived = pandas.allocation_costs(key)
+        assert len(derived) > 0
+        same(derived, duckdb.allocation_costs(key))
+        expected, actual = reconcile_query(pandas, key), reconcile_query(duckdb, key)
+        assert expected.keys() == actual.keys() == {"cost_per_project", "project_pnl"}
+        for name in expected:
+            same(expected[name], actual[name])
+            assert np.isfinite(actual[name]["Derived Cost"].fillna(0)).all()
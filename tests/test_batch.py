@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from manpower.batch import directory_names, run_batch
+from manpower.sheets import SheetBundle, parse_csv
+
+
+def test_values_with_the_same_slug_get_separate_directories():
+    names = directory_names(["A/B", "A B", "a_b", "Plain", "Other/Name"])
+
+    assert len(set(names.values())) == 5
+    assert names["Plain"] == "Plain" and names["Other/Name"] == "Other_Name"
+    assert all(names[label].startswith(("A_B_", "a_b_")) for label in ["A/B", "A B", "a_b"])
+    assert directory_names(["A/B", "A B"]) == {label: names[label] for label in ["A/B", "A B"]}
+
+
+def test_colliding_projects_each_keep_their_report(tmp_path):
+    frames = {name: parse_csv(raw, name)[0] for name, raw in generate(300).items()}
+    pnl = frames["Project_PnL"]
+    first, second = pnl["Project Name"].dropna().unique()[:2]
+    names = pnl["Project Name"].astype(object).replace({first: "Alpha/Beta", second: "Alpha Beta"})
+    frames["Project_PnL"] = pnl.assign(**{"Project Name": names})
+
+    written = run_batch(SheetBundle(frames, {}), ["project"], str(tmp_path), workers=1, log=lambda _: None)
+
+    index = pd.read_csv(tmp_path / "project" / "index.csv")
+    assert len(index) == written == index["Directory"].nunique()
+    assert sorted(os.listdir(tmp_path / "project")) == sorted(list(index["Directory"]) + ["index.csv"])
+    collided = index[index["project"].isin(["Alpha/Beta", "Alpha Beta"])]
+    assert len(collided) == 2 and collided["Directory"].str.startswith("Alpha_Beta_").all()
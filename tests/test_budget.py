@@ -0,0 +1,51 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from manpower.budget import BudgetCache
+
+
+def test_concurrent_misses_build_once():
+    cache = BudgetCache()
+    builds = []
+
+    def factory():
+        builds.append(threading.get_ident())
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        values = list(pool.map(lambda _: cache.get_or_create("engine", factory), range(8)))
+
+    assert len(builds) == 1
+    assert all(value is values[0] for value in values)
+
+
+def test_failed_build_is_not_cached():
+    cache = BudgetCache()
+
+    def failing():
+        raise ValueError("sheet unavailable")
+
+    with pytest.raises(ValueError):
+        cache.get_or_create("engine", failing)
+    assert cache.get_or_create("engine", lambda: 42) == 42
+    assert cache.stats()["entries"] == 1
+
+
+def test_peek_finds_a_memoized_result_without_building():
+    cache = BudgetCache()
+    builds = []
+
+    @cache.memoize
+    def engine(version, _df):
+        builds.append(version)
+        return {"version": version}
+
+    assert engine.peek("v1") is None
+    built = engine("v1", object())
+    assert engine.peek("v1") is built
+    assert engine.peek("v2") is None
+    assert builds == ["v1"]
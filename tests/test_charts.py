@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from manpower.budget import BudgetCache
+from manpower.charts import (
+    FIGURE_CACHE,
+    MAX_LINE_POINTS,
+    figure_spec,
+    lttb,
+    profitability_figure,
+    profitability_rows,
+    spec_figure,
+    time_series_figure,
+)
+
+
+def series(n):
+    return pd.DataFrame({'Month': pd.date_range('2020-01-01', periods=n, freq='D'),
+                         'Revenue': np.arange(n, dtype=float), 'Man Power Cost': np.ones(n), 'PnL': np.zeros(n)})
+
+
+def test_cached_spec_renders_the_built_figure_and_is_sized_by_length():
+    fig = time_series_figure(series(1_500), 'Month', 'Revenue', 'Man Power Cost', 'PnL')
+    spec = figure_spec(fig)
+
+    assert json.loads(pio.to_json(spec_figure(spec), validate=False)) == json.loads(pio.to_json(fig))
+    cache = BudgetCache(FIGURE_CACHE.budget_bytes, sizer=FIGURE_CACHE.sizer)
+    cache.get_or_create("chart", lambda: spec)
+    assert cache.stats()["bytes"] == len(spec)
+
+
+def lttb_reference(x, y, n_out):
+    """Largest-Triangle-Three-Buckets written out point by point"""
+    n = len(x)
+    edge = [1 + i * (n - 2) // (n_out - 2) for i in range(n_out - 1)] + [n]
+    kept, previous = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = edge[i], edge[i + 1]
+        next_lo, next_hi = hi, edge[i + 2]
+        mean_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+        mean_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        areas = [abs((x[previous] - mean_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (mean_y - y[previous]))
+                 for j in range(lo, hi)]
+        previous = lo + areas.index(max(areas))
+        kept.append(previous)
+    return kept + [n - 1]
+
+
+def test_lttb_matches_the_reference_algorithm():
+    rng = np.random.default_rng(0)
+    for n, n_out in [(1_000, 100), (5_003, 2_000), (50, 49), (10, 3)]:
+        x = np.sort(rng.uniform(0, 1e6, n))
+        y = np.cumsum(rng.normal(size=n))
+        assert lttb(x, y, n_out).tolist() == lttb_reference(x.tolist(), y.tolist(), n_out)
+    assert lttb(x, y, 50).tolist() == list(range(10))
+
+    months = pd.date_range('2000-01-01', periods=3_000, freq='D')
+    values = rng.normal(size=3_000)
+    expected = lttb_reference(months.asi8.astype(float).tolist(), values.tolist(), 300)
+    assert lttb(months.to_numpy(), values, 300).tolist() == expected
+
+
+def test_long_series_and_bubble_charts_are_capped():
+    df = series(6_000)
+    fig = time_series_figure(df, 'Month', 'Revenue', 'Man Power Cost', 'PnL')
+    for trace in fig.data:
+        assert trace.type == 'scattergl' and trace.mode == 'lines'
+        assert len(trace.x) == MAX_LINE_POINTS
+        assert (trace.x[0], trace.x[-1]) == (df['Month'].iloc[0], df['Month'].iloc[-1])
+
+    bubbles = pd.DataFrame({'Project Name': [f"P{i}" for i in range(2_000)], 'PnL': np.arange(2_000) - 1_000.0,
+                            'Revenue': np.arange(2_000.0), 'Man Power Cost': np.random.default_rng(0).permutation(2_000),
+                            'Status': ['Profitable', 'Loss'] * 1_000})
+    rows = profitability_rows(bubbles, 'Man Power Cost', max_bubbles=500)
+    expected = bubbles.sort_values('Man Power Cost', ascending=False).head(500)
+    assert sorted(rows.index) == sorted(expected.index)
+    assert profitability_rows(bubbles, 'Man Power Cost', max_bubbles=5_000) is bubbles
+    fig = profitability_figure(rows, 'Project Name', 'PnL', 'Revenue', 'Man Power Cost', 'Status')
+    assert sum(len(trace.x) for trace in fig.data) == 500 and fig.data[0].type == 'scatter'
+    fig = profitability_figure(bubbles, 'Project Name', 'PnL', 'Revenue', 'Man Power Cost', 'Status')
+    assert fig.data[0].type == 'scattergl'
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from manpower.compensation import CompensationRollup
+
+NUMERIC = ['Current Salary', 'Growth %', 'Total Cost']
+FIRST = ['Role', 'Team']
+
+
+def per_employee(df, date_range):
+    """Max of each numeric column and the earliest month's Role and Team, by a groupby over the rows"""
+    if date_range is not None:
+        df = df[df['Growth Month'].between(*date_range)]
+    df = df.sort_values('Growth Month', kind='stable', na_position='last')
+    agg = {**{col: 'max' for col in NUMERIC}, **{col: 'first' for col in FIRST}}
+    return df.groupby('Employee Name', observed=True).agg(agg).reset_index()
+
+
+def test_ranges_match_a_groupby_whether_answered_fresh_or_widened(synthetic_sheets):
+    df = synthetic_sheets["Salary_Growth"].sample(frac=1, random_state=0).reset_index(drop=True)
+    df.loc[::13, 'Growth Month'] = pd.NaT
+    rollup = CompensationRollup(df, 'Growth Month', NUMERIC, FIRST)
+    months = sorted(df['Growth Month'].dropna().unique())
+    narrow = (months[10], months[15])
+    # Queried in this order, the later ranges widen the first one on one or both sides
+    ranges = [narrow, (months[4], months[15]), (months[10], months[30]), (months[0], months[-1]), None, (months[12], months[12])]
+
+    for date_range in ranges:
+        employee_max, totals = rollup.query(date_range)
+        expected = per_employee(df, date_range)
+        result = employee_max.sort_values('Employee Name').reset_index(drop=True)
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False, check_categorical=False)
+        assert totals == {col: expected[col].sum() for col in NUMERIC}
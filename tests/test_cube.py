@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manpower.cube import MEASURES, PnLCube
+from manpower.filters import filter_key
+from tests.test_filters import scan, with_gaps
+
+
+def test_totals_time_series_and_options_match_the_rows(synthetic_sheets):
+    df = with_gaps(synthetic_sheets["Project_PnL"], 'Month')
+    cube = PnLCube(df, 'Month')
+    months = sorted(df['Month'].dropna().unique())
+    project, team, category, status = (df[c].dropna().iloc[0] for c in ['Project Name', 'Team', 'Category', 'Status'])
+    keys = [filter_key(), filter_key((months[2], months[13])), filter_key(project=project),
+            filter_key((months[0], months[20]), team=team), filter_key(category=category, status=status)]
+
+    assert len(cube.cube) < len(df)
+    for key in keys:
+        rows = scan(df, 'Month', key)
+        sums = rows[MEASURES].sum()
+        totals = cube.totals(key)
+        assert totals == pytest.approx({**sums.to_dict(), 'Margin': totals['Margin']})
+        margin = sums['PnL'] / sums['Revenue'] * 100 if sums['Revenue'] > 0 else 0
+        assert totals['Margin'] == pytest.approx(margin)
+
+        expected = rows.groupby('Month')[MEASURES].sum().reset_index()
+        pd.testing.assert_frame_equal(cube.time_series(key).reset_index(drop=True), expected)
+
+    for col in ['Project Name', 'Team', 'Category', 'Status']:
+        assert cube.options(col) == sorted(df[col].dropna().unique().tolist())
+    assert cube.month_bounds() == (df['Month'].min(), df['Month'].max())
+    assert cube.months() == [pd.Timestamp(m) for m in months]
+
+
+def test_sheet_without_months_still_totals():
+    df = pd.DataFrame({'Project Name': ['A', 'B', 'A'], 'Revenue': [10, 20, 30], 'PnL': [1, 2, np.nan]})
+    cube = PnLCube(df, 'Month')
+
+    assert cube.totals(filter_key(project='A')) == {'Revenue': 40, 'PnL': 1.0, 'Margin': 2.5}
+    assert cube.time_series(filter_key()).empty
@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from manpower.export import FORMATS, export_file
+
+
+def frame():
+    return pd.DataFrame({
+        'Month': pd.to_datetime(['2024-01-01', '2024-02-01', None]),
+        'Project Name': pd.Categorical(['A', 'B & C', 'A']),
+        'Revenue': [1000.5, None, 3.0],
+        'Headcount': [1, 2, 3],
+    })
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_every_format_is_accepted_by_streamlits_download_converter(fmt):
+    data, _ = convert_data_to_bytes_and_infer_mime(export_file(frame(), fmt, chunk_rows=2), RuntimeError("unsupported"))
+    assert len(data) > 0
+
+    if fmt == "csv":
+        back = pd.read_csv(io.BytesIO(data))
+    elif fmt == "parquet":
+        back = pd.read_parquet(io.BytesIO(data))
+    else:
+        back = pd.read_excel(io.BytesIO(data))
+    assert back['Headcount'].tolist() == [1, 2, 3]
+    assert back['Project Name'].astype(str).tolist() == ['A', 'B & C', 'A']
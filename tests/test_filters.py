@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from manpower.filters import FILTER_COLUMNS, FilterEngine, filter_key
+
+
+def scan(df, date_col, key):
+    """The filter as a plain boolean scan over every row"""
+    date_range, *values = key
+    mask = pd.Series(True, index=df.index)
+    if date_range is not None:
+        mask &= df[date_col].between(*date_range)
+    for col, value in zip(FILTER_COLUMNS, values):
+        if value and col in df.columns:
+            mask &= df[col] == value
+    return df[mask]
+
+
+def with_gaps(df, date_col):
+    """``df`` shuffled, with some undated rows and some missing filter values"""
+    df = df.sample(frac=1, random_state=0).reset_index(drop=True)
+    df.loc[df.index % 17 == 0, date_col] = pd.NaT
+    df.loc[df.index % 23 == 0, 'Team'] = np.nan
+    return df
+
+
+def test_filtered_rows_match_a_full_scan(synthetic_sheets):
+    df = with_gaps(synthetic_sheets["Project_PnL"], 'Month')
+    engine = FilterEngine(df, 'Month')
+    months = sorted(df['Month'].dropna().unique())
+    project, team, category, status = (df[c].dropna().iloc[0] for c in FILTER_COLUMNS)
+    keys = [
+        filter_key(),
+        filter_key((months[3], months[14])),
+        filter_key((months[3], months[3] + pd.offsets.MonthEnd(0))),
+        filter_key(project=project),
+        filter_key((months[0], months[-1]), team=team, status=status),
+        filter_key((months[5], months[30]), project=project, category=category),
+        filter_key(project="No such project"),
+        filter_key((months[-1] + pd.Timedelta(days=40), months[-1] + pd.Timedelta(days=400))),
+    ]
+    for key in keys:
+        result = engine.apply(key)
+        expected = scan(df, 'Month', key)
+        pd.testing.assert_frame_equal(result.sort_index(), expected.sort_index())
+        # Rows come back in date order, undated rows last
+        dated = result['Month'].notna().to_numpy()
+        assert result['Month'][dated].is_monotonic_increasing and not (dated[1:] > dated[:-1]).any()
+        assert engine.apply(key) is result
+
+
+def test_sheet_without_date_column_filters_on_values_only(synthetic_sheets):
+    df = synthetic_sheets["Employees"]
+    engine = FilterEngine(df, None)
+    team = df['Team'].iloc[0]
+
+    key = filter_key(("2020-01-01", "2020-12-31"), team=team)
+    pd.testing.assert_frame_equal(engine.apply(key), df[df['Team'] == team])
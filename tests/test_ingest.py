@@ -0,0 +1,33 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from manpower.ingest import ingest_stream
+from manpower.sheets import parse_csv
+
+
+def assert_same_as_whole_file(raw, sheet_name, chunk_rows):
+    streamed, streamed_report, _ = ingest_stream(io.BytesIO(raw), sheet_name, len(raw), chunk_rows=chunk_rows)
+    whole, whole_report = parse_csv(raw, sheet_name)
+    pd.testing.assert_frame_equal(streamed, whole)
+    assert streamed_report["errors"] == whole_report["errors"]
+    return streamed
+
+
+def test_undeclared_column_typed_once_for_the_whole_stream():
+    raw = b"Month,Project Name,Revenue,Ref\n" + b"".join(
+        f"2024-0{i + 1}-01,P{i},{1000 * i},{ref}\n".encode()
+        for i, ref in enumerate(["abc", "abc", "abc", "103", "104", "105"])
+    )
+    streamed = assert_same_as_whole_file(raw, "Project_PnL", chunk_rows=3)
+
+    assert streamed['Ref'].dtype == np.float32
+    assert streamed['Ref'].tolist()[3:] == [103, 104, 105]
+    assert streamed['Ref'].isna().sum() == 3
+
+
+def test_streamed_synthetic_sheets_match_whole_file():
+    for sheet_name, raw in generate(5_000).items():
+        assert_same_as_whole_file(raw, sheet_name, chunk_rows=700)
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from manpower.filters import FilterEngine, filter_key
+from manpower.reconcile import reconcile
+from manpower.sheets import parse_csv
+
+
+def test_category_filter_restricts_the_allocation_side():
+    sheets = {name: parse_csv(raw, name)[0] for name, raw in generate(2_000).items()}
+    category = sheets["Project_PnL"]["Category"].dropna().iloc[0]
+    key = filter_key(category=category)
+    cost_df = FilterEngine(sheets["Manpower_Cost_Per_Project"]).apply(key)
+    pnl_df = FilterEngine(sheets["Project_PnL"]).apply(key)
+    frames = sheets["Manpower_Allocation"], sheets["Salary_Growth"], cost_df, pnl_df
+
+    unscoped = reconcile(*frames)
+    tables = reconcile(*frames, scoped=True)
+
+    for name, sheet_df, month in (("cost_per_project", cost_df, "Month_Key"), ("project_pnl", pnl_df, "Month")):
+        table = tables[name]
+        assert set(table["Project Name"]) == set(sheet_df["Project Name"].astype(object))
+        assert len(unscoped[name]) > len(table)
+        # Within the months and projects the filter keeps, the result is the unfiltered one
+        pairs = set(zip(sheet_df[month], sheet_df["Project Name"].astype(object)))
+        kept = unscoped[name][[pair in pairs for pair in zip(unscoped[name][month], unscoped[name]["Project Name"])]]
+        pd.testing.assert_frame_equal(table.reset_index(drop=True), kept.reset_index(drop=True), check_dtype=False)
+
+def test_unscoped_allocations_missing_from_the_sheet_are_flagged():
+    allocation = pd.DataFrame({
+        'Month_Key': pd.to_datetime(['2024-01-01', '2024-01-01']), 'Project Name': ['A', 'B'],
+        'Team': ['T', 'T'], 'Employee Id': ['E1', 'E1'], 'Allocation per project': [50.0, 50.0],
+    })
+    salary = pd.DataFrame({'Employee Id': ['E1'], 'Growth Month': pd.to_datetime(['2023-12-01']),
+                           'Current Salary': [1000.0]})
+    cost = pd.DataFrame({'Month_Key': pd.to_datetime(['2024-01-01']), 'Project Name': ['A'],
+                         'Team': ['T'], 'Cost': [500.0]})
+
+    table = reconcile(allocation, salary, cost)["cost_per_project"]
+    assert table["Flagged"].tolist() == [False, True]
+    table = reconcile(allocation, salary, cost, scoped=True)["cost_per_project"]
+    assert table["Project Name"].tolist() == ['A'] and not table["Flagged"].any()
@@ -0,0 +1,57 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from manpower import scheduler
+from manpower.scheduler import RefreshScheduler
+from manpower.sheets import SHEET_GIDS
+from manpower.snapshots import SnapshotStore
+
+SHEETS = {name: SHEET_GIDS[name] for name in ("Projects", "Employees")}
+
+
+def test_unchanged_refresh_moves_fetched_at_but_keeps_the_data(sheet_server, tmp_path):
+    refresher = RefreshScheduler(SHEETS, SnapshotStore(str(tmp_path)))
+    before = refresher.current()
+
+    after = refresher.refresh()
+
+    assert after.hashes == before.hashes
+    assert all(after.frames[name] is before.frames[name] for name in SHEETS)
+    assert all(after.fetched_at[name] > before.fetched_at[name] for name in SHEETS)
+
+
+def test_concurrent_refreshes_of_a_sheet_fetch_it_once(sheet_server, tmp_path, monkeypatch):
+    refresher = RefreshScheduler(SHEETS, SnapshotStore(str(tmp_path)))
+    refresher.current()
+    calls = []
+    refresh_sheets = scheduler.refresh_sheets
+
+    def slow_refresh(store, sheets, max_workers):
+        calls.append(sorted(sheets))
+        time.sleep(0.2)
+        return refresh_sheets(store, sheets, max_workers)
+
+    monkeypatch.setattr(scheduler, "refresh_sheets", slow_refresh)
+    start = threading.Barrier(4)
+
+    def refresh(_):
+        start.wait()
+        return refresher.refresh(["Projects"])
+
+    with ThreadPoolExecutor(4) as pool:
+        bundles = list(pool.map(refresh, range(4)))
+
+    assert calls == [["Projects"]]
+    assert all(bundle.hashes == bundles[0].hashes for bundle in bundles)
+
+
+def test_refreshes_are_jittered_around_the_interval():
+    refresher = RefreshScheduler(SHEETS, interval=100, jitter=0.1)
+    now = time.monotonic()
+    due = [refresher._next_due() - now for _ in range(200)]
+    soon = [refresher._next_due(soon=True) - now for _ in range(200)]
+
+    assert 90 <= min(due) and max(due) <= 111
+    assert max(due) - min(due) > 5
+    assert 0 <= min(soon) and max(soon) <= 11
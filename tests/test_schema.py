@@ -0,0 +1,34 @@
+import numpy as np
+
+from manpower.sheets import parse_csv
+
+SALARY_CSV = (
+    b"Employee Id,Employee Name,Growth Month,Current Salary,Account No\n"
+    b"1,Ani,2024-01-01,Rp 1.000.000,12345678901234567890123\n"
+    b"2,Budi,2024-02-01,99999999999999999999,42\n"
+)
+
+
+def test_out_of_range_integers_are_reported_not_raised():
+    df, report = parse_csv(SALARY_CSV, "Salary_Growth")
+
+    assert df['Current Salary'].iloc[0] == 1_000_000
+    assert np.isnan(df['Current Salary'].iloc[1])
+    assert report["errors"]['Current Salary']["count"] == 1
+    assert report["errors"]['Current Salary']["examples"] == ['99999999999999999999']
+
+
+def test_undeclared_column_overflow_is_missing_and_reported():
+    df, report = parse_csv(SALARY_CSV, "Salary_Growth")
+
+    assert np.isnan(df['Account No'].iloc[0])
+    assert df['Account No'].iloc[1] == 42
+    assert report["errors"]['Account No'] == {"kind": "number", "count": 1, "examples": ['12345678901234567890123']}
+
+
+def test_undeclared_column_that_never_converts_stays_text():
+    raw = b"Employee Id,Growth Month,Account No\n1,2024-01-01,12345678901234567890123\n"
+    df, report = parse_csv(raw, "Salary_Growth")
+
+    assert df['Account No'].tolist() == ['12345678901234567890123']
+    assert 'Account No' not in report["errors"]
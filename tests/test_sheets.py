@@ -0,0 +1,14 @@
+from manpower.sheets import SHEET_GIDS, load_sheets
+
+
+def test_failing_sheet_does_not_affect_the_others(sheet_server):
+    sheet_server[f"/{SHEET_GIDS['Projects']}.csv"] = (500, b"internal error")
+
+    bundle = load_sheets()
+
+    assert list(bundle.errors) == ["Projects"]
+    assert "500" in bundle.errors["Projects"]
+    assert bundle.get("Projects").empty
+    assert sorted(bundle.frames) == sorted(set(SHEET_GIDS) - {"Projects"})
+    assert all(len(df) > 0 for df in bundle.frames.values())
+    assert sorted(bundle.hashes) == sorted(bundle.frames)
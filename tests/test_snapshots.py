@@ -0,0 +1,42 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from manpower.budget import BudgetCache
+from manpower.snapshots import SnapshotStore
+
+
+def pnl(revenue):
+    return pd.DataFrame({'Month': pd.to_datetime(['2024-01-01', '2024-02-01']),
+                         'Project Name': ['A', 'B'], 'Revenue': [revenue, revenue]})
+
+
+def test_versions_are_separate_files_and_old_ones_are_pruned(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    for version, revenue in (("v1" * 8, 1), ("v2" * 8, 2), ("v3" * 8, 3)):
+        store.write("Project_PnL", pnl(revenue), version, datetime.now())
+
+    df, meta = store.read("Project_PnL")
+    assert meta["content_hash"] == "v3" * 8
+    assert df['Revenue'].tolist() == [3, 3]
+    # The current version and the one before it
+    assert sorted(os.listdir(tmp_path)) == ["Project_PnL.json", "Project_PnL.v2v2v2v2v2v2v2v2.parquet",
+                                            "Project_PnL.v3v3v3v3v3v3v3v3.parquet"]
+
+
+def test_duckdb_backend_reads_its_own_version_during_a_refresh(tmp_path):
+    pytest.importorskip("duckdb")
+    from manpower.backends import DuckDBBackend
+
+    store = SnapshotStore(str(tmp_path))
+    cache = BudgetCache()
+    store.write("Project_PnL", pnl(1), "old" * 6, datetime.now())
+    old = DuckDBBackend({"Project_PnL": "old" * 6}, store, cache)
+    # A refresh writes the next version before the served bundle is swapped
+    store.write("Project_PnL", pnl(2), "new" * 6, datetime.now())
+
+    assert old.totals("Project_PnL", (None,) * 5, ['Revenue']) == {'Revenue': 2}
+    new = DuckDBBackend({"Project_PnL": "new" * 6}, store, cache)
+    assert new.totals("Project_PnL", (None,) * 5, ['Revenue']) == {'Revenue': 4}
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from manpower.tables import TableEngine, employee_rollup
+
+SEARCH_COLS = ['Employee Name', 'Role', 'Project Name']
+
+
+def matching(df, text):
+    mask = pd.Series(False, index=df.index)
+    for col in SEARCH_COLS:
+        mask |= df[col].astype(str).str.lower().str.contains(text.lower(), regex=False)
+    return df[mask]
+
+
+def test_pages_match_sorting_and_searching_the_frame(synthetic_sheets):
+    df = synthetic_sheets["Manpower_Allocation"].sample(frac=1, random_state=0).reset_index(drop=True)
+    df.loc[::11, 'Total Cost'] = None
+    engine = TableEngine(df, SEARCH_COLS)
+    text = str(df['Project Name'].iloc[0])[:4].upper()
+
+    pd.testing.assert_frame_equal(engine.page(3, 50), df.iloc[100:150])
+    for search in ["", text, "no such text"]:
+        for col in [None, 'Total Cost', 'Employee Name', 'Month_Key']:
+            expected = matching(df, search) if search else df
+            if col:
+                expected = expected.sort_values(col, kind='stable', na_position='last')
+            assert engine.count(search, col) == len(expected)
+            rows = pd.concat([engine.page(page, 50, search, col) for page in range(1, len(expected) // 50 + 2)])
+            pd.testing.assert_frame_equal(rows, expected)
+
+            if col:
+                descending = pd.concat([engine.page(page, 50, search, col, True) for page in range(1, len(expected) // 50 + 2)])
+                values = expected[col].dropna()
+                assert descending[col].iloc[:len(values)].tolist() == values.sort_values(ascending=False).tolist()
+                assert descending[col].iloc[len(values):].isna().all()
+                assert sorted(descending.index) == sorted(expected.index)
+
+
+def test_employee_rollup_matches_a_per_month_groupby(synthetic_sheets):
+    df = synthetic_sheets["Manpower_Allocation"]
+    rollup = employee_rollup(df, 'Month_Key').set_index('Employee Name').sort_index()
+
+    monthly = df.drop_duplicates(['Employee Name', 'Month_Key'])
+    by_employee = monthly.groupby('Employee Name', observed=True)
+    assert list(rollup.index) == sorted(df['Employee Name'].unique())
+    pd.testing.assert_series_equal(rollup['Total Cost'], by_employee['Total Cost'].sum(), check_names=False)
+    pd.testing.assert_series_equal(rollup['Total Allocation'], by_employee['Total Allocation'].mean(), check_names=False)
+    pd.testing.assert_series_equal(rollup['Months'], by_employee['Month_Key'].nunique(), check_names=False)
+    projects = df.groupby('Employee Name', observed=True)['Project Name'].nunique()
+    pd.testing.assert_series_equal(rollup['Projects'], projects, check_names=False)
+    assert rollup['Total Cost'].sum() < df['Total Cost'].sum()
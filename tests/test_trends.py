@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manpower.filters import filter_key
+from manpower.trends import KEYS, TrendEngine, trend_engine
+
+MEASURES = ['Revenue', 'Man Power Cost', 'PnL']
+
+
+def selected(df, key):
+    for col, value in (('Project Name', key[1]), ('Category', key[3])):
+        if value:
+            df = df[df[col] == value]
+    return df
+
+
+def naive_series(df, key):
+    """The trend table by a groupby over the matching rows, on every month of ``df``'s history"""
+    months = pd.date_range(df['Month'].min(), df['Month'].max(), freq='MS')
+    sums = selected(df, key).groupby('Month')[MEASURES].sum().reindex(months, fill_value=0).astype(float)
+    table = {}
+    for m in MEASURES:
+        table[m] = sums[m]
+        for window in (3, 12):
+            table[f"{m} {window}M Avg"] = sums[m].rolling(window).mean()
+        table[f"{m} MoM"] = sums[m].diff(1)
+        table[f"{m} YoY"] = sums[m].diff(12)
+    rev, pnl = sums['Revenue'], sums['PnL']
+    table['Margin'] = (pnl / rev * 100).where(rev > 0)
+    rev12, pnl12 = rev.rolling(12).sum(), pnl.rolling(12).sum()
+    table['Margin 12M'] = (pnl12 / rev12 * 100).where(rev12 > 0)
+    table = pd.DataFrame(table)
+    if key[0] is not None:
+        table = table[(table.index >= key[0][0].to_period('M').to_timestamp()) & (table.index <= key[0][1])]
+    for m in MEASURES:
+        table.insert(table.columns.get_loc(m) + 1, f"{m} Running Total", table[m].cumsum())
+    return table.rename_axis('Month').reset_index()
+
+
+def naive_summary(df, key):
+    """Per-group totals over the range and a year earlier, by a groupby over the matching rows"""
+    lo, hi = key[0]
+    year = pd.DateOffset(years=1)
+    rows = selected(df, key)
+    def total(start, end):
+        return rows[rows['Month'].between(start, end)].groupby(KEYS, observed=True)[MEASURES].sum()
+    table = total(lo, hi)
+    earlier, trailing = total(lo - year, hi - year).reindex(table.index, fill_value=0), total(hi - year + pd.Timedelta(days=1), hi)
+    for m in ('Revenue', 'PnL'):
+        table[f"{m} YoY"] = table[m] - earlier[m]
+        table[f"{m} 12M"] = trailing[m].reindex(table.index, fill_value=0)
+    return table.astype(float).reset_index()
+
+
+def keys(df):
+    months = sorted(df['Month'].unique())
+    project, category = df['Project Name'].iloc[0], df['Category'].iloc[0]
+    return [filter_key((months[14], months[30]), project, None, category),
+            filter_key((months[12], months[-1]), None, None, category),
+            filter_key((months[20], months[20]), project),
+            filter_key((months[13], months[25]))]
+
+
+@pytest.fixture
+def pnl(synthetic_sheets):
+    return synthetic_sheets["Project_PnL"]
+
+
+def same(actual, expected):
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_series_and_summary_match_a_groupby(pnl):
+    engine = TrendEngine(pnl, 'Month')
+    for key in keys(pnl) + [filter_key(None, None, None, 'R&D')]:
+        assert TrendEngine.covers(key)
+        series = engine.series(key)
+        same(series, naive_series(pnl, key)[series.columns])
+        if key[0] is None:
+            continue
+        summary = engine.summary(key)
+        assert summary['Project Name'].iloc[-1] == "GRAND TOTAL"
+        groups = summary.iloc[:-1].sort_values(KEYS).reset_index(drop=True)
+        expected = naive_summary(pnl, key).sort_values(KEYS)
+        same(groups[expected.columns], expected)
+        for col in expected.columns.drop(KEYS):
+            assert summary[col].iloc[-1] == pytest.approx(expected[col].sum())
+
+
+def test_summary_without_a_year_of_history_has_no_year_over_year(pnl):
+    months = sorted(pnl['Month'].unique())
+    summary = TrendEngine(pnl, 'Month').summary(filter_key((months[2], months[8])))
+    assert summary[['Revenue YoY', 'PnL YoY', 'Revenue 12M', 'PnL 12M']].isna().all().all()
+
+
+def count_builds(monkeypatch):
+    builds = []
+    build = TrendEngine._build
+    monkeypatch.setattr(TrendEngine, "_build", lambda self, df: builds.append(len(df)) or build(self, df))
+    return builds
+
+
+def test_extend_with_later_months_equals_a_full_build(pnl, monkeypatch):
+    months = sorted(pnl['Month'].unique())
+    old = pnl[pnl['Month'] < months[-6]]
+    # A project first seen in the added months, and a later version with rows in a different order
+    newcomer = pnl[pnl['Month'] >= months[-3]].head(5).astype({'Project Name': object})
+    newcomer['Project Name'] = "Project New"
+    new = pd.concat([pnl.astype({'Project Name': object}), newcomer]).sample(frac=1, random_state=0)
+
+    engine = TrendEngine(old, 'Month')
+    builds = count_builds(monkeypatch)
+    extended = trend_engine(new, 'Month', previous=engine)
+    assert builds == []
+    fresh = TrendEngine(new, 'Month')
+    for key in keys(new) + [filter_key((months[-12], months[-1]), "Project New")]:
+        same(extended.series(key), fresh.series(key))
+        same(extended.summary(key), fresh.summary(key))
+    newest = extended.summary(filter_key((months[-3], months[-1]), "Project New"))
+    assert newest['Revenue'].iloc[-1] == newcomer['Revenue'].sum()
+
+
+def test_extend_rebuilds_when_an_earlier_month_changed(pnl, monkeypatch):
+    months = sorted(pnl['Month'].unique())
+    old = pnl[pnl['Month'] < months[-6]]
+    new = pnl.copy()
+    new.loc[new['Month'] == months[3], 'Revenue'] += 1_000_000
+
+    engine = TrendEngine(old, 'Month')
+    builds = count_builds(monkeypatch)
+    extended = engine.extend(new)
+    # The same version again reuses the arrays as they are
+    unchanged = engine.extend(old)
+    assert builds == [len(new)] and unchanged.prefix is engine.prefix
+    assert np.array_equal(unchanged.rows, engine.rows)
+
+    fresh = TrendEngine(new, 'Month')
+    for key in keys(new):
+        same(extended.series(key), fresh.series(key))
+        same(extended.summary(key), fresh.summary(key))
+        same(extended.series(key), naive_series(new, key)[extended.series(key).columns])
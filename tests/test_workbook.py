@@ -0,0 +1,25 @@
+import logging
+
+from manpower.sheets import SHEET_GIDS, download_sheet
+from manpower.workbook import download_sheets
+
+
+def test_broken_workbook_falls_back_to_per_sheet_csv(sheet_server, caplog):
+    sheet_server["/workbook.xlsx"] = (200, b"PK\x03\x04 not really a workbook")
+
+    with caplog.at_level(logging.WARNING, logger="manpower.workbook"):
+        raws, errors = download_sheets(SHEET_GIDS, workbook=True)
+
+    assert errors == {}
+    assert raws == {name: download_sheet(gid) for name, gid in SHEET_GIDS.items()}
+    assert "falling back to per-sheet CSV" in caplog.text
+
+
+def test_failed_workbook_download_falls_back_to_per_sheet_csv(sheet_server):
+    sheet_server["/workbook.xlsx"] = (503, b"unavailable")
+    sheet_server[f"/{SHEET_GIDS['Employees']}.csv"] = (500, b"internal error")
+
+    raws, errors = download_sheets(SHEET_GIDS, workbook=True)
+
+    assert list(errors) == ["Employees"]
+    assert sorted(raws) == sorted(set(SHEET_GIDS) - {"Employees"})